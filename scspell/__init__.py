@@ -24,10 +24,16 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import argparse
+import collections
+import difflib
+import hashlib
+import io
 import os
 import re
 import sys
 import shutil
+import tempfile
+import time
 import uuid
 
 try:
@@ -37,7 +43,44 @@ except ImportError:
     import configparser as ConfigParser
 
 from . import _portable
+from . import _archive
+from ._buffer import EditBuffer
+from ._corpus import BackgroundCorporaFile
+from ._corpus import combine_dictionaries
 from ._corpus import CorporaFile
+from ._corpus import DICT_TYPE_FILEID
+from ._corpus import DICT_TYPE_FILETYPE
+from ._corpus import DICT_TYPE_NATURAL
+from ._corpus import OP_DIFF
+from ._corpus import OP_INTERSECT
+from ._corpus import OP_UNION
+from ._corpus import write_corpora
+from . import _git
+from ._dictdb import is_dictionary_database
+from ._fileids import JSON_SUFFIX
+from ._fileids import open_file_id_map
+from ._fileids import SQLITE_SUFFIX
+from ._fileids import SqliteFileIdMap
+from ._mining import DEFAULT_MAX_WORDS
+from ._mining import VocabularyMiner
+from ._lexers import register_lexer
+from ._regions import parse_region_kinds
+from ._regions import RegionSelector
+from . import _scripts
+from ._scripts import DEFAULT_SCRIPTS
+from ._scripts import parse_scripts
+from ._scripts import ScriptFilter
+from ._setops import difference
+from . import _shard
+from ._shard import parse_shard
+from ._shard import select_shard
+from ._shard import write_report
+from ._skip import compile_skip_pattern
+from ._skip import SkipPatterns
+from ._sniff import FileFilter
+from ._sniff import FileSkipped
+from ._sniff import SKIP_TOO_LARGE
+from . import _watch
 from . import _util
 
 from ._util import set_verbosity
@@ -48,6 +91,23 @@ from ._util import VERBOSITY_MAX
 assert set_verbosity
 assert VERBOSITY_NORMAL is not None
 assert VERBOSITY_MAX is not None
+assert register_lexer
+
+if sys.version_info >= (3, 7):
+    from ._async import async_spell_check
+    from ._async import async_spell_check_texts
+    from ._async import CheckResult
+
+    assert async_spell_check
+    assert async_spell_check_texts
+    assert CheckResult
+
+
+try:
+    from concurrent import futures
+except ImportError:
+    # Python 2 without the futures backport
+    futures = None
 
 
 try:
@@ -67,6 +127,13 @@ CONTEXT_SIZE = 4
 # Subtokens shorter than 4 characters are likely to be abbreviations
 LEN_THRESHOLD = 3
 
+# Number of files read ahead of the one being checked, in report-only mode
+DEFAULT_PREFETCH = 4
+PREFETCH_MAX_WORKERS = 4
+
+# Number of lines shown for each word in triage
+DEFAULT_TRIAGE_SAMPLES = 3
+
 USER_DATA_DIR = _portable.get_data_dir('scspell')
 DICT_DEFAULT_LOC = os.path.join(USER_DATA_DIR, 'dictionary.txt')
 SCSPELL_DATA_DIR = os.path.normpath(
@@ -101,10 +168,24 @@ class MatchDescriptor(object):
     """A MatchDescriptor captures the information necessary to represent a
     token matched within some source code."""
 
-    def __init__(self, text, match_obj):
+    def __init__(self, text, match_obj, buffer=None, span=None):
+        """Describe match_obj, a match within text.
+
+        If buffer is given, it is the EditBuffer whose original text is
+        text; it is used to record replacements and to locate lines.  If
+        span is given, the match is described by its (start, end, token)
+        instead of match_obj; for a match which overlaps replacements
+        already recorded in buffer, that is what
+        EditBuffer.get_edited_span() gives for it.
+
+        """
         self._data = text
-        self._pos = match_obj.start()
-        self._token = match_obj.group()
+        if span is None:
+            (self._pos, self._end) = match_obj.span()
+            self._token = match_obj.group()
+        else:
+            (self._pos, self._end, self._token) = span
+        self._buffer = buffer
         self._context = None
         self._line_num = None
 
@@ -115,10 +196,20 @@ class MatchDescriptor(object):
         """Get the entire string in which the match was found."""
         return self._data
 
+    def get_buffer(self):
+        """Get the EditBuffer for the string, creating one if necessary."""
+        if self._buffer is None:
+            self._buffer = EditBuffer(self._data)
+        return self._buffer
+
     def get_ofs(self):
         """Get the offset within the string where the match is located."""
         return self._pos
 
+    def get_end(self):
+        """Get the offset within the string where the match ends."""
+        return self._end
+
     def get_prefix(self):
         """Get the string preceding this match."""
         return self._data[:self._pos]
@@ -130,39 +221,20 @@ class MatchDescriptor(object):
 
     def get_context(self):
         """Compute the lines of context associated with this match, as a
-        sequence of (line_num, line_string) pairs."""
-        if self._context is not None:
-            return self._context
+        sequence of (line_num, line_string) pairs.
 
-        lines = self._data.split('\n')
-
-        # Compute the byte offset of start of every line
-        offsets = []
-        for i in range(len(lines)):
-            if i == 0:
-                offsets.append(0)
-            else:
-                offsets.append(offsets[i - 1] + len(lines[i - 1]) + 1)
+        Replacements already recorded in the buffer are shown.
 
-        # Compute the line number where the match is located
-        for (i, ofs) in enumerate(offsets):
-            if ofs > self._pos:
-                self._line_num = i
-                break
-        if self._line_num is None:
-            self._line_num = len(lines)
-
-        # Compute the set of lines surrounding this line number
-        self._context = [
-            (i + 1, line.strip('\r\n'))for (i, line) in enumerate(lines)
-            if (i + 1 - self._line_num) in
-            range(-CONTEXT_SIZE // 2, CONTEXT_SIZE // 2 + 1)]
+        """
+        if self._context is None:
+            self._context = self.get_buffer().get_context(
+                self._pos, CONTEXT_SIZE)
         return self._context
 
     def get_line_num(self):
         """Computes the line number of the match."""
         if self._line_num is None:
-            self.get_context()
+            self._line_num = self.get_buffer().get_line_num(self._pos)
         return self._line_num
 
 
@@ -206,6 +278,37 @@ def decompose_token(token):
     return [st.lower() for st in subtokens if st != '']
 
 
+def decompose_token_spans(token):
+    """Locate the subtokens of a token.
+
+    The subtokens are the same as those produced by ``decompose_token()``,
+    but are returned as (start, end) offsets into the token rather than as
+    lower-cased strings.
+
+    :param token: string to be divided
+    :returns: list of (start, end) pairs
+
+    """
+    us_spans = []
+    pos = 0
+    for m in US_REGEX.finditer(token):
+        us_spans.append((pos, m.start()))
+        pos = m.end()
+    us_spans.append((pos, len(token)))
+
+    if ''.join(token[a:b] for (a, b) in us_spans).isupper():
+        # This looks like a CONSTANT_DEFINE_OF_SOME_SORT
+        spans = us_spans
+    else:
+        spans = []
+        for (start, end) in us_spans:
+            pos = start
+            for part in CAMEL_WORD_REGEX.split(token[start:end]):
+                spans.append((pos, pos + len(part)))
+                pos += len(part)
+    return [(a, b) for (a, b) in spans if a != b]
+
+
 def handle_new_filetype(extension, dicts):
     """Handle creation of a new file-type for the given extension.
 
@@ -375,20 +478,20 @@ def handle_failed_check_interactively(
     :param dicts: dictionary set against which to perform matching
     :type  dicts: CorporaFile
     :param ignores: set of tokens to ignore for this session
-    :returns: (text, ofs) where ``text`` is the (possibly modified) source
-              contents and ``ofs`` is the byte offset within the text where
-              searching shall resume.
+    :returns: (text, ofs) where ``text`` is the original source contents and
+              ``ofs`` is the byte offset within the text where searching
+              shall resume.  Replacements are recorded in the match's
+              EditBuffer.
 
     """
     token = match_desc.get_token()
     print("%s:%u: Unmatched '%s' --> {%s}" %
           (filename, match_desc.get_line_num(), token,
            ', '.join([st for st in unmatched_subtokens])))
-    MATCH_REGEX = re.compile(re.escape(match_desc.get_token()))
     while True:
         print("""\
-   (i)gnore, (I)gnore all, (r)eplace, (R)eplace all, (a)dd to dictionary, or
-   show (c)ontext? [i]""")
+   (i)gnore, (I)gnore all, (r)eplace, (R)eplace all, (a)dd to dictionary,
+   (s)uggest corrections, or show (c)ontext? [i]""")
         ch = _portable.getch()
         if ch in (_portable.CTRL_C, _portable.CTRL_D, _portable.CTRL_Z):
             sys.exit(2)
@@ -405,16 +508,24 @@ def handle_failed_check_interactively(
       (Canceled.)\n""")
             else:
                 ignores.add(replacement.lower())
-                tail = re.sub(
-                    MATCH_REGEX, replacement, match_desc.get_remainder(),
-                    1 if ch == 'r' else 0)
-                print()
-                return (match_desc.get_prefix() + tail,
-                        match_desc.get_ofs() + len(replacement))
+                buffer = match_desc.get_buffer()
+                buffer.replace(match_desc.get_ofs(), match_desc.get_end(),
+                               replacement)
+                if ch == 'R':
+                    buffer.replace_all(token, replacement,
+                                       match_desc.get_end())
+                break
         elif ch == 'a':
             if handle_add(unmatched_subtokens, filename, fq_filename,
                           file_id_ref, dicts):
                 break
+        elif ch == 's':
+            # Only on request: the first suggestions take a moment to index
+            for st in unmatched_subtokens:
+                suggestions = dicts.suggest(st, filename)
+                print("   Suggestions for '%s': %s" %
+                      (st, ', '.join(suggestions) or '(none)'))
+            print()
         elif ch == 'c':
             for ctx in match_desc.get_context():
                 print('%4u: %s' % ctx)
@@ -425,7 +536,41 @@ def handle_failed_check_interactively(
             match_desc.get_ofs() + len(match_desc.get_token()))
 
 
-def report_failed_check(match_desc, filename, unmatched_subtokens):
+def format_suggestions(unmatched_subtokens, suggestions):
+    """Format the suggestions for a report line.
+
+    :param suggestions: dict mapping each unmatched subtoken to a list of
+                        suggested words
+    :returns: text to append to the report line, possibly empty
+
+    """
+    if len(unmatched_subtokens) == 1:
+        words = suggestions.get(unmatched_subtokens[0])
+        if not words:
+            return ''
+        return '; suggestions: %s' % ', '.join(words)
+    parts = ['%s -> %s' % (st, ', '.join(suggestions[st]))
+             for st in unmatched_subtokens if suggestions.get(st)]
+    if not parts:
+        return ''
+    return '; suggestions: %s' % '; '.join(parts)
+
+
+def format_failed_check(filename, line_num, token, unmatched_subtokens):
+    """Describe a token which failed the spell check operation, as reported
+    by report_failed_check()."""
+    if len(unmatched_subtokens) == 1:
+        return "%s:%u: '%s' not found in dictionary (from token '%s')" % (
+            filename, line_num, unmatched_subtokens[0], token)
+    unmatched_subtokens = ', '.join(
+        "'%s'" %
+        t for t in unmatched_subtokens)
+    return ("%s:%u: %s were not found in the dictionary (from token '%s')" %
+            (filename, line_num, unmatched_subtokens, token))
+
+
+def report_failed_check(match_desc, filename, unmatched_subtokens,
+                        suggestions=None):
     """Handle a token which failed the spell check operation.
 
     :param match_desc: description of the token matching instance
@@ -433,34 +578,48 @@ def report_failed_check(match_desc, filename, unmatched_subtokens):
     :param filename: name of file containing the token
     :param unmatched_subtokens: sequence of subtokens, each of which failed
                                 spell check
+    :param suggestions: optional dict mapping each unmatched subtoken to a
+                        list of suggested words
     :returns: (text, ofs) where ``text`` is the (possibly modified) source
               contents and ``ofs`` is the byte offset within the text where
               searching shall resume.
 
     """
-    token = match_desc.get_token()
-    if len(unmatched_subtokens) == 1:
-        print(
-            "%s:%u: '%s' not found in dictionary (from token '%s')" %
-            (filename, match_desc.get_line_num(), unmatched_subtokens[0],
-             token),
-            file=sys.stderr)
-    else:
-        unmatched_subtokens = ', '.join(
-            "'%s'" %
-            t for t in unmatched_subtokens)
-        print(
-            "%s:%u: %s were not found in the dictionary (from token '%s')" %
-            (filename,
-             match_desc.get_line_num(),
-             unmatched_subtokens,
-             token),
-            file=sys.stderr)
+    suffix = ''
+    if suggestions:
+        suffix = format_suggestions(unmatched_subtokens, suggestions)
+    print(format_failed_check(filename, match_desc.get_line_num(),
+                              match_desc.get_token(), unmatched_subtokens) +
+          suffix, file=sys.stderr)
     # Default: text is unchanged
     return (match_desc.get_string(),
             match_desc.get_ofs() + len(match_desc.get_token()))
 
 
+class SuggestingReport(object):
+    """Report unmatched subtokens like ``report_failed_check()``, adding
+    suggested corrections from the dictionaries.
+
+    An instance of this class can be passed to ``spell_check()`` as the
+    ``report_only`` argument; ``spell_check(suggest=True)`` does so.
+    """
+
+    def __init__(self, dicts):
+        """
+        Constructor.
+
+        :param dicts: dictionary set from which to draw suggestions
+        :type  dicts: CorporaFile
+        """
+        self.dicts = dicts
+
+    def __call__(self, match_desc, filename, unmatched_subtokens):
+        suggestions = dict((st, self.dicts.suggest(st, filename))
+                           for st in unmatched_subtokens)
+        return report_failed_check(match_desc, filename, unmatched_subtokens,
+                                   suggestions)
+
+
 class Report(object):
     """Collect unmatched subtokens and classify into known and unknown words.
 
@@ -497,9 +656,126 @@ class Report(object):
             match_desc.get_ofs() + len(match_desc.get_token()))
 
 
+class Finding(collections.namedtuple(
+        'Finding', ['filename', 'line_num', 'token', 'subtokens'])):
+
+    """A single spell check failure: the token at line ``line_num`` of
+    ``filename`` contained the unmatched ``subtokens``."""
+
+    __slots__ = ()
+
+
+class FindingCollector(object):
+    """Collect spell check failures as a list of ``Finding`` objects, instead
+    of reporting them.
+
+    An instance of this class can be passed to ``spell_check()`` as the
+    ``report_only`` argument.
+    """
+
+    def __init__(self):
+        self.findings = []
+
+    def __call__(self, match_desc, filename, unmatched_subtokens):
+        self.findings.append(Finding(filename, match_desc.get_line_num(),
+                                     match_desc.get_token(),
+                                     tuple(unmatched_subtokens)))
+        return (
+            match_desc.get_string(),
+            match_desc.get_ofs() + len(match_desc.get_token()))
+
+
+class RecordingReport(FindingCollector):
+    """Report spell check failures with another report callable, and also
+    collect them as a list of ``Finding`` objects.
+
+    ``spell_check(report_file=...)`` uses this to write a report file.
+    """
+
+    def __init__(self, report=report_failed_check):
+        FindingCollector.__init__(self)
+        self.report = report
+
+    def __call__(self, match_desc, filename, unmatched_subtokens):
+        FindingCollector.__call__(self, match_desc, filename,
+                                  unmatched_subtokens)
+        return self.report(match_desc, filename, unmatched_subtokens)
+
+
+class CountingReport(object):
+    """Count spell check failures per file and per unmatched subtoken,
+    instead of reporting each one.
+
+    Line numbers are never computed, which saves splitting each file with
+    failures into lines.  An instance of this class can be passed to
+    ``spell_check()`` as the ``report_only`` argument; ``--summary`` and
+    ``--count`` do so.
+    """
+
+    def __init__(self):
+        self.files = collections.Counter()
+        self.words = collections.Counter()
+
+    def __call__(self, match_desc, filename, unmatched_subtokens):
+        self.files[filename] += 1
+        self.words.update(unmatched_subtokens)
+        return (
+            match_desc.get_string(),
+            match_desc.get_ofs() + len(match_desc.get_token()))
+
+    def print_counts(self, per_file=False):
+        """Print the number of failures, files and distinct words.
+
+        :param per_file: if True, first print the failures of each file,
+                         and the occurrences of each word, most frequent
+                         first
+
+        """
+        if per_file:
+            for filename in sorted(self.files):
+                print('{}: {}'.format(filename, self.files[filename]),
+                      file=sys.stderr)
+            for (word, count) in sorted(self.words.items(),
+                                        key=lambda item: (-item[1], item[0])):
+                print("'{}': {}".format(word, count), file=sys.stderr)
+        total = sum(self.files.values())
+        print('{} finding{} in {} file{}, {} distinct word{}'.format(
+            total, '' if total == 1 else 's',
+            len(self.files), '' if len(self.files) == 1 else 's',
+            len(self.words), '' if len(self.words) == 1 else 's'),
+            file=sys.stderr)
+
+
+class TooManyFindings(Exception):
+
+    """Raised by a LimitedReport to stop checking."""
+
+
+class LimitedReport(object):
+    """Report spell check failures with another report callable, and stop
+    checking once max_findings of them have been reported.
+
+    ``spell_check(max_findings=...)`` uses this to end a run as soon as
+    its outcome is known.
+    """
+
+    def __init__(self, report, max_findings):
+        self.report = getattr(report, '__call__', report_failed_check)
+        self.max_findings = max_findings
+        self.count = 0
+
+    def __call__(self, match_desc, filename, unmatched_subtokens):
+        result = self.report(match_desc, filename, unmatched_subtokens)
+        self.count += 1
+        if self.count >= self.max_findings:
+            raise TooManyFindings('Stopped after {} finding{}'.format(
+                self.count, '' if self.count == 1 else 's'))
+        return result
+
+
 def spell_check_token(
         match_desc, filename, fq_filename, file_id_ref,
-        dicts, ignores, report_only):
+        dicts, ignores, report_only, prematched=None):
     """Spell check a single token.
 
     :param match_desc: description of the token matching instance
@@ -511,56 +787,293 @@ def spell_check_token(
     :param dicts: dictionary set against which to perform matching
     :type  dicts: CorporaFile
     :param ignores: set of tokens to ignore for this session
+    :param prematched: if given, a dict of tokens whose unmatched subtokens
+                       are already known, as prematch_tokens() returns
     :returns: ((text, ofs), error_found) where ``text`` is the (possibly
     modified) source contents and ``ofs`` is the byte offset within the text
     where searching shall resume.
 
     """
     token = match_desc.get_token()
-    if (token.lower() not in ignores) and (HEX_REGEX.match(token) is None):
+    unmatched_subtokens = []
+    if prematched is not None and token in prematched:
+        unmatched_subtokens = prematched[token]
+    elif (token.lower() not in ignores) and (HEX_REGEX.match(token) is None):
         subtokens = decompose_token(token)
         unmatched_subtokens = [
             st for st in subtokens if len(st) > LEN_THRESHOLD and
             (not dicts.match(st, filename, file_id_ref[0])) and
             (st not in ignores)]
-        if unmatched_subtokens:
-            unmatched_subtokens = make_unique(unmatched_subtokens)
-            if report_only:
-                function = getattr(
-                    report_only, '__call__', report_failed_check)
-                return (function(match_desc, filename,
-                                 unmatched_subtokens),
-                        True)
-            else:
-                return (
-                    handle_failed_check_interactively(
-                        match_desc, filename, fq_filename, file_id_ref,
-                        unmatched_subtokens, dicts, ignores),
+    if unmatched_subtokens:
+        unmatched_subtokens = make_unique(unmatched_subtokens)
+        if report_only:
+            function = getattr(
+                report_only, '__call__', report_failed_check)
+            return (function(match_desc, filename,
+                             unmatched_subtokens),
                     True)
+        else:
+            return (
+                handle_failed_check_interactively(
+                    match_desc, filename, fq_filename, file_id_ref,
+                    unmatched_subtokens, dicts, ignores),
+                True)
     return (
         (match_desc.get_string(), match_desc.get_ofs() + len(token)),
         False)
 
 
-def spell_check_file(filename, dicts, ignores, report_only, c_escapes):
-    """Spell check a single file.
+def prematch_tokens(text, regions, token_regex, filename, file_id, dicts,
+                    ignores):
+    """Find the unmatched subtokens of each distinct token in the regions
+    of text, looking up all of their subtokens in the dictionaries at once
+    (see CorporaFile.match_many()).
 
-    :param filename: name of the file to check
-    :param dicts: dictionary set against which to perform matching
-    :type  dicts: CorporaFile
-    :param ignores: set of tokens to ignore for this session
+    :param regions: list of (start, end) offsets of the parts of text to
+                    search
+    :returns: dict mapping each token to its list of unmatched subtokens,
+              which is empty if the token needs no report
+
+    """
+    tokens = set()
+    for (start, end) in regions:
+        tokens.update(token_regex.findall(text, start, end))
+    prematched = {}
+    decomposed = {}
+    for token in tokens:
+        if (token.lower() in ignores) or (HEX_REGEX.match(token) is not None):
+            prematched[token] = []
+        else:
+            decomposed[token] = [
+                st for st in decompose_token(token)
+                if len(st) > LEN_THRESHOLD and st not in ignores]
+    matched = dicts.match_many(
+        set(st for subtokens in decomposed.values() for st in subtokens),
+        filename, file_id)
+    for (token, subtokens) in decomposed.items():
+        unmatched = [st for st in subtokens if st not in matched]
+        prematched[token] = make_unique(unmatched) if unmatched else unmatched
+    return prematched
+
+
+def _load_source_file(fq_filename, file_filter=None):
+    """Read and decode a source file.
+
+    :param file_filter: if given, decides whether to skip the file
+    :type  file_filter: FileFilter
+    :returns: (text, error) where exactly one of the two is None; error is
+              a FileSkipped exception if the file was skipped
 
     """
-    fq_filename = os.path.normcase(os.path.realpath(filename))
     try:
+        if file_filter is not None:
+            reason = file_filter.check(fq_filename)
+            if reason is not None:
+                return (None, FileSkipped(reason))
         with _util.open_with_encoding(fq_filename) as source_file:
-            source_text = source_file.read()
-    except IOError as e:
-        print("Error: can't read source file '{}'; "
-              'skipping (reason: {})'.format(filename, e),
-              file=sys.stderr)
+            return (source_file.read(), None)
+    except (IOError, OSError) as e:
+        return (None, e)
+
+
+def _report_unreadable(filename, error):
+    print("Error: can't read source file '{}'; "
+          'skipping (reason: {})'.format(filename, error),
+          file=sys.stderr)
+
+
+def read_source_file(filename, fq_filename):
+    """Read the contents of a source file.
+
+    :param filename: name of the file, as reported to the user
+    :param fq_filename: fully-qualified filename
+    :returns: the decoded file contents, or None if the file can't be read
+
+    """
+    (text, error) = _load_source_file(fq_filename)
+    if error is not None:
+        _report_unreadable(filename, error)
+    return text
+
+
+def iter_source_files(filenames, prefetch=0, file_filter=None):
+    """Read and decode a sequence of source files.
+
+    Up to ``prefetch`` files beyond the one most recently yielded are read
+    ahead on worker threads, so that I/O overlaps with checking.  Files are
+    still yielded in order, and read errors are reported in order.
+
+    :param filenames: sequence of filenames
+    :param prefetch: number of files to read ahead; 0 reads each file only
+                     when it is needed
+    :param file_filter: if given, files it rejects are recorded in it and
+                        not yielded at all
+    :type  file_filter: FileFilter
+    :returns: iterator of (filename, fq_filename, text) where ``text`` is
+              None if the file could not be read
+
+    """
+    fq_names = ((fn, os.path.normcase(os.path.realpath(fn)))
+                for fn in filenames)
+    if prefetch < 1 or futures is None:
+        for (fn, fq_filename) in fq_names:
+            (text, error) = _load_source_file(fq_filename, file_filter)
+            if _finish_read(fn, error, file_filter):
+                yield (fn, fq_filename, text)
+        return
+
+    executor = futures.ThreadPoolExecutor(
+        max_workers=min(prefetch, PREFETCH_MAX_WORKERS))
+    queue = collections.deque()
+    try:
+        for (fn, fq_filename) in fq_names:
+            queue.append((fn, fq_filename,
+                          executor.submit(_load_source_file, fq_filename,
+                                          file_filter)))
+            if len(queue) > prefetch:
+                (fn, fq_filename, future) = queue.popleft()
+                (text, error) = future.result()
+                if _finish_read(fn, error, file_filter):
+                    yield (fn, fq_filename, text)
+        while queue:
+            (fn, fq_filename, future) = queue.popleft()
+            (text, error) = future.result()
+            if _finish_read(fn, error, file_filter):
+                yield (fn, fq_filename, text)
+    finally:
+        for (_, _, future) in queue:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def iter_archive_files(filename, file_filter=None, extensions=None):
+    """Read and decode the members of a tar or zip archive, one at a time.
+
+    :param extensions: if given, only members with one of these extensions
+                       (such as ``.py``) are read
+    :param file_filter: if given, members it rejects are recorded in it and
+                        not yielded at all
+    :type  file_filter: FileFilter
+    :returns: iterator of (filename, fq_filename, text), where filename is
+              ``archive!member``; text is None if the archive can't be read
+
+    """
+    fq_archive = os.path.normcase(os.path.realpath(filename))
+    try:
+        for (member, size, read) in _archive.iter_members(fq_archive):
+            name = _archive.member_name(filename, member)
+            if (extensions is not None and
+                    os.path.splitext(member.lower())[1] not in extensions):
+                continue
+            if (file_filter is not None and
+                    file_filter.max_file_size is not None and
+                    size > file_filter.max_file_size):
+                file_filter.record(name, SKIP_TOO_LARGE)
+                continue
+            data = read()
+            if file_filter is not None:
+                reason = file_filter.check_data(data)
+                if reason is not None:
+                    file_filter.record(name, reason)
+                    continue
+            yield (name, _archive.member_name(fq_archive, member),
+                   _util.decode_bytes(data))
+    except _archive.ARCHIVE_ERRORS as e:
+        _report_unreadable(filename, e)
+        yield (filename, fq_archive, None)
+
+
+def iter_input_files(filenames, prefetch=0, file_filter=None,
+                     member_extensions=None):
+    """Like iter_source_files(), but reads the members of each tar or zip
+    archive among filenames in place of the archive itself (see
+    iter_archive_files())."""
+    run = []
+    for fn in filenames:
+        if _archive.is_archive(fn):
+            for source in iter_source_files(run, prefetch, file_filter):
+                yield source
+            run = []
+            for source in iter_archive_files(fn, file_filter,
+                                             member_extensions):
+                yield source
+        else:
+            run.append(fn)
+    for source in iter_source_files(run, prefetch, file_filter):
+        yield source
+
+
+def iter_git_files(rev=None, paths=(), file_filter=None):
+    """Read and decode files from the git repository containing the current
+    directory: the files staged for commit, or if rev is given, every file
+    in that revision.  Nothing is read from the working tree.
+
+    :param paths: if given, only read files under these paths
+    :param file_filter: if given, files it rejects are recorded in it and
+                        not yielded at all
+    :type  file_filter: FileFilter
+    :returns: iterator of (filename, fq_filename, text) where ``filename``
+              is relative to the top of the repository, and
+              ``fq_filename`` is the file's fully-qualified name in the
+              working tree, so that file-specific dictionaries apply
+
+    """
+    try:
+        toplevel = _git.find_toplevel()
+        if rev is None:
+            blobs = _git.staged_blobs(toplevel, paths)
+        else:
+            blobs = _git.revision_blobs(toplevel, rev, paths)
+        contents = _git.iter_blob_contents(
+            toplevel, [object_name for (_, object_name) in blobs])
+        for ((path, _), data) in zip(blobs, contents):
+            if file_filter is not None:
+                reason = file_filter.check_data(data)
+                if reason is not None:
+                    file_filter.record(path, reason)
+                    continue
+            fq_filename = os.path.normcase(os.path.realpath(
+                os.path.join(toplevel, path)))
+            yield (path, fq_filename, _util.decode_bytes(data))
+    except _git.GitError as e:
+        raise SystemExit(str(e))
+
+
+def _finish_read(filename, error, file_filter):
+    """Report the outcome of _load_source_file().
+
+    :returns: False if the file was skipped
+
+    """
+    if isinstance(error, FileSkipped):
+        file_filter.record(filename, error.reason)
         return False
+    if error is not None:
+        _report_unreadable(filename, error)
+    return True
+
+
+def spell_check_text(source_text, filename, fq_filename, dicts, ignores,
+                     report_only, c_escapes, selector=None,
+                     batch_match=False):
+    """Spell check the contents of a single file.
+
+    :param source_text: the decoded file contents
+    :param filename: name of the file, as reported to the user
+    :param fq_filename: fully-qualified filename
+    :param dicts: dictionary set against which to perform matching
+    :type  dicts: CorporaFile
+    :param ignores: set of tokens to ignore for this session
+    :param selector: chooses the parts of the text to check; if None, the
+                     whole text is checked
+    :type  selector: RegionSelector
+    :param batch_match: in report-only mode, look up the subtokens of all
+                        the distinct tokens of the text in the dictionaries
+                        at once beforehand (see prematch_tokens())
+    :returns: (text, okay) where ``text`` is the (possibly modified) source
+              contents and ``okay`` is False if any errors were found.
 
+    """
     # Look for a file ID
     file_id = None
     m_id = FILE_ID_REGEX.search(source_text)
@@ -580,28 +1093,105 @@ def spell_check_file(filename, dicts, ignores, report_only, c_escapes):
     else:
         token_regex = TOKEN_REGEX
 
-    # Search for tokens to spell-check
-    data = source_text
+    if selector is None:
+        def select_regions(text):
+            return [(0, len(text))]
+    else:
+        (_, ext) = os.path.splitext(filename.lower())
+        filetype = dicts.get_filetype_of_extension(ext)
+
+        def select_regions(text):
+            return selector.select(text, filetype)
+
+    # Search the selected regions for tokens to spell-check.  Replacements
+    # are recorded in the buffer and applied once at the end, so the scan
+    # always runs over the original text, skipping over any text that has
+    # been replaced.
+    buffer = EditBuffer(source_text)
+    regions = select_regions(source_text)
+    prematched = None
+    if batch_match and report_only:
+        prematched = prematch_tokens(source_text, regions, token_regex,
+                                     filename, file_id, dicts, ignores)
+    region_index = 0
     pos = 0
     okay = True
-    while True:
-        m = token_regex.search(data, pos)
+    while region_index < len(regions):
+        (start, end) = regions[region_index]
+        if prematched is None:
+            m = token_regex.search(source_text, max(pos, start), end)
+        else:
+            # Pass over the tokens known to need no report in one scan
+            m = next((m for m in token_regex.finditer(source_text,
+                                                      max(pos, start), end)
+                      if prematched.get(m.group()) != []), None)
         if m is None:
-            break
+            region_index += 1
+            continue
         if (m_id is not None and
                 m.start() >= m_id.start() and
                 m.start() < m_id.end()):
             # This is matching the file-id.  Skip over it.
             pos = m_id.end()
             continue
-        result = spell_check_token(MatchDescriptor(data, m),
-                                   filename, fq_filename, file_id_ref,
-                                   dicts, ignores, report_only)
+        edited_span = None
+        edit_end = buffer.overlapping_edit_end(m.start(), m.end())
+        if edit_end is not None:
+            # Text replaced by (R)eplace all may be part of a longer token,
+            # which is then checked as it now reads
+            edited_span = buffer.get_edited_span(m.start(), m.end())
+            if edited_span is None:
+                pos = edit_end
+                continue
+        result = spell_check_token(
+            MatchDescriptor(source_text, m, buffer, span=edited_span),
+            filename, fq_filename, file_id_ref, dicts, ignores,
+            report_only, prematched)
         (data, pos) = result[0]
+        if edited_span is not None:
+            pos = edited_span[1]
+        if data is not source_text:
+            # A report_only callable returned rewritten text rather than
+            # recording edits; carry on scanning that instead.
+            source_text = data
+            buffer = EditBuffer(source_text)
+            regions = select_regions(source_text)
+            region_index = 0
         error_found = result[1]
         if error_found:
             okay = False
 
+    return (buffer.get_text(), okay)
+
+
+def spell_check_file(filename, dicts, ignores, report_only, c_escapes,
+                     source_text=None, selector=None, batch_match=False,
+                     fq_filename=None):
+    """Spell check a single file.
+
+    :param filename: name of the file to check
+    :param dicts: dictionary set against which to perform matching
+    :type  dicts: CorporaFile
+    :param ignores: set of tokens to ignore for this session
+    :param source_text: contents of the file, if already read
+    :param selector: chooses the parts of the file to check
+    :type  selector: RegionSelector
+    :param batch_match: see spell_check_text()
+    :param fq_filename: fully-qualified filename, if it isn't the real path
+                        of filename, e.g. for a file read from git
+
+    """
+    if fq_filename is None:
+        fq_filename = os.path.normcase(os.path.realpath(filename))
+    if source_text is None:
+        source_text = read_source_file(filename, fq_filename)
+        if source_text is None:
+            return False
+
+    (data, okay) = spell_check_text(source_text, filename, fq_filename,
+                                    dicts, ignores, report_only, c_escapes,
+                                    selector, batch_match)
+
     # Write out the source file if it was modified
     if data != source_text:
         with _util.open_with_encoding(fq_filename, mode='w') as source_file:
@@ -686,9 +1276,11 @@ def set_dictionary(filename):
         config.write(f)
 
 
-def export_dictionary(filename, base_dicts):
+def export_dictionary(filename, base_dicts, override_dictionary=None):
     """Export the current keyword dictionary to the specified file.
 
+    A dictionary database is exported in the text dictionary format.
+
     :returns: None
 
     """
@@ -697,7 +1289,124 @@ def export_dictionary(filename, base_dicts):
             "--export-dictionary doesn't support " +
             '--base-dict')
         return
-    shutil.copyfile(locate_dictionary(), filename)
+    dict_file = find_dict_file(override_dictionary)
+    if not is_dictionary_database(dict_file):
+        shutil.copyfile(dict_file, filename)
+        return
+    with CorporaFile(dict_file, [], None) as dicts:
+        with _util.open_with_encoding(filename, encoding='utf-8',
+                                      mode='w') as f:
+            dicts.write_text(f)
+
+
+def import_dictionary(filename, override_dictionary=None):
+    """Add every word of every corpus in the dictionary file filename to the
+    current dictionary.
+
+    This is the way to fill a new dictionary database from a text
+    dictionary.
+
+    :returns: None
+
+    """
+    dict_file = find_dict_file(override_dictionary)
+    if not os.path.exists(filename):
+        raise SystemExit("Can't import dictionary file '{}': no such file"
+                         .format(filename))
+    with CorporaFile(filename, [], None) as source, \
+            CorporaFile(dict_file, [], None) as dicts:
+        dicts.import_corpora(source)
+
+
+def combine_dictionary(operation, other, output='-',
+                       override_dictionary=None):
+    """Combine the current dictionary with the dictionary file other, corpus
+    by corpus, and write the result to output in the text dictionary format.
+
+    :param operation: OP_UNION, OP_INTERSECT or OP_DIFF (the words of the
+                      current dictionary which other lacks)
+    :param output: file name, or '-' for standard output
+    :returns: number of words written
+
+    """
+    dict_file = find_dict_file(override_dictionary)
+    if not os.path.exists(other):
+        raise SystemExit("Can't read dictionary file '{}': no such file"
+                         .format(other))
+    with CorporaFile(dict_file, [], None) as dicts, \
+            CorporaFile(other, [], None) as other_dicts:
+        corpora = combine_dictionaries(operation, dicts, other_dicts)
+    if output == '-':
+        return write_corpora(sys.stdout, corpora)
+    try:
+        with _util.open_with_encoding(output, encoding='utf-8',
+                                      mode='w') as f:
+            return write_corpora(f, corpora)
+    except IOError as e:
+        raise SystemExit("Can't write dictionary file {}: {}"
+                         .format(output, e))
+
+
+def _measure_text_dictionary(text):
+    """Get the size in bytes of a text dictionary, and the time in seconds
+    it takes to load (the best of three)."""
+    (fd, filename) = tempfile.mkstemp(prefix='scspell-', suffix='.txt')
+    os.close(fd)
+    try:
+        with _util.open_with_encoding(filename, encoding='utf-8',
+                                      mode='w') as f:
+            f.write(text)
+        times = []
+        for _ in range(3):
+            start = time.time()
+            CorporaFile(filename, [], None)
+            times.append(time.time() - start)
+        return (os.path.getsize(filename), min(times))
+    finally:
+        os.remove(filename)
+
+
+def compact_dictionary(override_dictionary=None, dry_run=False):
+    """Remove from the natural language corpus of the current dictionary the
+    words it accepts anyway because they are a prefix of another of its
+    words, and report the size and load time of the dictionary (in the
+    text format) before and after.
+
+    If dry_run is True, list the words which would be removed on standard
+    output rather than removing them.
+
+    :returns: sorted list of the redundant words
+
+    """
+    dict_file = find_dict_file(override_dictionary)
+    with CorporaFile(dict_file, [], None) as dicts:
+        redundant = dicts.compact(dry_run=True)
+        before = io.StringIO()
+        dicts.write_text(before)
+        corpora = []
+        for corpus in dicts.iter_corpora():
+            tokens = corpus.tokens()
+            if corpus.get_dict_type() == DICT_TYPE_NATURAL:
+                natural_count = len(tokens)
+                tokens = difference(tokens, redundant)
+            corpora.append((corpus.get_dict_type(), corpus.get_metadata(),
+                            tokens))
+        after = io.StringIO()
+        write_corpora(after, corpora)
+        if dry_run:
+            for word in redundant:
+                print(word)
+        else:
+            dicts.compact()
+
+    (size_before, time_before) = _measure_text_dictionary(before.getvalue())
+    (size_after, time_after) = _measure_text_dictionary(after.getvalue())
+    print('{} {} of {} natural language words; size {} -> {} bytes, '
+          'load time {:.0f} -> {:.0f} ms'.format(
+              'Would remove' if dry_run else 'Removed', len(redundant),
+              natural_count, size_before, size_after,
+              time_before * 1000, time_after * 1000), file=sys.stderr)
+    return redundant
 
 
 def find_dict_file(override_dictionary):
@@ -712,12 +1421,70 @@ def spell_check(source_filenames, override_dictionary=None,
                 base_dicts=[],
                 relative_to=None, report_only=False, c_escapes=True,
                 test_input=False,
-                additional_extensions=None):
+                additional_extensions=None, prefetch=DEFAULT_PREFETCH,
+                suggest=False, check_only=None, skip_patterns=(),
+                default_skip_patterns=True, max_file_size=None,
+                skip_binary=True, shard=None, report_file=None,
+                git_staged=False, git_rev=None, member_extensions=None,
+                scripts=DEFAULT_SCRIPTS, max_findings=None,
+                batch_match=False):
     """Run the interactive spell checker on the set of source_filenames.
 
     If override_dictionary is provided, it shall be used as a dictionary
     filename for this session only.
 
+    The dictionaries are loaded on another thread while the first files are
+    found and read.  In report-only mode, up to ``prefetch`` files are read
+    ahead of the one being checked.  Interactive sessions always read each
+    file just before checking it, since an earlier replacement may have
+    rewritten it.
+
+    If suggest is True and report_only is True, each reported error also
+    lists the closest dictionary words.
+
+    If check_only is given, it is a collection of region kinds (see
+    ``_lexers.REGION_KINDS``); files whose file type has a lexer are then
+    only checked within regions of those kinds.
+
+    Text matching any of the regular expressions in skip_patterns, or (if
+    default_skip_patterns is True) any of the built-in patterns for URLs,
+    hashes and so on, is not checked.
+
+    Files larger than max_file_size bytes (if given) are skipped, as are
+    binary and minified files unless skip_binary is False.  The number of
+    files skipped is reported at the end.
+
+    If shard is given, as an (index, count) pair, only the files in that
+    shard of count shards are checked (see _shard.shard_of()).  Files are
+    assigned to shards by their paths relative to relative_to, if given,
+    else to the current directory.
+
+    If report_file is given, the failures found in report-only mode are
+    also written to that file as a partial report in JSON, which can be
+    combined with the reports of the other shards by merge_reports().
+
+    If git_staged is True, the files staged for commit in the git
+    repository containing the current directory are checked as staged, or
+    if git_rev is given, the files of that revision.  source_filenames then
+    limits the check to the files under those paths, if it isn't empty.
+    This requires report-only mode.
+
+    The members of tar and zip archives among source_filenames are checked
+    without extracting them, and reported as ``archive!member``.  If
+    member_extensions is given, only members with those extensions are.
+    Since a member can't be rewritten, this requires report-only mode.
+
+    Runs of text in writing systems other than scripts (a collection of
+    _scripts.SCRIPTS names) are skipped and counted; pass None to check
+    text in every script.
+
+    If max_findings is given, checking stops once that many failures have
+    been reported in report-only mode.
+
+    If batch_match is True, the distinct subtokens of each file are looked
+    up in the dictionaries together in report-only mode, using NumPy if it
+    is installed.  The errors found are the same either way.
+
     :returns: None
 
     """
@@ -726,17 +1493,804 @@ def spell_check(source_filenames, override_dictionary=None,
 
     dict_file = find_dict_file(override_dictionary)
 
+    file_filter = FileFilter(max_file_size, skip_binary)
+    sources = None
+    if git_staged or git_rev is not None:
+        if not report_only:
+            raise ValueError('Checking files from git requires report-only '
+                             'mode')
+        sources = iter_git_files(git_rev, source_filenames, file_filter)
+        if shard is not None:
+            sources = (source for source in sources
+                       if _shard.shard_of(source[0], shard[1],
+                                          relative_to) == shard[0])
+    else:
+        if not report_only and any(_archive.is_archive(fn)
+                                   for fn in source_filenames):
+            raise ValueError('Checking archives requires report-only mode')
+        if shard is not None:
+            source_filenames = select_shard(source_filenames, shard,
+                                            relative_to)
+        sources = iter_input_files(source_filenames,
+                                   prefetch if report_only else 0,
+                                   file_filter, member_extensions)
+    checked = []
+
+    # The dictionaries are loaded while the first files are read
+    with BackgroundCorporaFile(dict_file, base_dicts, relative_to,
+                               additional_extensions or ()) as dicts:
+        if suggest and report_only is True:
+            report_only = SuggestingReport(dicts)
+        recording = None
+        if report_file is not None and report_only:
+            report_only = recording = RecordingReport(
+                getattr(report_only, '__call__', report_failed_check))
+        if max_findings is not None and report_only:
+            report_only = LimitedReport(report_only, max_findings)
+        okay = spell_check_files(None, dicts, report_only, c_escapes,
+                                 selector=make_selector(
+                                     check_only, skip_patterns,
+                                     default_skip_patterns, scripts),
+                                 file_filter=file_filter,
+                                 sources=_note_filenames(sources, checked),
+                                 batch_match=batch_match)
+
+    if recording is not None:
+        try:
+            with _util.open_with_encoding(report_file, encoding='utf-8',
+                                          mode='w') as f:
+                write_report(f, shard, len(checked), okay,
+                             recording.findings, file_filter.skipped)
+        except IOError as e:
+            raise SystemExit("Can't write report {}: {}".format(
+                report_file, e))
+    return okay
+
+
+def make_selector(check_only=None, skip_patterns=(),
+                  default_skip_patterns=True, scripts=DEFAULT_SCRIPTS):
+    """Make the RegionSelector for the options of spell_check()."""
+    return RegionSelector(
+        check_only, SkipPatterns(skip_patterns, default_skip_patterns),
+        ScriptFilter(scripts) if scripts is not None else False)
+
+
+def _note_filenames(sources, filenames):
+    """Pass on (filename, fq_filename, text) triples, appending each
+    filename to the list filenames."""
+    for source in sources:
+        filenames.append(source[0])
+        yield source
+
+
+def merge_reports(report_filenames, output=None):
+    """Combine the partial reports written by the shards of a spell check
+    run, print their failures, and optionally write the combined report to
+    output.
+
+    :returns: True if every shard was checked without errors
+
+    """
+    report = _shard.merge_reports(
+        [_shard.read_report(f) for f in report_filenames])
+    for (filename, line_num, token, subtokens) in report['findings']:
+        print(format_failed_check(filename, line_num, token, subtokens),
+              file=sys.stderr)
+    if output is not None:
+        try:
+            with _util.open_with_encoding(output, encoding='utf-8',
+                                          mode='w') as f:
+                _shard.write_report(f, None, report['files'],
+                                    report['okay'], report['findings'],
+                                    report['skipped'])
+        except IOError as e:
+            raise SystemExit("Can't write report {}: {}".format(output, e))
+    print('Checked {} files: {} failures'.format(
+        report['files'], len(report['findings'])), file=sys.stderr)
+    return report['okay']
+
+
+class DuplicateFiles(object):
+    """Checks each distinct file content once, and reports the failures
+    found in it again for every other file with the same content.
+
+    Files count as the same if their text, extension and file ID agree,
+    since those decide which dictionaries and regions apply.  A file with
+    an embedded file ID carries it in its text; for the others, the file
+    ID comes from the file ID mapping.
+
+    The failures of each content are kept for the rest of the run, as the
+    offsets and tokens of the matches, but not the text: the matches are
+    described again against the text of the identical file being replayed.
+    Contents whose report rewrote the text are not kept at all.
+    """
+
+    def __init__(self, report_only):
+        self._report = getattr(report_only, '__call__',
+                               report_failed_check)
+        self.duplicates = 0
+        # (digest, extension, file ID) ->
+        #     (okay, [(start, end, token, subtokens)])
+        self._checked = {}
+
+    def _key(self, filename, fq_filename, source_text, dicts):
+        m_id = FILE_ID_REGEX.search(source_text)
+        if m_id is not None:
+            file_id = m_id.group(1)
+        else:
+            file_id = dicts.file_id_of_file(fq_filename)
+        (_, ext) = os.path.splitext(filename.lower())
+        digest = hashlib.sha1(source_text.encode('utf-8')).digest()
+        return (digest, ext, file_id)
+
+    def check(self, filename, fq_filename, source_text, dicts, ignores,
+              c_escapes, selector=None, batch_match=False):
+        """Spell check a file in report-only mode, unless a file with the
+        same content has been checked already.
+
+        :returns: True if no errors were found
+
+        """
+        key = self._key(filename, fq_filename, source_text, dicts)
+        try:
+            (okay, failures) = self._checked[key]
+        except KeyError:
+            pass
+        else:
+            self.duplicates += 1
+            for (start, end, token, subtokens) in failures:
+                self._report(MatchDescriptor(source_text, None,
+                                             span=(start, end, token)),
+                             filename, subtokens)
+            return okay
+
+        failures = []
+        rewritten = []
+
+        def record(match_desc, filename, unmatched_subtokens):
+            result = self._report(match_desc, filename,
+                                  unmatched_subtokens)
+            if (result[0] is not match_desc.get_string() or
+                    match_desc.get_buffer().is_modified()):
+                rewritten.append(True)
+            failures.append((match_desc.get_ofs(), match_desc.get_end(),
+                             match_desc.get_token(), unmatched_subtokens))
+            return result
+
+        okay = spell_check_file(filename, dicts, ignores, record, c_escapes,
+                                source_text, selector, batch_match,
+                                fq_filename)
+        if not rewritten:
+            self._checked[key] = (okay, failures)
+        return okay
+
+    def report(self):
+        """Print the number of files not checked again, if any."""
+        if self.duplicates:
+            print('Reused the results for {} file{} identical to one '
+                  'already checked'.format(
+                      self.duplicates, '' if self.duplicates == 1 else 's'),
+                  file=sys.stderr)
+
+
+def spell_check_files(source_filenames, dicts, report_only, c_escapes,
+                      prefetch=0, selector=None, file_filter=None,
+                      sources=None, batch_match=False):
+    """Spell check each of source_filenames against an already loaded
+    dictionary set.
+
+    :param dicts: dictionary set against which to perform matching
+    :type  dicts: CorporaFile
+    :param prefetch: number of files to read ahead; see iter_source_files()
+    :param selector: chooses the parts of each file to check
+    :type  selector: RegionSelector
+    :param file_filter: picks out files not to check at all
+    :type  file_filter: FileFilter
+    :param sources: if given, an iterator of (filename, fq_filename, text)
+                    such as iter_git_files() returns, to check instead of
+                    reading source_filenames
+    :param batch_match: see spell_check_text()
+    :returns: True if no errors were found
+
+    In report-only mode, files with the same content are only checked once
+    (see DuplicateFiles).
+
+    """
     okay = True
-    with CorporaFile(dict_file, base_dicts, relative_to) as dicts:
-        for extension in (additional_extensions or []):
-            dicts.register_extension(*extension)
-        ignores = set()
-        for f in source_filenames:
-            if not spell_check_file(f, dicts, ignores, report_only, c_escapes):
+    ignores = set()
+    if sources is None:
+        sources = iter_source_files(source_filenames, prefetch, file_filter)
+    duplicates = DuplicateFiles(report_only) if report_only else None
+    try:
+        for (f, fq_filename, source_text) in sources:
+            if source_text is None:
                 okay = False
+            elif duplicates is not None:
+                if not duplicates.check(f, fq_filename, source_text, dicts,
+                                        ignores, c_escapes, selector,
+                                        batch_match):
+                    okay = False
+            elif not spell_check_file(f, dicts, ignores, report_only,
+                                      c_escapes, source_text, selector,
+                                      batch_match, fq_filename):
+                okay = False
+    except TooManyFindings as e:
+        print(str(e), file=sys.stderr)
+        okay = False
+        # Stop any reading ahead
+        getattr(sources, 'close', lambda: None)()
+    if file_filter is not None:
+        file_filter.report()
+    if duplicates is not None:
+        duplicates.report()
+    if selector is not None:
+        selector.report()
     return okay
 
 
+class WatchSession(object):
+    """Keeps a dictionary set loaded, and re-checks files as they change.
+
+    ``watch()`` feeds this the changes its watcher reports.  Failures are
+    reported as in report-only mode.
+    """
+
+    def __init__(self, dict_file, base_dicts=[], relative_to=None,
+                 c_escapes=True, selector=None, file_filter=None, prefetch=0,
+                 suggest=False):
+        self._dict_args = (dict_file, base_dicts, relative_to)
+        self._c_escapes = c_escapes
+        self._selector = selector
+        self._file_filter = file_filter
+        self._prefetch = prefetch
+        self._suggest = suggest
+        self.dicts = CorporaFile(dict_file, base_dicts, relative_to)
+        self.files = set()      # every file checked so far
+        self.failing = set()    # files with errors in their latest check
+
+    def dictionary_files(self):
+        """Get the files whose changes call for reloading the
+        dictionaries."""
+        dict_file = self._dict_args[0]
+        return ([dict_file, dict_file + JSON_SUFFIX,
+                 dict_file + SQLITE_SUFFIX] + list(self._dict_args[1]))
+
+    def check(self, filenames):
+        """Check the files.
+
+        :returns: True if no errors were found
+
+        """
+        report_only = SuggestingReport(self.dicts) if self._suggest else True
+        okay = True
+        for (f, _, source_text) in iter_source_files(
+                filenames, self._prefetch, self._file_filter):
+            self.files.add(f)
+            if source_text is not None and spell_check_file(
+                    f, self.dicts, set(), report_only, self._c_escapes,
+                    source_text, self._selector):
+                self.failing.discard(f)
+            else:
+                self.failing.add(f)
+                okay = False
+        return okay
+
+    def reload(self):
+        """Reload the dictionaries.
+
+        :returns: True if files which passed may now fail, because a word
+                  was removed or the file ID mapping changed
+
+        """
+        new_dicts = CorporaFile(*self._dict_args)
+        removed = combine_dictionaries(OP_DIFF, self.dicts, new_dicts)
+        stricter = (any(tokens for (_, _, tokens) in removed) or
+                    self.dicts.file_id_mappings() !=
+                    new_dicts.file_id_mappings())
+        self.dicts.close()
+        self.dicts = new_dicts
+        return stricter
+
+    def handle_changes(self, paths):
+        """Re-check the files affected by changes to paths: the changed
+        source files, and after a dictionary change, the files which failed
+        (or every file, if the dictionary became stricter).
+
+        :returns: sorted list of the files checked
+
+        """
+        dictionary_files = set(os.path.realpath(f)
+                               for f in self.dictionary_files())
+        sources = set()
+        reload = False
+        for path in paths:
+            if os.path.realpath(path) in dictionary_files:
+                reload = True
+            elif os.path.isfile(path):
+                sources.add(path)
+            else:
+                self.files.discard(path)
+                self.failing.discard(path)
+        if reload:
+            sources |= self.files if self.reload() else self.failing
+        filenames = sorted(sources)
+        self.check(filenames)
+        return filenames
+
+    def close(self):
+        self.dicts.close()
+
+
+def watch(directories, override_dictionary=None, base_dicts=[],
+          relative_to=None, c_escapes=True, suggest=False, check_only=None,
+          skip_patterns=(), default_skip_patterns=True, max_file_size=None,
+          skip_binary=True, prefetch=DEFAULT_PREFETCH,
+          delay=_watch.DEBOUNCE_DELAY, scripts=DEFAULT_SCRIPTS):
+    """Check every file in the directory trees, then re-check files as they
+    are modified, until interrupted.
+
+    The dictionaries stay loaded in between.  When they change, they are
+    reloaded and the files which failed are re-checked, or every file if
+    a word was removed or the file ID mapping changed.  Changes made within
+    delay seconds of each other are handled together.
+
+    :returns: None
+
+    """
+    dict_file = find_dict_file(override_dictionary)
+    session = WatchSession(
+        dict_file, base_dicts, relative_to, c_escapes,
+        make_selector(check_only, skip_patterns, default_skip_patterns,
+                      scripts),
+        FileFilter(max_file_size, skip_binary), prefetch, suggest)
+    try:
+        with _watch.make_watcher(directories,
+                                 session.dictionary_files()) as watcher:
+            checked = [f for d in directories for f in _watch.walk_files(d)]
+            session.check(checked)
+            while True:
+                print('Checked {} files; {} of {} have errors. Watching for '
+                      'changes...'.format(len(checked), len(session.failing),
+                                          len(session.files)),
+                      file=sys.stderr)
+                checked = session.handle_changes(watcher.collect(delay))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        session.close()
+
+
+class TriageCollector(object):
+    """Collect the failures of a non-interactive scan, grouped by unmatched
+    subtoken, for ``triage()``.
+
+    For every occurrence of a subtoken, the file and the offset of its
+    token are kept, and for the first few the match itself, to show its
+    line.
+    """
+
+    def __init__(self, dicts, samples=DEFAULT_TRIAGE_SAMPLES):
+        self.dicts = dicts
+        self.samples = samples
+        # subtoken -> ([(filename, ofs, token)], [(filename, match_desc)])
+        self.words = {}
+        # filename -> (fq_filename, file_id, digest of the text)
+        self.files = {}
+
+    def __call__(self, match_desc, filename, unmatched_subtokens):
+        if filename not in self.files:
+            text = match_desc.get_string()
+            fq_filename = os.path.normcase(os.path.realpath(filename))
+            m_id = FILE_ID_REGEX.search(text)
+            if m_id is not None:
+                file_id = m_id.group(1)
+            else:
+                file_id = self.dicts.file_id_of_file(fq_filename)
+            self.files[filename] = (fq_filename, file_id,
+                                    _text_digest(text))
+        occurrence = (filename, match_desc.get_ofs(), match_desc.get_token())
+        for subtoken in unmatched_subtokens:
+            try:
+                (occurrences, samples) = self.words[subtoken]
+            except KeyError:
+                (occurrences, samples) = self.words[subtoken] = ([], [])
+            occurrences.append(occurrence)
+            if len(samples) < self.samples:
+                samples.append((filename, match_desc))
+        return (
+            match_desc.get_string(),
+            match_desc.get_ofs() + len(match_desc.get_token()))
+
+    def ranked(self):
+        """Get the unmatched subtokens, most frequent first."""
+        return sorted(self.words,
+                      key=lambda word: (-len(self.words[word][0]), word))
+
+
+def _text_digest(text):
+    return hashlib.sha1(text.encode('utf-8')).digest()
+
+
+def build_triage_prompt(offer_p, offer_f):
+    """Build the prompt for a word in triage.
+
+    :param offer_p: offer the (p)rogramming language dictionaries
+    :param offer_f: offer the (f)ile-specific dictionaries
+    :returns: prompt string
+
+    """
+    prompt = """\
+   (i)gnore, (r)eplace everywhere, add to (n)atural language dictionary"""
+    if offer_p:
+        prompt += """,
+   add to (p)rogramming language dictionary"""
+    if offer_f:
+        prompt += """,
+   add to (f)ile-specific dictionary"""
+    prompt += """, or
+   (q)uit and apply the decisions so far? [i]"""
+    return prompt
+
+
+def handle_triage_word(word, collector, dicts, batch):
+    """Ask what to do about every occurrence of an unmatched subtoken.
+
+    Words to add are collected in batch.
+
+    :param collector: the scan's failures
+    :type  collector: TriageCollector
+    :type  batch: AdditionBatch
+    :returns: the replacement for word, '' to leave it alone, or None to
+              stop asking
+
+    """
+    (occurrences, samples) = collector.words[word]
+    filenames = sorted(set(filename for (filename, _, _) in occurrences))
+    extensions = sorted(set(os.path.splitext(filename.lower())[1]
+                            for filename in filenames))
+    file_ids = sorted(set(collector.files[filename][1]
+                          for filename in filenames))
+    offer_p = '' not in extensions
+    offer_f = None not in file_ids
+
+    print("'%s': %u occurrence%s in %u file%s" % (
+        word, len(occurrences), '' if len(occurrences) == 1 else 's',
+        len(filenames), '' if len(filenames) == 1 else 's'))
+    suggestions = dicts.suggest(word, filenames[0])
+    if suggestions:
+        print('   Suggestions: %s' % ', '.join(suggestions))
+    for (filename, match_desc) in samples:
+        line_num = match_desc.get_line_num()
+        print('   %s:%u: %s' % (filename, line_num,
+                                match_desc.get_buffer().get_line(
+                                    line_num).strip()))
+    prompt = build_triage_prompt(offer_p, offer_f)
+    while True:
+        print(prompt)
+        ch = _portable.getch()
+        if ch in (_portable.CTRL_C, _portable.CTRL_D, _portable.CTRL_Z):
+            sys.exit(2)
+        elif ch in ('i', '\r', '\n'):
+            break
+        elif ch == 'q':
+            print()
+            return None
+        elif ch == 'r':
+            replacement = raw_input("""\
+      Replacement text for '%s': """ % word)
+            if replacement == '':
+                print("""\
+      (Canceled.)\n""")
+            else:
+                print()
+                return replacement
+        elif ch == 'n':
+            batch.add_natural(word)
+            break
+        elif offer_p and ch == 'p':
+            # Every extension needs a file type before anything is added
+            if all(dicts.has_extension(ext) or
+                   handle_new_extension(ext, dicts) for ext in extensions):
+                for ext in extensions:
+                    batch.add_by_extension(word, ext)
+                break
+        elif offer_f and ch == 'f':
+            for file_id in file_ids:
+                batch.add_by_file_id(word, file_id)
+            break
+    print()
+    return ''
+
+
+def apply_triage_replacements(collector, replacements):
+    """Replace the occurrences of subtokens in the files they were found
+    in, writing each file once.
+
+    Files which changed since they were scanned are left alone.
+
+    :param collector: the scan's failures
+    :type  collector: TriageCollector
+    :param replacements: dict mapping subtokens to their replacements
+    :returns: (occurrences replaced, files written)
+
+    """
+    by_file = {}
+    for (word, replacement) in replacements.items():
+        for (filename, ofs, token) in collector.words[word][0]:
+            by_file.setdefault(filename, []).append(
+                (ofs, token, word, replacement))
+
+    replaced = 0
+    written = 0
+    for filename in sorted(by_file):
+        (fq_filename, _, digest) = collector.files[filename]
+        source_text = read_source_file(filename, fq_filename)
+        if source_text is None:
+            continue
+        if _text_digest(source_text) != digest:
+            print("Warning: '{}' changed since it was checked; not "
+                  'replacing anything in it'.format(filename),
+                  file=sys.stderr)
+            continue
+        buffer = EditBuffer(source_text)
+        for (ofs, token, word, replacement) in by_file[filename]:
+            for (start, end) in decompose_token_spans(token):
+                subtoken = token[start:end]
+                if (subtoken.lower() == word and
+                        buffer.replace(ofs + start, ofs + end,
+                                       match_case(subtoken, replacement))):
+                    replaced += 1
+        if buffer.is_modified():
+            try:
+                with _util.open_with_encoding(fq_filename,
+                                              mode='w') as source_file:
+                    source_file.write(buffer.get_text())
+                written += 1
+            except IOError as e:
+                print(str(e), file=sys.stderr)
+    return (replaced, written)
+
+
+def triage(source_filenames, override_dictionary=None, base_dicts=[],
+           relative_to=None, c_escapes=True, test_input=False,
+           additional_extensions=None, prefetch=DEFAULT_PREFETCH,
+           check_only=None, skip_patterns=(), default_skip_patterns=True,
+           max_file_size=None, skip_binary=True, scripts=DEFAULT_SCRIPTS,
+           samples=DEFAULT_TRIAGE_SAMPLES):
+    """Check every file first, then ask once about each distinct unmatched
+    subtoken, most frequent first, and apply the decisions to all of its
+    occurrences.
+
+    The scan is done as in report-only mode, reading ahead and checking
+    identical files once.  For each subtoken, its number of occurrences
+    and up to ``samples`` of the lines it occurs on are shown.  Words to
+    add are added to the dictionaries together, once every subtoken has
+    been decided, and each file with replacements is written once.
+
+    The other arguments are as for spell_check().
+
+    :returns: True if no errors were found
+
+    """
+    if test_input:
+        _portable.allow_non_terminal_input()
+
+    dict_file = find_dict_file(override_dictionary)
+
+    with BackgroundCorporaFile(dict_file, base_dicts, relative_to,
+                               additional_extensions or ()) as dicts:
+        collector = TriageCollector(dicts, samples)
+        spell_check_files(source_filenames, dicts, collector, c_escapes,
+                          prefetch, make_selector(
+                              check_only, skip_patterns,
+                              default_skip_patterns, scripts),
+                          FileFilter(max_file_size, skip_binary))
+        if not collector.words:
+            return True
+
+        print('%u distinct unmatched words in %u files\n' % (
+            len(collector.words), len(collector.files)))
+        replacements = {}
+        with dicts.batch() as batch:
+            for word in collector.ranked():
+                replacement = handle_triage_word(word, collector, dicts,
+                                                 batch)
+                if replacement is None:
+                    break
+                elif replacement:
+                    replacements[word] = replacement
+        (replaced, written) = apply_triage_replacements(collector,
+                                                        replacements)
+        if replaced:
+            print('Replaced %u occurrences in %u files' % (replaced,
+                                                           written))
+    return False
+
+
+def _parse_mine_as(mine_as, dicts):
+    """Translate a --mine-as argument into (dictionary type, metadata)."""
+    (kind, _, arg) = mine_as.partition(':')
+    if kind in ('n', 'natural') and not arg:
+        return (DICT_TYPE_NATURAL, None)
+    elif kind in ('p', 'programming') and arg:
+        ext = re.sub(r'.*\.', '.', '.{}'.format(arg.lower()))
+        name = dicts.get_filetype_of_extension(ext)
+        if name is None:
+            name = ext[1:].upper()
+        return (DICT_TYPE_FILETYPE, (name, [ext]))
+    elif kind in ('f', 'file'):
+        return (DICT_TYPE_FILEID, arg or get_new_file_id())
+    raise SystemExit("Can't mine vocabulary as '{}'; expected natural, "
+                     'programming:EXT or file[:ID]'.format(mine_as))
+
+
+def mine_vocabulary(source_filenames, output, mine_as='natural',
+                    min_count=1, min_files=1, top=0,
+                    max_words=DEFAULT_MAX_WORDS,
+                    override_dictionary=None, base_dicts=[],
+                    relative_to=None, c_escapes=True,
+                    prefetch=DEFAULT_PREFETCH, check_only=None,
+                    skip_patterns=(), default_skip_patterns=True,
+                    max_file_size=None, skip_binary=True,
+                    scripts=DEFAULT_SCRIPTS):
+    """Collect every unmatched subtoken in source_filenames, and write the
+    ones occurring at least min_count times in at least min_files files to
+    output as a candidate dictionary section.
+
+    mine_as selects the section type: 'natural', 'programming:EXT' or
+    'file[:ID]'.  If top is nonzero, the top most frequent words are
+    listed on stderr with their counts and sample locations.
+
+    :returns: None
+
+    """
+    dict_file = find_dict_file(override_dictionary)
+
+    with CorporaFile(dict_file, base_dicts, relative_to) as dicts, \
+            VocabularyMiner(max_words) as miner:
+        (dict_type, metadata) = _parse_mine_as(mine_as, dicts)
+        spell_check_files(source_filenames, dicts, miner, c_escapes,
+                          prefetch, make_selector(
+                              check_only, skip_patterns,
+                              default_skip_patterns, scripts),
+                          FileFilter(max_file_size, skip_binary))
+
+        if output == '-':
+            written = miner.write_section(sys.stdout, dict_type, metadata,
+                                          min_count, min_files)
+        else:
+            with _util.open_with_encoding(output, encoding='utf-8',
+                                          mode='w') as f:
+                written = miner.write_section(f, dict_type, metadata,
+                                              min_count, min_files)
+        print('Wrote {0} candidate words to {1}'.format(
+            written, 'stdout' if output == '-' else output), file=sys.stderr)
+
+        for entry in miner.most_common(top):
+            print('{0:8} {1:6}  {2}  ({3})'.format(
+                entry.count, entry.files, entry.word,
+                ', '.join('%s:%u' % s for s in entry.samples)),
+                file=sys.stderr)
+
+
+def load_typo_map(filename):
+    """Load a map of misspellings to corrections.
+
+    Each non-blank line that does not start with ``#`` holds a misspelling,
+    then whitespace, then its correction, which extends to the end of the
+    line.  Misspellings are single subtokens, and are matched without
+    regard to case.
+
+    :returns: dict mapping lower-cased misspellings to corrections
+
+    """
+    typo_map = {}
+    with _util.open_with_encoding(filename) as f:
+        for (line_num, line) in enumerate(f, 1):
+            line = line.strip()
+            if line == '' or line.startswith('#'):
+                continue
+            parts = line.split(None, 1)
+            if len(parts) != 2:
+                raise SystemExit(
+                    "Error while parsing typo map '{}': no correction on "
+                    'line {}'.format(filename, line_num))
+            typo_map[parts[0].lower()] = parts[1]
+    return typo_map
+
+
+def match_case(model, word):
+    """Return word, capitalized like model."""
+    if len(model) > 1 and model.isupper():
+        return word.upper()
+    if model[:1].isupper():
+        return word[:1].upper() + word[1:]
+    return word
+
+
+def fix_text(source_text, typo_map, c_escapes=True, regions=None):
+    """Correct every misspelled subtoken in source_text.
+
+    A misspelling only matches a whole subtoken, as divided by
+    ``decompose_token()``: ``recieve`` is corrected in ``doRecieve``,
+    ``do_recieve`` and ``DO_RECIEVE``, but not in ``recievers``.  Each
+    subtoken costs one dictionary lookup however large the map is.
+
+    :param typo_map: dict mapping lower-cased misspellings to corrections
+    :param regions: list of (start, end) offsets of the parts of the text
+                    to correct, as RegionSelector.select() returns; if
+                    None, the whole text is corrected
+    :returns: EditBuffer holding the corrections
+
+    """
+    token_regex = C_ESCAPE_TOKEN_REGEX if c_escapes else TOKEN_REGEX
+    buffer = EditBuffer(source_text)
+    if regions is None:
+        regions = [(0, len(source_text))]
+    for (region_start, region_end) in regions:
+        for m in token_regex.finditer(source_text, region_start, region_end):
+            token = m.group()
+            if HEX_REGEX.match(token) is not None:
+                continue
+            for (start, end) in decompose_token_spans(token):
+                subtoken = token[start:end]
+                correction = typo_map.get(subtoken.lower())
+                if correction is not None:
+                    buffer.replace(m.start() + start, m.start() + end,
+                                   match_case(subtoken, correction))
+    return buffer
+
+
+def fix_from_map(source_filenames, map_filename, dry_run=False,
+                 c_escapes=True, max_file_size=None, skip_binary=True,
+                 override_dictionary=None, base_dicts=[], relative_to=None,
+                 additional_extensions=None, prefetch=DEFAULT_PREFETCH,
+                 check_only=None, skip_patterns=(),
+                 default_skip_patterns=True, scripts=DEFAULT_SCRIPTS):
+    """Correct the misspellings listed in map_filename in every file.
+
+    If dry_run is True, print a unified diff of the corrections rather
+    than writing them.  Files are skipped, and only the parts of each file
+    that spell_check() would check are corrected, as chosen by the other
+    arguments, which are as for spell_check().  The dictionaries are only
+    used to find the file type of each file.
+
+    :returns: True if no corrections were needed
+
+    """
+    typo_map = load_typo_map(map_filename)
+    file_filter = FileFilter(max_file_size, skip_binary)
+    selector = make_selector(check_only, skip_patterns,
+                             default_skip_patterns, scripts)
+    dict_file = find_dict_file(override_dictionary)
+    clean = True
+    with BackgroundCorporaFile(dict_file, base_dicts, relative_to,
+                               additional_extensions or ()) as dicts:
+        for (f, fq_filename, source_text) in iter_source_files(
+                source_filenames, prefetch, file_filter):
+            if source_text is None:
+                continue
+            (_, ext) = os.path.splitext(f.lower())
+            regions = selector.select(
+                source_text, dicts.get_filetype_of_extension(ext))
+            buffer = fix_text(source_text, typo_map, c_escapes, regions)
+            if not buffer.is_modified():
+                continue
+            clean = False
+            fixed_text = buffer.get_text()
+            if dry_run:
+                sys.stdout.writelines(difflib.unified_diff(
+                    source_text.splitlines(True),
+                    fixed_text.splitlines(True), 'a/' + f, 'b/' + f))
+            else:
+                _util.mutter(_util.VERBOSITY_NORMAL, 'Fixed {}'.format(f))
+                with _util.open_with_encoding(fq_filename, mode='w') as out:
+                    out.write(fixed_text)
+    file_filter.report()
+    selector.report()
+    return clean
+
+
 def filter_out_base_dicts(override_dictionary=None, base_dicts=[]):
     """Remove from our dictionary the words from the base dicts.
 
@@ -789,17 +2343,75 @@ def rename_file(rename_from, rename_to,
         dicts.rename_file(rename_from, rename_to)
 
 
+def import_file_ids(json_filename, override_dictionary=None):
+    """Copy the file ID mappings in json_filename into the dictionary's
+    file ID mappings database, creating the database if need be.
+
+    From then on the database is used instead of any JSON mapping file.
+
+    :returns: number of mappings imported
+
+    """
+    dict_file = find_dict_file(override_dictionary)
+    try:
+        with _util.open_with_encoding(json_filename,
+                                      encoding='utf-8') as f, \
+                SqliteFileIdMap(dict_file + SQLITE_SUFFIX) as file_id_map:
+            return file_id_map.import_json(f)
+    except IOError as e:
+        raise SystemExit("Can't read file ID mappings file {0}: {1}".format(
+            json_filename, e))
+    except ValueError as e:
+        raise SystemExit("Can't load file ID mappings from {0}: {1}".format(
+            json_filename, e))
+
+
+def export_file_ids(json_filename, override_dictionary=None):
+    """Write the dictionary's file ID mappings to json_filename in JSON
+    format."""
+    dict_file = find_dict_file(override_dictionary)
+    with open_file_id_map(dict_file) as file_id_map:
+        if json_filename == '-':
+            file_id_map.export_json(sys.stdout)
+            print()
+            return
+        try:
+            with _util.open_with_encoding(json_filename, encoding='utf-8',
+                                          mode='w') as f:
+                file_id_map.export_json(f)
+        except IOError as e:
+            raise SystemExit("Can't write file ID mappings file {0}: {1}"
+                             .format(json_filename, e))
+
+
 def add_to_dict(dictionary_type, word, files=[],
                 override_dictionary=None, base_dicts=[], relative_to=None):
     """Add word to dictionary_type.
 
     This is with respect to the filename ID mappings if 'file' type
     dictionary is used."""
+    add_words_to_dict(dictionary_type, [word], files, override_dictionary,
+                      base_dicts, relative_to)
+
+
+def add_words_to_dict(dictionary_type, words, files=[],
+                      override_dictionary=None, base_dicts=[],
+                      relative_to=None):
+    """Add each of words to dictionary_type, as add_to_dict() does.
+
+    The dictionary is loaded and saved once, and the words are merged into
+    it all at once.
+
+    :returns: number of words which were not already in the dictionary
+
+    """
     dict_file = find_dict_file(override_dictionary)
 
     with CorporaFile(dict_file, base_dicts, relative_to) as dicts:
+        batch = dicts.batch()
         if dictionary_type[0] == 'n':
-            dicts.add_natural(word)
+            for word in words:
+                batch.add_natural(word)
 
         elif dictionary_type[0] == 'f':
             fq_filename = os.path.normcase(os.path.realpath(files[0]))
@@ -809,18 +2421,50 @@ def add_to_dict(dictionary_type, word, files=[],
                 print('New file ID {0} for {1}'.format(file_id, files[0]),
                       file=sys.stderr)
                 dicts.new_file_and_file_id(fq_filename, file_id)
-            dicts.add_by_file_id(word, file_id)
+            for word in words:
+                batch.add_by_file_id(word, file_id)
 
         elif dictionary_type[0] == 'p':
             ext = re.sub(r'.*\.', '.', '.{}'.format(files[0].lower()))
-            if not dicts.add_by_extension(word, ext):
-                print("Dictionary for file extension '{}' not found."
-                      .format(ext), file=sys.stderr)
+            for word in words:
+                if not batch.add_by_extension(word, ext):
+                    print("Dictionary for file extension '{}' not found."
+                          .format(ext), file=sys.stderr)
+                    break
 
         else:
             print("Dictionary type '{}' not recognized."
                   .format(dictionary_type), file=sys.stderr)
 
+        return batch.apply()
+
+
+def read_word_list(filename):
+    """Read the words listed one per line in filename ('-' for standard
+    input).
+
+    Blank lines, lines starting with '#' and dictionary headers (such as
+    those in the output of --mine-vocabulary) are skipped.
+
+    :returns: list of words
+
+    """
+    if filename == '-':
+        lines = sys.stdin.readlines()
+    else:
+        try:
+            with _util.open_with_encoding(filename) as f:
+                lines = f.readlines()
+        except IOError as e:
+            raise SystemExit("Can't read word list '{}': {}".format(
+                filename, e))
+    words = []
+    for line in lines:
+        word = line.strip()
+        if word and not word.startswith('#') and ':' not in word:
+            words.append(word)
+    return words
+
 
 def delete_files(delete_files,
                  override_dictionary=None, base_dicts=[], relative_to=None):
@@ -831,6 +2475,52 @@ def delete_files(delete_files,
             dicts.delete_file(file)
 
 
+def _region_kinds_arg(spec):
+    try:
+        return parse_region_kinds(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _skip_pattern_arg(regex):
+    try:
+        return compile_skip_pattern(regex)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _scripts_arg(spec):
+    try:
+        return parse_scripts(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _extension_arg(ext):
+    """Normalize an extension such as py or .PY to .py."""
+    return '.' + ext.lower().lstrip('.')
+
+
+def _shard_arg(spec):
+    try:
+        return parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _file_size_arg(spec):
+    """Parse a size in bytes, optionally followed by K, M or G."""
+    (digits, multiplier) = (spec, 1)
+    if spec[-1:].upper() in ('K', 'M', 'G'):
+        (digits, multiplier) = (spec[:-1], 1024 ** ' KMG'.index(
+            spec[-1].upper()))
+    if not digits.isdigit():
+        raise argparse.ArgumentTypeError(
+            "invalid size '{}'; expected e.g. 500000, 512K or 2M".format(
+                spec))
+    return int(digits) * multiplier
+
+
 def main():
     parser = argparse.ArgumentParser(description=__doc__, prog='scspell')
 
@@ -845,6 +2535,109 @@ def main():
         '--no-c-escapes', dest='c_escapes',
         action='store_false', default=True,
         help='treat \\label as label, for e.g. LaTeX')
+    spell_group.add_argument(
+        '--check-only', metavar='KINDS', type=_region_kinds_arg,
+        help='in files of a type with a lexer (such as Python or C/C++), '
+             'check only the listed kinds of region: a comma-separated list '
+             'of comments, strings, definitions and identifiers')
+    spell_group.add_argument(
+        '--skip-pattern', metavar='REGEX', dest='skip_patterns',
+        action='append', default=[], type=_skip_pattern_arg,
+        help="don't check text matching REGEX (may be repeated)")
+    spell_group.add_argument(
+        '--no-default-skip-patterns', dest='default_skip_patterns',
+        action='store_false', default=True,
+        help='check URLs, email addresses, UUIDs, hash digests and base64 '
+             'data, which are skipped by default')
+    spell_group.add_argument(
+        '--scripts', metavar='LIST', type=_scripts_arg,
+        default=DEFAULT_SCRIPTS,
+        help='check only text in these writing systems, a comma-separated '
+             'list of {} (default: latin), or all; runs of text in other '
+             'scripts are skipped and counted'.format(
+                 ', '.join(sorted(_scripts.SCRIPTS))))
+    spell_group.add_argument(
+        '--max-file-size', metavar='SIZE', type=_file_size_arg,
+        help='skip files larger than SIZE bytes (or K, M or G with a '
+             'suffix)')
+    spell_group.add_argument(
+        '--no-skip-binary', dest='skip_binary', action='store_false',
+        default=True,
+        help='check files which look binary or minified, which are '
+             'skipped by default')
+    spell_group.add_argument(
+        '--triage', action='store_true',
+        help='check every file first, then ask once about each distinct '
+             'unmatched word, most frequent first, and apply the decisions '
+             'to all of its occurrences')
+    spell_group.add_argument(
+        '--fix-from', metavar='MAP',
+        help='instead of checking, correct the misspellings listed in MAP '
+             'in every file; each line of MAP holds a misspelling and its '
+             'correction')
+    spell_group.add_argument(
+        '--dry-run', action='store_true',
+        help='with --fix-from, print a diff instead of changing the files; '
+             'with --compact-dictionary, list the words instead of removing '
+             'them')
+    spell_group.add_argument(
+        '--suggest', action='store_true',
+        help='with --report-only, include suggested corrections in the '
+             'report')
+    spell_group.add_argument(
+        '--summary', action='store_true',
+        help='with --report-only, print only the number of failures, of '
+             'files with failures and of distinct words, instead of each '
+             'failure')
+    spell_group.add_argument(
+        '--count', action='store_true',
+        help='like --summary, but first print the number of failures in '
+             'each file and of each word')
+    spell_group.add_argument(
+        '--max-findings', type=int, metavar='N',
+        help='with --report-only, stop checking after N failures')
+    spell_group.add_argument(
+        '--batch-match', action='store_true',
+        help='with --report-only, look up the distinct words of each file '
+             'in the dictionaries together, using NumPy if it is installed')
+    spell_group.add_argument(
+        '--archive-ext', metavar='EXT', dest='member_extensions',
+        action='append', type=_extension_arg,
+        help='in tar and zip archives given as files, only check members '
+             'with the extension EXT (may be repeated)')
+    spell_group.add_argument(
+        '--git-staged', action='store_true',
+        help='with --report-only, check the files staged for commit in the '
+             'git repository, as staged, rather than files in the working '
+             'tree; any files given limit the check to those paths')
+    spell_group.add_argument(
+        '--git-rev', metavar='REV',
+        help='like --git-staged, but check every file in the revision REV')
+    spell_group.add_argument(
+        '--watch', nargs='+', metavar='DIR',
+        help='check every file in the DIR trees, then keep re-checking '
+             'files as they change, and the files affected when the '
+             'dictionary changes, until interrupted; implies --report-only')
+    spell_group.add_argument(
+        '--shard', metavar='K/N', type=_shard_arg,
+        help='check only the files in shard K of N, chosen by a hash of '
+             'their paths relative to --relative-to (or the current '
+             'directory), so that N machines given the same files split '
+             'the work between them')
+    spell_group.add_argument(
+        '--report-file', metavar='FILE',
+        help='with --report-only, also write the failures to FILE as a '
+             'JSON report, to be combined with --merge-reports')
+    spell_group.add_argument(
+        '--merge-reports', action='store_true',
+        help='instead of checking, combine the JSON reports given as files '
+             '(one per shard), print their failures and exit with status 1 '
+             'if there were any; with --report-file, also write the '
+             'combined report to FILE')
+    spell_group.add_argument(
+        '--prefetch', type=int, default=DEFAULT_PREFETCH, metavar='N',
+        help='with --report-only, read up to N files ahead of the one being '
+             'checked (default: %(default)s; 0 disables read-ahead)')
 
     dict_group.add_argument(
         '--override-dictionary', dest='override_filename',
@@ -856,8 +2649,14 @@ def main():
         action='store')
     dict_group.add_argument(
         '--export-dictionary', dest='export_filename',
-        help='export current dictionary to FILE', metavar='FILE',
+        help='export current dictionary to FILE (in the text format, if it '
+             'is a database)', metavar='FILE',
         action='store')
+    dict_group.add_argument(
+        '--import-dictionary', dest='import_filename', metavar='FILE',
+        help='add all of the words in the dictionary FILE to the current '
+             'dictionary; use --override-dictionary NAME.sqlite to create a '
+             'dictionary database from a text dictionary')
     dict_group.add_argument(
         '--base-dict', dest='base_dicts', action='append', default=[],
         metavar='BASE_DICT',
@@ -871,6 +2670,53 @@ def main():
         '--filter-out-base-dicts', action='store_true',
         help='Remove from the dictionary file '
              'all the words from the base dicts')
+    dict_group.add_argument(
+        '--compact-dictionary', action='store_true',
+        help='remove the natural language words which are a prefix of '
+             'another word, and so are matched anyway; with --dry-run, '
+             'list them instead')
+    dict_group.add_argument(
+        '--union', metavar='OTHER_DICT',
+        help='write the words of the dictionary or OTHER_DICT, corpus by '
+             'corpus, to --output')
+    dict_group.add_argument(
+        '--intersect', metavar='OTHER_DICT',
+        help='write the words both the dictionary and OTHER_DICT accept, '
+             'corpus by corpus, to --output')
+    dict_group.add_argument(
+        '--diff', metavar='OTHER_DICT',
+        help="write the words of the dictionary which OTHER_DICT doesn't "
+             'accept, corpus by corpus, to --output')
+    dict_group.add_argument(
+        '--output', default='-', metavar='FILE',
+        help='with --union, --intersect or --diff, write the resulting '
+             'dictionary to FILE (default: standard output)')
+    dict_group.add_argument(
+        '--mine-vocabulary', metavar='OUTPUT',
+        help='instead of reporting errors, collect every unmatched word in '
+             'the files and write them to OUTPUT (- for stdout) as a '
+             'candidate dictionary section for review')
+    dict_group.add_argument(
+        '--mine-as', default='natural', metavar='TYPE',
+        help='section type for --mine-vocabulary: natural, '
+             'programming:EXT or file[:ID] (default: %(default)s)')
+    dict_group.add_argument(
+        '--mine-min-count', type=int, default=1, metavar='N',
+        help='with --mine-vocabulary, only keep words occurring at least N '
+             'times')
+    dict_group.add_argument(
+        '--mine-min-files', type=int, default=1, metavar='N',
+        help='with --mine-vocabulary, only keep words occurring in at least '
+             'N files')
+    dict_group.add_argument(
+        '--mine-top', type=int, default=0, metavar='K',
+        help='with --mine-vocabulary, list the K most frequent words with '
+             'counts and sample locations on stderr')
+    dict_group.add_argument(
+        '--mine-memory-words', type=int, default=DEFAULT_MAX_WORDS,
+        metavar='N',
+        help='with --mine-vocabulary, spill to temporary files once N '
+             'distinct words are held in memory (default: %(default)s)')
     dict_group.add_argument(
         '--relative-to', dest='relative_to',
         help='use file paths relative to here in file ID map.  '
@@ -909,11 +2755,26 @@ def main():
              'dictionary will be removed; this will not spell check the '
              'files')
     dict_group.add_argument(
-        '--add-to-dict', nargs=2,
+        '--import-file-ids', metavar='JSON',
+        help='store the file ID mapping in an indexed database next to the '
+             'dictionary, which is faster for large mappings, and import the '
+             'mappings in the JSON file (such as the existing '
+             '<dictionary>.fileids.json) into it')
+    dict_group.add_argument(
+        '--export-file-ids', metavar='JSON',
+        help="write the file ID mapping to JSON in scspell's JSON mapping "
+             "format ('-' for standard output)")
+    dict_group.add_argument(
+        '--add-to-dict', nargs='+',
         metavar=('DICT_TYPE', 'WORD'),
         help="Add WORD to DICT_TYPE dictionary. If adding to 'file' or "
              "'programming' dictionary then file argument is also required. "
              'Possible DICT_TYPE values are n[atural], p[rogramming], f[ile]')
+    dict_group.add_argument(
+        '--words-from', metavar='FILE',
+        help="with --add-to-dict DICT_TYPE, add every word listed in FILE "
+             "('-' for standard input), one per line, instead of a single "
+             'WORD')
 
     #  Testing option to allow scspell to read stdin from a non-tty
     test_group.add_argument(
@@ -939,9 +2800,12 @@ def main():
     elif args.dictionary is not None:
         set_dictionary(args.dictionary)
     elif args.export_filename is not None:
-        export_dictionary(args.export_filename, args.base_dicts)
+        export_dictionary(args.export_filename, args.base_dicts,
+                          args.override_filename)
         print("Exported dictionary to '{}'".format(args.export_filename),
               file=sys.stderr)
+    elif args.import_filename is not None:
+        import_dictionary(args.import_filename, args.override_filename)
     elif args.merge_file_ids is not None:
         merge_file_ids(args.merge_file_ids[0], args.merge_file_ids[1],
                        args.override_filename,
@@ -960,8 +2824,20 @@ def main():
         delete_files(args.files,
                      args.override_filename,
                      args.base_dicts, args.relative_to)
+    elif args.import_file_ids is not None:
+        count = import_file_ids(args.import_file_ids, args.override_filename)
+        print('Imported {0} file ID mappings'.format(count), file=sys.stderr)
+    elif args.export_file_ids is not None:
+        export_file_ids(args.export_file_ids, args.override_filename)
     elif args.add_to_dict is not None:
         dictionary_type = str(args.add_to_dict[0])
+        # Any arguments after DICT_TYPE and WORD are files
+        if args.words_from is None:
+            if len(args.add_to_dict) < 2:
+                parser.error('--add-to-dict requires a WORD or --words-from')
+            args.files = args.add_to_dict[2:] + args.files
+        else:
+            args.files = args.add_to_dict[1:] + args.files
         if dictionary_type in ['p', 'programming'] and len(args.files) < 1:
             parser.error('No file (or extension) specified')
         elif dictionary_type in ['f', 'file'] and len(args.files) < 1:
@@ -974,21 +2850,128 @@ def main():
             parser.error("Dictionary type '{}' not found."
                          .format(dictionary_type))
 
-        add_to_dict(args.add_to_dict[0], args.add_to_dict[1],
-                    args.files,
-                    args.override_filename,
-                    args.base_dicts,
-                    args.relative_to)
+        if args.words_from is None:
+            add_to_dict(args.add_to_dict[0], args.add_to_dict[1],
+                        args.files,
+                        args.override_filename,
+                        args.base_dicts,
+                        args.relative_to)
+        else:
+            words = read_word_list(args.words_from)
+            added = add_words_to_dict(args.add_to_dict[0], words, args.files,
+                                      args.override_filename,
+                                      args.base_dicts, args.relative_to)
+            print('Added {} of {} words'.format(added, len(words)),
+                  file=sys.stderr)
     elif args.filter_out_base_dicts:
         filter_out_base_dicts(args.override_filename, args.base_dicts)
-    elif len(args.files) < 1:
+    elif args.watch is not None:
+        watch(args.watch, args.override_filename, args.base_dicts,
+              args.relative_to, args.c_escapes, args.suggest,
+              args.check_only, args.skip_patterns, args.default_skip_patterns,
+              args.max_file_size, args.skip_binary, args.prefetch,
+              scripts=args.scripts)
+    elif args.merge_reports:
+        if len(args.files) < 1:
+            parser.error('No reports specified')
+        okay = merge_reports(args.files, args.report_file)
+        return 0 if okay else 1
+    elif args.compact_dictionary:
+        compact_dictionary(args.override_filename, args.dry_run)
+    elif (args.union is not None or args.intersect is not None or
+          args.diff is not None):
+        for (operation, other) in ((OP_UNION, args.union),
+                                   (OP_INTERSECT, args.intersect),
+                                   (OP_DIFF, args.diff)):
+            if other is not None:
+                break
+        count = combine_dictionary(operation, other, args.output,
+                                   args.override_filename)
+        print('Wrote {} words to {}'.format(
+            count, 'stdout' if args.output == '-' else args.output),
+            file=sys.stderr)
+    elif args.triage:
+        if len(args.files) < 1:
+            parser.error('No files specified')
+        if args.report:
+            parser.error('--triage is interactive; it cannot be combined '
+                         'with --report-only')
+        okay = triage(args.files, args.override_filename, args.base_dicts,
+                      args.relative_to, args.c_escapes, args.test_input,
+                      prefetch=args.prefetch, check_only=args.check_only,
+                      skip_patterns=args.skip_patterns,
+                      default_skip_patterns=args.default_skip_patterns,
+                      max_file_size=args.max_file_size,
+                      skip_binary=args.skip_binary, scripts=args.scripts)
+        return 0 if okay else 1
+    elif args.fix_from is not None:
+        if len(args.files) < 1:
+            parser.error('No files specified')
+        okay = fix_from_map(args.files, args.fix_from, args.dry_run,
+                            args.c_escapes, args.max_file_size,
+                            args.skip_binary, args.override_filename,
+                            args.base_dicts, args.relative_to,
+                            prefetch=args.prefetch,
+                            check_only=args.check_only,
+                            skip_patterns=args.skip_patterns,
+                            default_skip_patterns=args.default_skip_patterns,
+                            scripts=args.scripts)
+        return 0 if okay or not args.dry_run else 1
+    elif args.mine_vocabulary is not None:
+        if len(args.files) < 1:
+            parser.error('No files specified')
+        mine_vocabulary(args.files, args.mine_vocabulary, args.mine_as,
+                        args.mine_min_count, args.mine_min_files,
+                        args.mine_top, args.mine_memory_words,
+                        args.override_filename, args.base_dicts,
+                        args.relative_to, args.c_escapes, args.prefetch,
+                        args.check_only, args.skip_patterns,
+                        args.default_skip_patterns, args.max_file_size,
+                        args.skip_binary, args.scripts)
+    elif len(args.files) < 1 and not (args.git_staged or args.git_rev):
         parser.error('No files specified')
+    elif (args.git_staged or args.git_rev) and not args.report:
+        parser.error('--git-staged and --git-rev require --report-only')
+    elif (not args.report and
+          any(_archive.is_archive(fn) for fn in args.files)):
+        parser.error('checking archives requires --report-only')
+    elif args.report_file is not None and not args.report:
+        parser.error('--report-file requires --report-only')
+    elif (args.summary or args.count) and not args.report:
+        parser.error('--summary and --count require --report-only')
+    elif args.max_findings is not None and not args.report:
+        parser.error('--max-findings requires --report-only')
+    elif args.max_findings is not None and args.max_findings < 1:
+        parser.error('--max-findings must be at least 1')
+    elif args.batch_match and not args.report:
+        parser.error('--batch-match requires --report-only')
     else:
+        report_only = args.report
+        counts = None
+        if args.summary or args.count:
+            report_only = counts = CountingReport()
         okay = spell_check(args.files,
                            args.override_filename,
                            args.base_dicts,
                            args.relative_to,
-                           args.report,
+                           report_only,
                            args.c_escapes,
-                           args.test_input)
+                           args.test_input,
+                           prefetch=args.prefetch,
+                           suggest=args.suggest,
+                           check_only=args.check_only,
+                           skip_patterns=args.skip_patterns,
+                           default_skip_patterns=args.default_skip_patterns,
+                           max_file_size=args.max_file_size,
+                           skip_binary=args.skip_binary,
+                           shard=args.shard,
+                           report_file=args.report_file,
+                           git_staged=args.git_staged,
+                           git_rev=args.git_rev,
+                           member_extensions=args.member_extensions,
+                           scripts=args.scripts,
+                           max_findings=args.max_findings,
+                           batch_match=args.batch_match)
+        if counts is not None:
+            counts.print_counts(args.count)
         return 0 if okay else 1
@@ -0,0 +1,99 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Reads the files inside tar and zip archives, without extracting them.
+
+Members are read one at a time, in the order they are stored, so only one
+member is held in memory however large the archive.  Compressed tar
+archives are read as a stream.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import tarfile
+import zipfile
+
+
+# Separates the name of an archive from the name of a member, in the names
+# of members reported to the user: archive.tar.gz!dir/member.py
+MEMBER_SEPARATOR = '!'
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz', '.tbz2',
+                '.tar.xz', '.txz')
+ZIP_SUFFIXES = ('.zip', '.whl', '.jar', '.egg')
+
+# Errors raised by a corrupt or unreadable archive
+ARCHIVE_ERRORS = (IOError, OSError, EOFError, tarfile.TarError,
+                  zipfile.BadZipfile)
+
+
+def is_archive(filename):
+    """Decide from its name whether a file is an archive to read members
+    from."""
+    name = filename.lower()
+    return name.endswith(TAR_SUFFIXES) or name.endswith(ZIP_SUFFIXES)
+
+
+def member_name(archive, member):
+    """Get the name under which a member of an archive is reported."""
+    return archive + MEMBER_SEPARATOR + member
+
+
+def iter_members(filename):
+    """Iterate over the regular files in an archive.
+
+    Each member must be read, if at all, before moving on to the next.
+
+    :returns: iterator of (name, size, read) triples, where read() returns
+              the member's contents as bytes
+    :raises: one of ARCHIVE_ERRORS if the archive can't be read
+
+    """
+    if filename.lower().endswith(ZIP_SUFFIXES):
+        return _iter_zip_members(filename)
+    return _iter_tar_members(filename)
+
+
+def _iter_tar_members(filename):
+    # Stream mode reads the archive sequentially, with no index in memory
+    # and no seeking back through compressed data.
+    with tarfile.open(filename, mode='r|*') as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+
+            def read(member=member):
+                f = archive.extractfile(member)
+                try:
+                    return f.read()
+                finally:
+                    f.close()
+            yield (member.name, member.size, read)
+
+
+def _iter_zip_members(filename):
+    with zipfile.ZipFile(filename) as archive:
+        for info in archive.infolist():
+            if info.filename.endswith('/'):
+                continue    # a directory
+            yield (info.filename, info.file_size,
+                   lambda info=info: archive.read(info))
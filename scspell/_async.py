@@ -0,0 +1,183 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Asyncio front end to the report-only spell checker.
+
+File reads are done in the event loop's default executor, and matching is
+done in a caller-supplied executor (threads or processes).  Each process
+loads the dictionaries at most once.  Requires Python 3.7 or newer.
+
+"""
+
+import asyncio
+import collections
+import os
+import threading
+
+from ._corpus import CorporaFile
+from ._regions import RegionSelector
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class CheckResult(collections.namedtuple(
+        'CheckResult', ['filename', 'okay', 'findings'])):
+
+    """The outcome of checking one file or text.
+
+    ``okay`` is False if any errors were found, or if the file could not be
+    read.  ``findings`` is a list of ``scspell.Finding``.
+
+    """
+
+    __slots__ = ()
+
+
+# Dictionaries loaded by this process, keyed by _DictSpec
+_loaded_dicts = {}
+_loaded_dicts_lock = threading.Lock()
+
+
+# Every text is checked with the default skip patterns
+_selector = RegionSelector()
+
+
+_DictSpec = collections.namedtuple(
+    '_DictSpec', ['dict_file', 'base_dicts', 'relative_to',
+                  'additional_extensions', 'c_escapes'])
+
+
+def _get_dicts(spec):
+    """Return the CorporaFile described by spec, loading it on first use in
+    this process."""
+    with _loaded_dicts_lock:
+        try:
+            return _loaded_dicts[spec]
+        except KeyError:
+            pass
+        dicts = CorporaFile(spec.dict_file, list(spec.base_dicts),
+                            spec.relative_to)
+        for extension in spec.additional_extensions:
+            dicts.register_extension(*extension)
+        _loaded_dicts[spec] = dicts
+        return dicts
+
+
+def _read(filename):
+    """Read a file on behalf of the event loop."""
+    from . import read_source_file
+    return read_source_file(filename,
+                            os.path.normcase(os.path.realpath(filename)))
+
+
+def _check(spec, filename, text):
+    """Check a single text.  Runs inside the matching executor."""
+    from . import FindingCollector
+    from . import spell_check_text
+
+    if text is None:
+        return CheckResult(filename, False, [])
+    collector = FindingCollector()
+    (_, okay) = spell_check_text(
+        text, filename, os.path.normcase(os.path.realpath(filename)),
+        _get_dicts(spec), set(), collector, spec.c_escapes, _selector)
+    return CheckResult(filename, okay, collector.findings)
+
+
+async def _run(spec, jobs, executor, max_concurrency):
+    """Asynchronously yield a CheckResult for each (filename, text) in jobs,
+    in completion order.
+
+    ``text`` is None for a job whose contents must be read from disk.  No
+    more than max_concurrency jobs are in flight at once; the remaining
+    ones are cancelled if the consumer stops iterating.
+
+    """
+    if max_concurrency < 1:
+        raise ValueError('max_concurrency must be at least 1')
+    loop = asyncio.get_running_loop()
+
+    async def run_one(filename, text):
+        if text is None:
+            text = await loop.run_in_executor(None, _read, filename)
+        return await loop.run_in_executor(
+            executor, _check, spec, filename, text)
+
+    jobs = iter(jobs)
+    pending = set()
+    try:
+        while True:
+            for (filename, text) in jobs:
+                pending.add(asyncio.ensure_future(run_one(filename, text)))
+                if len(pending) >= max_concurrency:
+                    break
+            if not pending:
+                return
+            (done, pending) = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _make_spec(override_dictionary, base_dicts, relative_to, c_escapes,
+               additional_extensions):
+    from . import find_dict_file
+    return _DictSpec(find_dict_file(override_dictionary),
+                     tuple(base_dicts), relative_to,
+                     tuple(tuple(e) for e in additional_extensions or []),
+                     c_escapes)
+
+
+def async_spell_check(source_filenames, override_dictionary=None,
+                      base_dicts=[], relative_to=None, c_escapes=True,
+                      additional_extensions=None, executor=None,
+                      max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """Check source_filenames concurrently, without blocking the event loop.
+
+    The dictionary options have the same meaning as for ``spell_check()``;
+    checking is always report-only and the dictionaries are never modified.
+    Matching runs in ``executor``, which may be a ThreadPoolExecutor or a
+    ProcessPoolExecutor (None selects the loop's default executor).
+
+    :returns: asynchronous iterator of CheckResult, in completion order
+
+    """
+    spec = _make_spec(override_dictionary, base_dicts, relative_to,
+                      c_escapes, additional_extensions)
+    return _run(spec, ((fn, None) for fn in source_filenames),
+                executor, max_concurrency)
+
+
+def async_spell_check_texts(texts, override_dictionary=None,
+                            base_dicts=[], relative_to=None, c_escapes=True,
+                            additional_extensions=None, executor=None,
+                            max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """Like ``async_spell_check()``, but check in-memory texts.
+
+    :param texts: iterable of (filename, text) pairs; the filename is used
+                  only for reporting and dictionary selection
+    :returns: asynchronous iterator of CheckResult, in completion order
+
+    """
+    spec = _make_spec(override_dictionary, base_dicts, relative_to,
+                      c_escapes, additional_extensions)
+    return _run(spec, texts, executor, max_concurrency)
@@ -0,0 +1,189 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Defines a text buffer which records replacements as a list of edits."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import re
+from bisect import bisect_left
+from bisect import bisect_right
+
+
+class EditBuffer(object):
+
+    """The contents of a source file, along with the replacements made to it
+    so far.
+
+    The original text is never copied.  Each replacement is recorded as an
+    edit (start, end, replacement) in the coordinates of the original text,
+    and the edits are only applied when the whole text is requested, which
+    is normally once, when the file is written out.  Replacements never
+    partly overlap: text which has already been replaced is only replaced
+    again along with the text around it, as a whole.
+
+    """
+
+    def __init__(self, text):
+        self._text = text
+        self._starts = []   # start offset of each edit, sorted
+        self._edits = []    # (start, end, replacement), same order
+        self._line_starts = None
+
+    def get_original(self):
+        """Get the original text."""
+        return self._text
+
+    def is_modified(self):
+        return len(self._edits) > 0
+
+    def get_text(self):
+        """Get the text with all edits applied."""
+        if not self._edits:
+            return self._text
+        pieces = []
+        pos = 0
+        for (start, end, replacement) in self._edits:
+            pieces.append(self._text[pos:start])
+            pieces.append(replacement)
+            pos = end
+        pieces.append(self._text[pos:])
+        return ''.join(pieces)
+
+    def overlapping_edit_end(self, start, end):
+        """If an edit overlaps the original text between start and end,
+        return the offset where the first such edit ends, else None."""
+        i = bisect_right(self._starts, start) - 1
+        if i >= 0 and self._edits[i][1] > start:
+            return self._edits[i][1]
+        if i + 1 < len(self._starts) and self._starts[i + 1] < end:
+            return self._edits[i + 1][1]
+        return None
+
+    def get_edited_span(self, start, end):
+        """Widen the original text between start and end to take in the
+        edits which overlap it.
+
+        :returns: (start, end, text) where ``text`` is what the widened
+                  span reads with the edits applied, or None if the text
+                  between start and end lies within a single edit
+
+        """
+        i = bisect_right(self._starts, start) - 1
+        if i >= 0 and self._edits[i][1] > start:
+            if self._edits[i][1] >= end:
+                return None
+            start = self._edits[i][0]
+        else:
+            i += 1
+        while i < len(self._edits) and self._edits[i][0] < end:
+            end = max(end, self._edits[i][1])
+            i += 1
+        return (start, end, self.get_range(start, end))
+
+    def replace(self, start, end, replacement):
+        """Replace the original text between start and end.
+
+        Edits which lie entirely within that text are superseded.
+
+        :returns: True if replaced, False if an edit overlaps only part of
+                  that text
+
+        """
+        i = bisect_left(self._starts, start)
+        if i > 0 and self._edits[i - 1][1] > start:
+            return False
+        j = i
+        while j < len(self._starts) and self._starts[j] < end:
+            if self._edits[j][1] > end:
+                return False
+            j += 1
+        self._starts[i:j] = [start]
+        self._edits[i:j] = [(start, end, replacement)]
+        return True
+
+    def replace_all(self, old, replacement, start):
+        """Replace every occurrence of old in the original text from start
+        onwards, including those within longer tokens, unless that text was
+        already edited.
+
+        :returns: number of occurrences replaced
+
+        """
+        count = 0
+        for m in re.compile(re.escape(old)).finditer(self._text, start):
+            if (self.overlapping_edit_end(m.start(), m.end()) is None and
+                    self.replace(m.start(), m.end(), replacement)):
+                count += 1
+        return count
+
+    def _get_line_starts(self):
+        if self._line_starts is None:
+            starts = [0]
+            pos = self._text.find('\n')
+            while pos >= 0:
+                starts.append(pos + 1)
+                pos = self._text.find('\n', pos + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def get_line_num(self, ofs):
+        """Get the (1-based) line number of the original offset ofs.
+
+        Replacements never contain newlines, so the line numbers of the
+        original and the edited text agree.
+
+        """
+        return bisect_right(self._get_line_starts(), ofs)
+
+    def get_line(self, line_num):
+        """Get the text of a (1-based) line, with edits applied."""
+        line_starts = self._get_line_starts()
+        start = line_starts[line_num - 1]
+        if line_num < len(line_starts):
+            end = line_starts[line_num] - 1
+        else:
+            end = len(self._text)
+        return self.get_range(start, end)
+
+    def get_range(self, start, end):
+        """Get the original text between start and end, with the edits
+        which begin there applied."""
+        pieces = []
+        pos = start
+        i = bisect_left(self._starts, start)
+        while i < len(self._edits) and self._edits[i][0] < end:
+            (e_start, e_end, replacement) = self._edits[i]
+            pieces.append(self._text[pos:e_start])
+            pieces.append(replacement)
+            pos = e_end
+            i += 1
+        pieces.append(self._text[pos:end])
+        return ''.join(pieces)
+
+    def get_context(self, ofs, size):
+        """Get the lines surrounding the original offset ofs, as a sequence
+        of (line_num, line_string) pairs."""
+        line_num = self.get_line_num(ofs)
+        first = max(1, line_num - size // 2)
+        last = min(len(self._get_line_starts()), line_num + size // 2)
+        return [(i, self.get_line(i).strip('\r\n'))
+                for i in range(first, last + 1)]
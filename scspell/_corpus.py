@@ -24,15 +24,27 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from collections import OrderedDict
-import errno
-import io
-import json
+import collections
+import heapq
 import os
 import re
 import sys
+import threading
 from bisect import bisect_left
 from . import _util
+from . import _vectorized
+from ._dictdb import DictionaryDatabase
+from ._dictdb import is_dictionary_database
+from ._fileids import JsonFileIdMap
+from ._fileids import open_file_id_map
+from ._setops import accepted_by
+from ._setops import difference
+from ._setops import intersection
+from ._setops import redundant_prefixes
+from ._setops import union
+from ._suggest import DEFAULT_LIMIT
+from ._suggest import DEFAULT_MAX_DISTANCE
+from ._suggest import DeletionIndex
 
 
 DICT_TYPE_NATURAL = 'NATURAL'       # Identifies natural language dictionary
@@ -48,6 +60,11 @@ MATCH_NATURAL = 0x1
 MATCH_FILETYPE = 0x2
 MATCH_FILEID = 0x4
 
+# Set operations between dictionaries (see combine_dictionaries())
+OP_UNION = 'union'
+OP_INTERSECT = 'intersect'
+OP_DIFF = 'diff'
+
 
 class ParsingError(Exception):
 
@@ -62,6 +79,7 @@ class Corpus(object):
         self._dirty = False
         self._dict_type = dict_type
         self._metadata = metadata
+        self._deletion_index = None     # Built on first call to suggest()
 
     def _mark_dirty(self):
         self._dirty = True
@@ -72,6 +90,16 @@ class Corpus(object):
     def is_dirty(self):
         return self._dirty
 
+    def get_dict_type(self):
+        """Get the DICT_TYPE_* of this dictionary."""
+        return self._dict_type
+
+    def get_metadata(self):
+        """Get the header metadata of this dictionary: '' for natural
+        language, (name, extensions) for a file type and the file ID for a
+        file-specific dictionary."""
+        return self._metadata
+
     def get_name(self):
         """Get the descriptive name of this dictionary."""
         assert self._dict_type == DICT_TYPE_FILETYPE
@@ -99,30 +127,181 @@ class Corpus(object):
         """
         raise NotImplementedError
 
+    def match_many(self, tokens):
+        """Find the tokens which match this Corpus, as match() would.
+
+        :returns: set of those of the tokens which match
+
+        """
+        return set(t for t in tokens if self.match(t))
+
     def add(self, token):
         """Add the specified token to this Corpus."""
         raise NotImplementedError
 
+    def add_many(self, tokens):
+        """Add each of the tokens to this Corpus.
+
+        :returns: number of tokens which were not already present
+
+        """
+        raise NotImplementedError
+
+    def tokens(self):
+        """Get the tokens of this Corpus, sorted."""
+        raise NotImplementedError
+
+    def discard(self, tokens):
+        """Remove any of the tokens present in this Corpus."""
+        raise NotImplementedError
+
+    def _index_added(self, token):
+        """Keep the deletion index, if any, up to date with an added
+        token."""
+        if self._deletion_index is not None:
+            self._deletion_index.add(token)
+
+    def suggest(self, token, max_distance=DEFAULT_MAX_DISTANCE):
+        """Find the words of this Corpus within max_distance edits of token.
+
+        The index used for the search is built on the first call.
+
+        :returns: list of (distance, word) pairs, closest first
+
+        """
+        if self._deletion_index is None:
+            self._deletion_index = DeletionIndex(self.tokens())
+        return self._deletion_index.lookup(token, max_distance)
+
     def write(self, f):
         """Write the contents of this Corpus to f, a file-like object."""
         raise NotImplementedError
 
     def _write_header(self, f):
         """Write the corpus header to f, a file-like object."""
-        if self._dict_type == DICT_TYPE_NATURAL:
-            f.write('%s:\n' % DICT_TYPE_NATURAL)
-        elif self._dict_type == DICT_TYPE_FILETYPE:
-            (name, extensions) = self._metadata
-            f.write(
-                '%s: %s; %s\n' % (
-                    DICT_TYPE_FILETYPE,
-                    name,
-                    ', '.join(
-                        extensions)))
-        elif self._dict_type == DICT_TYPE_FILEID:
-            f.write('%s: %s\n' % (DICT_TYPE_FILEID, self._metadata))
+        write_header(f, self._dict_type, self._metadata)
+
+
+def write_header(f, dict_type, metadata):
+    """Write the header of a corpus with the given dictionary type and
+    metadata to f, a file-like object."""
+    if dict_type == DICT_TYPE_NATURAL:
+        f.write('%s:\n' % DICT_TYPE_NATURAL)
+    elif dict_type == DICT_TYPE_FILETYPE:
+        (name, extensions) = metadata
+        f.write(
+            '%s: %s; %s\n' % (
+                DICT_TYPE_FILETYPE,
+                name,
+                ', '.join(
+                    extensions)))
+    elif dict_type == DICT_TYPE_FILEID:
+        f.write('%s: %s\n' % (DICT_TYPE_FILEID, metadata))
+    else:
+        raise AssertionError('Unknown dict_type "%s".' % dict_type)
+
+
+def _corpus_layers(dicts):
+    """Map the key of each corpus of dicts, a CorporaFile, to the corpus,
+    in the order the corpora are written.  File-type corpora are keyed by
+    name and file-specific corpora by file ID."""
+    layers = collections.OrderedDict()
+    for corpus in dicts.iter_corpora():
+        dict_type = corpus.get_dict_type()
+        if dict_type == DICT_TYPE_FILETYPE:
+            layers[(dict_type, corpus.get_name())] = corpus
         else:
-            raise AssertionError('Unknown dict_type "%s".' % self._dict_type)
+            layers[(dict_type, corpus.get_metadata())] = corpus
+    return layers
+
+
+def combine_dictionaries(operation, first, second):
+    """Combine the words of two dictionaries, corpus by corpus, with a set
+    operation.
+
+    Natural language corpora are compared by prefix, as they are matched:
+    OP_INTERSECT keeps the words of each which the other accepts, and
+    OP_DIFF drops the words of first which second accepts.  Other corpora
+    are compared exactly.
+
+    :param operation: OP_UNION, OP_INTERSECT or OP_DIFF
+    :param first: CorporaFile
+    :param second: CorporaFile
+    :returns: list of (dict_type, metadata, tokens) triples: the natural
+              language corpus, and every other corpus left non-empty
+
+    """
+    first_layers = _corpus_layers(first)
+    second_layers = _corpus_layers(second)
+    keys = list(first_layers)
+    if operation == OP_UNION:
+        keys.extend(k for k in second_layers if k not in first_layers)
+        # Keep the order in which corpora are written
+        order = [DICT_TYPE_FILETYPE, DICT_TYPE_FILEID, DICT_TYPE_NATURAL]
+        keys.sort(key=lambda k: order.index(k[0]))
+
+    result = []
+    used_extensions = set()
+    for key in keys:
+        (dict_type, metadata) = key
+        prefix = dict_type == DICT_TYPE_NATURAL
+        mine = first_layers.get(key)
+        theirs = second_layers.get(key)
+        tokens = mine.tokens() if mine is not None else []
+        other_tokens = theirs.tokens() if theirs is not None else []
+        if operation == OP_UNION:
+            tokens = union(tokens, other_tokens)
+        elif operation == OP_INTERSECT:
+            tokens = intersection(tokens, other_tokens, prefix)
+        elif operation == OP_DIFF:
+            tokens = difference(tokens, other_tokens, prefix)
+        else:
+            raise ValueError("Unknown dictionary operation '{}'"
+                             .format(operation))
+        if not tokens and not prefix:
+            continue
+
+        if dict_type == DICT_TYPE_FILETYPE:
+            # The result keeps the extensions of the corpora its words
+            # came from, each associated with one file type only.
+            sources = [mine, theirs] if operation == OP_UNION else [mine]
+            extensions = []
+            for corpus in sources:
+                if corpus is None:
+                    continue
+                for ext in corpus.get_extensions():
+                    if ext in extensions:
+                        continue
+                    if ext in used_extensions:
+                        _util.mutter(
+                            _util.VERBOSITY_NORMAL,
+                            "Dropping extension '{}' from file type '{}': "
+                            'it belongs to another file type'.format(
+                                ext, metadata))
+                        continue
+                    used_extensions.add(ext)
+                    extensions.append(ext)
+            metadata = (metadata, extensions)
+        result.append((dict_type, metadata, tokens))
+    return result
+
+
+def write_corpora(f, corpora):
+    """Write corpora, (dict_type, metadata, tokens) triples as returned by
+    combine_dictionaries(), to f, a file-like object, in the text
+    dictionary format.
+
+    :returns: total number of tokens written
+
+    """
+    count = 0
+    for (dict_type, metadata, tokens) in corpora:
+        write_header(f, dict_type, metadata)
+        for token in tokens:
+            f.write(token + '\n')
+        f.write('\n')
+        count += len(tokens)
+    return count
 
 
 class ExactMatchCorpus(Corpus):
@@ -140,10 +319,33 @@ class ExactMatchCorpus(Corpus):
         """Return True if the token is present in this Corpus."""
         return token in self._tokens
 
+    def match_many(self, tokens):
+        return self._tokens.intersection(tokens)
+
     def add(self, token):
         """Add the specified token to this Corpus."""
         if token not in self._tokens:
             self._tokens.add(token)
+            self._index_added(token)
+            self._mark_dirty()
+
+    def add_many(self, tokens):
+        new_tokens = set(tokens).difference(self._tokens)
+        if new_tokens:
+            self._tokens.update(new_tokens)
+            for token in new_tokens:
+                self._index_added(token)
+            self._mark_dirty()
+        return len(new_tokens)
+
+    def tokens(self):
+        return sorted(self._tokens)
+
+    def discard(self, tokens):
+        remaining = self._tokens.difference(tokens)
+        if len(remaining) < len(self._tokens):
+            self._tokens = remaining
+            self._deletion_index = None
             self._mark_dirty()
 
     def write(self, f):
@@ -165,6 +367,7 @@ class PrefixMatchCorpus(Corpus):
         specified dictionary type and associated metadata."""
         Corpus.__init__(self, dict_type, metadata)
         self._tokens = sorted(tokens)
+        self._sorted_words = None   # Built on first call to match_many()
 
     def match(self, token):
         """Return True if the token is a prefix of an item in this Corpus."""
@@ -174,12 +377,59 @@ class PrefixMatchCorpus(Corpus):
         else:
             return False
 
+    def match_many(self, tokens):
+        """Find the tokens which are a prefix of an item in this Corpus.
+
+        With NumPy installed, the tokens are searched for together (see
+        _vectorized.SortedWords).
+
+        :returns: set of those of the tokens which match
+
+        """
+        if not _vectorized.available():
+            return Corpus.match_many(self, tokens)
+        if self._sorted_words is None:
+            self._sorted_words = _vectorized.SortedWords(self._tokens)
+        return self._sorted_words.prefix_matches(tokens)
+
     def add(self, token):
         """Add the specified token to this Corpus."""
         insertion_point = bisect_left(self._tokens, token)
         if (insertion_point >= len(self._tokens) or
                 self._tokens[insertion_point] != token):
             self._tokens.insert(insertion_point, token)
+            self._sorted_words = None
+            self._index_added(token)
+            self._mark_dirty()
+
+    def add_many(self, tokens):
+        """Add the tokens to this Corpus in a single merge, rather than
+        inserting them into the sorted list one at a time."""
+        new_tokens = [t for t in sorted(set(tokens))
+                      if not self._contains(t)]
+        if new_tokens:
+            self._tokens = list(heapq.merge(self._tokens, new_tokens))
+            self._sorted_words = None
+            for token in new_tokens:
+                self._index_added(token)
+            self._mark_dirty()
+        return len(new_tokens)
+
+    def _contains(self, token):
+        insertion_point = bisect_left(self._tokens, token)
+        return (insertion_point < len(self._tokens) and
+                self._tokens[insertion_point] == token)
+
+    def tokens(self):
+        return self._tokens
+
+    def discard(self, tokens):
+        tokens = set(tokens)
+        remaining = [t for t in self._tokens if t not in tokens]
+        if len(remaining) < len(self._tokens):
+            self._tokens = remaining
+            self._sorted_words = None
+            self._deletion_index = None
             self._mark_dirty()
 
     def write(self, f):
@@ -191,12 +441,173 @@ class PrefixMatchCorpus(Corpus):
         self._mark_clean()
 
 
+class DatabaseCorpus(Corpus):
+
+    """A corpus kept in a dictionary database.
+
+    Tokens are looked up in the database as needed rather than loaded.  The
+    corpus is only created in the database once a token is added to it.
+    Natural language corpora match prefixes, as PrefixMatchCorpus does;
+    other corpora match exactly, as ExactMatchCorpus does.
+
+    """
+
+    def __init__(self, database, dict_type, metadata, corpus_id=None):
+        Corpus.__init__(self, dict_type, metadata)
+        self._database = database
+        self._corpus_id = corpus_id
+        self._prefix_match = dict_type == DICT_TYPE_NATURAL
+        self._matches = {}      # token -> match result, for repeated tokens
+
+    def _get_name(self):
+        if self._dict_type == DICT_TYPE_FILETYPE:
+            return self.get_name()
+        return self._metadata or ''
+
+    def _get_corpus_id(self):
+        if self._corpus_id is None:
+            self._corpus_id = self._database.ensure_corpus(self._dict_type,
+                                                           self._get_name())
+        return self._corpus_id
+
+    def match(self, token):
+        if self._corpus_id is None:
+            return False
+        try:
+            return self._matches[token]
+        except KeyError:
+            pass
+        if self._prefix_match:
+            result = self._database.has_prefix(self._corpus_id, token)
+        else:
+            result = self._database.has_word(self._corpus_id, token)
+        self._matches[token] = result
+        return result
+
+    def add(self, token):
+        self.add_many([token])
+
+    def add_many(self, tokens):
+        tokens = list(tokens)
+        # Creates the corpus even if there are no tokens
+        added = self._database.add_words(self._get_corpus_id(), tokens)
+        if added:
+            self._matches.clear()
+            for token in tokens:
+                self._index_added(token)
+            self._mark_dirty()
+        return added
+
+    def tokens(self):
+        if self._corpus_id is None:
+            return []
+        return self._database.words(self._corpus_id)
+
+    def discard(self, tokens):
+        if self._corpus_id is None:
+            return
+        if self._database.remove_words(self._corpus_id, tokens):
+            self._matches.clear()
+            self._deletion_index = None
+            self._mark_dirty()
+
+    def save_extensions(self):
+        """Record the extensions of a file-type corpus in the database."""
+        self._database.add_extensions(self._get_corpus_id(),
+                                      self.get_extensions())
+
+    def delete(self):
+        """Remove this corpus from the database."""
+        if self._corpus_id is not None:
+            self._database.delete_corpus(self._corpus_id)
+            self._corpus_id = None
+        self._matches.clear()
+
+    def write(self, f):
+        self._write_header(f)
+        for token in self.tokens():
+            f.write(token + '\n')
+        f.write('\n')
+        self._mark_clean()
+
+
+class AdditionBatch(object):
+
+    """Collects tokens to add to the corpora of a CorporaFile, and adds them
+    all at once, with one add_many() call per corpus.
+
+    Used as a context manager, the tokens are added on leaving the block
+    unless it raised an exception.
+
+    """
+
+    def __init__(self, dicts):
+        self._dicts = dicts
+        self._natural = []
+        self._by_extension = {}     # corpus -> list of tokens
+        self._by_file_id = {}       # file ID -> list of tokens
+
+    def add_natural(self, token):
+        """Add the token to the natural language corpus."""
+        self._natural.append(token)
+
+    def add_by_extension(self, token, extension):
+        """Add the token to the file-type corpus associated with extension.
+
+        :returns: False if there is no such corpus
+
+        """
+        try:
+            corpus = self._dicts._extensions[extension]
+        except KeyError:
+            return False
+        self._by_extension.setdefault(corpus, []).append(token)
+        return True
+
+    def add_by_file_id(self, token, file_id):
+        """Add the token to the corpus for file_id, creating it if need
+        be."""
+        self._by_file_id.setdefault(file_id, []).append(token)
+
+    def apply(self):
+        """Add the collected tokens.
+
+        :returns: number of tokens which were not already present
+
+        """
+        added = 0
+        if self._natural:
+            added += self._dicts._natural_dict.add_many(self._natural)
+        for (corpus, tokens) in self._by_extension.items():
+            added += corpus.add_many(tokens)
+        for (file_id, tokens) in self._by_file_id.items():
+            added += self._dicts._get_or_create_file_id_corpus(
+                file_id).add_many(tokens)
+        self._natural = []
+        self._by_extension = {}
+        self._by_file_id = {}
+        return added
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if exc_type is None:
+            self.apply()
+        return False
+
+
 class CorporaFile(object):
 
     """The CorporaFile manages a single file containing multiple corpora.
 
     May include filename<->file ID mapping file too.
 
+    The file is either a text file, which is read in full on opening and
+    rewritten in full on closing if anything changed, or a dictionary
+    database (see _dictdb), whose file-specific corpora are only fetched
+    when they are used and whose words are written as they are added.
+
     """
 
     def __init__(self, filename, base_dicts, relative_to):
@@ -228,62 +639,36 @@ class CorporaFile(object):
         self._relative_to = None
         if relative_to is not None:
             self._relative_to = os.path.normcase(os.path.realpath(relative_to))
-        self._file_id_mapping = {}
-        self._file_id_mapping_is_dirty = False
-        # mapping of file ID -> list-of-filenames for file IDs not
-        # stored in the source files.
-        self._reverse_file_id_mapping = {}
-        # Reverse map of the above, individual filename -> file ID
-
-        try:
-            with _util.open_with_encoding(filename, mode='r') as f:
-                lines = [line.strip(' \r\n') for line in f.readlines()]
-            self._parse(lines)
-        except IOError as e:
-            print(
-                'Warning: unable to read dictionary file '
-                "'{}' (reason: {})".format(filename, e),
-                file=sys.stderr)
-        except ParsingError as e:
-            raise SystemExit(
-                "Error while parsing dictionary file '{}': {}".format(
-                    filename, e))
+        self._file_id_map = JsonFileIdMap()
+        # filename -> file ID mapping for file IDs not stored in the
+        # source files
+
+        self._database = None
+        if is_dictionary_database(filename):
+            self._database = DictionaryDatabase(filename)
+            self._load_database()
+        else:
+            try:
+                with _util.open_with_encoding(filename, mode='r') as f:
+                    lines = [line.strip(' \r\n') for line in f.readlines()]
+                self._parse(lines)
+            except IOError as e:
+                print(
+                    'Warning: unable to read dictionary file '
+                    "'{}' (reason: {})".format(filename, e),
+                    file=sys.stderr)
+            except ParsingError as e:
+                raise SystemExit(
+                    "Error while parsing dictionary file '{}': {}".format(
+                        filename, e))
 
         if self._natural_dict is None:
             print('Continuing with empty natural dictionary\n',
                   file=sys.stderr)
             self._natural_dict = PrefixMatchCorpus(DICT_TYPE_NATURAL, '', [])
 
-        if not self._relative_to:
-            return
-        mapping_file = self._filename + '.fileids.json'
-        try:
-            with io.open(mapping_file, mode='r', encoding='utf-8') as mf:
-                try:
-                    self._file_id_mapping = json.load(mf)
-                    _util.mutter(_util.VERBOSITY_DEBUG,
-                                 'got file ID mapping:\n{0}'
-                                 .format(self._file_id_mapping))
-                except ValueError as e:
-                    # Error during file creation might leave an empty file
-                    # here.  Not necessarily fatal, but report it.
-                    _util.mutter(_util.VERBOSITY_NORMAL,
-                                 "Couldn't load file ID mapping from {0}: {1}"
-                                 .format(mapping_file, e))
-        except IOError as e:
-            if e.errno == errno.ENOENT:
-                _util.mutter(_util.VERBOSITY_DEBUG,
-                             'No file ID mappings file {0}'.format(
-                                 mapping_file))
-            else:
-                raise SystemExit(
-                    "Can't read file ID mappings file {0}: {1}: {2}".format(
-                        mapping_file, e.errno, e.strerror))
-
-        # Build reverse map
-        for k, v in self._file_id_mapping.items():
-            for f in v:
-                self._reverse_file_id_mapping[f] = k
+        if self._relative_to:
+            self._file_id_map = open_file_id_map(self._filename)
 
     def match(self, token, filename, file_id,
               match_in=MATCH_NATURAL | MATCH_FILETYPE | MATCH_FILEID):
@@ -321,15 +706,15 @@ class CorporaFile(object):
                     ext)
 
         if match_in & MATCH_FILEID and file_id is not None:
-            try:
-                corpus = self._file_ids[file_id]
+            corpus = self._get_file_id_corpus(file_id)
+            if corpus is not None:
                 _util.mutter(
                     _util.VERBOSITY_DEBUG,
                     '(Matching against file-id "%s".)' %
                     file_id)
                 if corpus.match(token):
                     return True
-            except KeyError:
+            else:
                 _util.mutter(
                     _util.VERBOSITY_DEBUG,
                     '(No file-id match for "%s".)' %
@@ -337,6 +722,80 @@ class CorporaFile(object):
 
         return False
 
+    def match_many(self, tokens, filename, file_id,
+                   match_in=MATCH_NATURAL | MATCH_FILETYPE | MATCH_FILEID):
+        """Find the tokens which match any of the applicable corpora.
+
+        The result is the same as calling match() for each token, but each
+        corpus is searched for all of the tokens not yet matched at once
+        (see Corpus.match_many()).
+
+        :param tokens: collection of strings being matched
+        :param filename: name of file containing the tokens
+        :param file_id: unique identifier for current file
+        :type  file_id: string or None
+        :param match_in: Limit the corpora we search
+        :returns: set of those of the tokens which match a dictionary
+
+        """
+        corpora = []
+        if match_in & MATCH_NATURAL:
+            corpora.append(self._natural_dict)
+        if match_in & MATCH_FILETYPE:
+            (_, ext) = os.path.splitext(filename.lower())
+            if ext in self._extensions:
+                corpora.append(self._extensions[ext])
+        if match_in & MATCH_FILEID and file_id is not None:
+            corpus = self._get_file_id_corpus(file_id)
+            if corpus is not None:
+                corpora.append(corpus)
+
+        remaining = set(tokens)
+        matched = set()
+        for bc in self._base_corpora_files:
+            found = bc.match_many(remaining, filename, file_id, match_in)
+            matched.update(found)
+            remaining.difference_update(found)
+        for corpus in corpora:
+            if not remaining:
+                break
+            found = corpus.match_many(remaining)
+            matched.update(found)
+            remaining.difference_update(found)
+        return matched
+
+    def _suggestion_corpora(self, extension):
+        """Yield the corpora consulted for suggestions: the natural language
+        corpus and the file-type corpus for extension, of this file and of
+        every base dictionary."""
+        for bc in self._base_corpora_files:
+            for corpus in bc._suggestion_corpora(extension):
+                yield corpus
+        yield self._natural_dict
+        if extension in self._extensions:
+            yield self._extensions[extension]
+
+    def suggest(self, token, filename, limit=DEFAULT_LIMIT,
+                max_distance=DEFAULT_MAX_DISTANCE):
+        """Suggest corrections for a token which failed to match.
+
+        :param token: string which failed to match
+        :param filename: name of file containing token
+        :param limit: maximum number of suggestions
+        :returns: list of up to limit words, closest first
+
+        """
+        (_, ext) = os.path.splitext(filename.lower())
+        distances = {}
+        for corpus in self._suggestion_corpora(ext):
+            for (distance, word) in corpus.suggest(token, max_distance):
+                if distance < distances.get(word, max_distance + 1):
+                    distances[word] = distance
+        ranked = sorted(distances,
+                        key=lambda w: (distances[w], abs(len(w) - len(token)),
+                                       w))
+        return ranked[:limit]
+
     def token_is_in_base_dict(self, token, filename, file_id,
                               match_in=MATCH_NATURAL | MATCH_FILETYPE |
                               MATCH_FILEID):
@@ -344,39 +803,61 @@ class CorporaFile(object):
             if bc.match(token, filename, file_id, match_in):
                 return True
 
+    def _base_natural_tokens(self):
+        """Get the words of the natural language corpora of every base
+        dictionary, sorted."""
+        tokens = []
+        for bc in self._base_corpora_files:
+            tokens = union(tokens, bc._base_natural_tokens())
+            tokens = union(tokens, bc._natural_dict.tokens())
+        return tokens
+
+    def _base_filetype_tokens(self, extension):
+        """Get the words of the file-type corpora for extension of every
+        base dictionary, sorted."""
+        tokens = []
+        for bc in self._base_corpora_files:
+            tokens = union(tokens, bc._base_filetype_tokens(extension))
+            if extension in bc._extensions:
+                tokens = union(tokens, bc._extensions[extension].tokens())
+        return tokens
+
     def filter_out_base_dicts(self):
-        # For each of our corpora, for each word, if that word is in a
-        # base dict, remove it from the corpora.
+        # For each of our corpora, remove the words which are in a base
+        # dict.
         #
-        # Only remove it when the base dict match was at least as
+        # Only remove a word when the base dict match was at least as
         # general as the corpora we're processing.  E.g., only remove
         # from our natural_dict when the word was in the natural_dict
         # of some base_dict; not if it was in a filetype or file ID dict.
         # Similarly, only remove from our filetype dict if the word was
         # in a natural_dict or the filetype dict with the same extension.
-        new_tokens = []
-        for t in self._natural_dict._tokens:
-            if self.token_is_in_base_dict(t, None, None, MATCH_NATURAL):
-                # Going to change the dict, so mark it dirty
-                self._natural_dict._mark_dirty()
-            else:
-                new_tokens.append(t)
-        self._natural_dict._tokens = new_tokens
+        #
+        # Each corpus is compared with the base words as a merge of two
+        # sorted lists, rather than by looking up each word in turn.
+        base_natural = self._base_natural_tokens()
+        self._natural_dict.discard(
+            list(accepted_by(self._natural_dict.tokens(), base_natural)))
 
         for ext in self._extensions:
-            # Generate a fake file name to use to query the base dicts.
-            # Since we aren't using MATCH_FILEID, the basename won't be
-            # used, only the extension.
-            fake_filename = 'fake.' + ext
             file_type_corp = self._extensions[ext]
-            new_tokens = []
-            for t in file_type_corp._tokens:
-                if self.token_is_in_base_dict(t, fake_filename, None,
-                                              MATCH_NATURAL | MATCH_FILETYPE):
-                    file_type_corp._mark_dirty()
-                else:
-                    new_tokens.append(t)
-            file_type_corp._tokens = new_tokens
+            tokens = file_type_corp.tokens()
+            file_type_corp.discard(
+                list(accepted_by(tokens, base_natural)) +
+                intersection(tokens, self._base_filetype_tokens(ext)))
+
+    def compact(self, dry_run=False):
+        """Remove the words of the natural language corpus which it accepts
+        anyway, because they are a prefix of another of its words.
+
+        :param dry_run: if True, only find the words
+        :returns: sorted list of the redundant words
+
+        """
+        redundant = list(redundant_prefixes(self._natural_dict.tokens()))
+        if not dry_run:
+            self._natural_dict.discard(redundant)
+        return redundant
 
     def add_natural(self, token):
         """Add the token to the natural language corpus."""
@@ -412,22 +893,99 @@ class CorporaFile(object):
         created.
 
         """
-        try:
-            corpus = self._file_ids[file_id]
+        self._get_or_create_file_id_corpus(file_id).add(token)
+
+    def batch(self):
+        """Start collecting tokens to add all at once.
+
+        :rtype: AdditionBatch
+
+        """
+        return AdditionBatch(self)
+
+    def _get_or_create_file_id_corpus(self, file_id):
+        """Get the corpus for file_id, creating an empty one if there isn't
+        one."""
+        corpus = self._get_file_id_corpus(file_id)
+        if corpus is not None:
             _util.mutter(
                 _util.VERBOSITY_DEBUG,
                 '(Adding to file-id "%s".)' %
                 file_id)
-            corpus.add(token)
-        except KeyError:
+        else:
             _util.mutter(
                 _util.VERBOSITY_DEBUG,
                 '(No file-id match for "%s"; creating new.)' %
                 file_id)
-            corpus = ExactMatchCorpus(DICT_TYPE_FILEID, file_id, [])
+            corpus = self._new_corpus(DICT_TYPE_FILEID, file_id)
             self._file_id_dicts.append(corpus)
             self._file_ids[file_id] = corpus
-            corpus.add(token)
+        return corpus
+
+    def import_corpora(self, other):
+        """Add the words of every corpus in other, another CorporaFile, to the
+        matching corpus of this one, creating corpora as needed.
+
+        File-type corpora match by name; their extensions are added unless
+        already associated with another file type.
+
+        """
+        self._natural_dict.add_many(other._natural_dict.tokens())
+        for source in other._filetype_dicts:
+            name = source.get_name()
+            extensions = [ext for ext in source.get_extensions()
+                          if ext not in self._extensions]
+            if name in self.get_filetypes():
+                for ext in extensions:
+                    self.register_extension(ext, name)
+            else:
+                self.new_filetype(name, extensions)
+            corpus = [c for c in self._filetype_dicts
+                      if c.get_name() == name][0]
+            corpus.add_many(source.tokens())
+            if self._database is not None:
+                corpus.save_extensions()
+        for source in other.iter_file_id_corpora():
+            self._get_or_create_file_id_corpus(source._metadata).add_many(
+                source.tokens())
+
+    def iter_file_id_corpora(self):
+        """Yield every file-specific corpus, fetching any not used so
+        far."""
+        if self._database is not None:
+            for (_, _, file_id, _) in self._database.corpora(
+                    [DICT_TYPE_FILEID]):
+                self._get_file_id_corpus(file_id)
+        for corpus in self._file_id_dicts:
+            yield corpus
+
+    def _new_corpus(self, dict_type, metadata):
+        """Create an empty corpus of the kind this file holds."""
+        if self._database is not None:
+            return DatabaseCorpus(self._database, dict_type, metadata)
+        if dict_type == DICT_TYPE_NATURAL:
+            return PrefixMatchCorpus(dict_type, metadata, [])
+        return ExactMatchCorpus(dict_type, metadata, [])
+
+    def _get_file_id_corpus(self, file_id):
+        """Get the corpus for file_id, or None if there isn't one."""
+        corpus = self._file_ids.get(file_id)
+        if corpus is None and self._database is not None:
+            corpus_id = self._database.find_corpus(DICT_TYPE_FILEID, file_id)
+            if corpus_id is not None:
+                corpus = DatabaseCorpus(self._database, DICT_TYPE_FILEID,
+                                        file_id, corpus_id)
+                self._file_id_dicts.append(corpus)
+                self._file_ids[file_id] = corpus
+        return corpus
+
+    def _remove_file_id_corpus(self, file_id):
+        """Remove the corpus for file_id."""
+        corpus = self._get_file_id_corpus(file_id)
+        self._file_id_dicts.remove(corpus)
+        del self._file_ids[file_id]
+        if self._database is not None:
+            corpus.delete()
 
     def _make_relative_filename(self, fq_filename):
         """return fq_filename relative to self._relative_to."""
@@ -459,23 +1017,14 @@ class CorporaFile(object):
             raise AssertionError('new_file_and_file_id called without '
                                  '--relative-to')
         rel_filename = self._make_relative_filename(fq_filename)
-        if rel_filename in self._reverse_file_id_mapping:
+        existing_id = self._file_id_map.file_id_of(rel_filename)
+        if existing_id is not None:
             raise AssertionError('{0} already has file_id {1}'.format(
-                rel_filename, self._reverse_file_id_mapping[rel_filename]))
-        self._reverse_file_id_mapping[rel_filename] = file_id
-        if file_id not in self._file_id_mapping:
-            self._file_id_mapping[file_id] = []
-        if rel_filename not in self._file_id_mapping[file_id]:
-            self._file_id_mapping[file_id].append(rel_filename)
-            self._file_id_mapping[file_id] = sorted(
-                self._file_id_mapping[file_id])
-            self._file_id_mapping_is_dirty = True
+                rel_filename, existing_id))
+        self._file_id_map.set(rel_filename, file_id)
 
     def file_id_of_rel_file(self, rel_filename):
-        try:
-            return self._reverse_file_id_mapping[rel_filename]
-        except KeyError:
-            return None
+        return self._file_id_map.file_id_of(rel_filename)
 
     def file_id_of_file(self, fq_filename):
         if self._relative_to is None:
@@ -483,10 +1032,13 @@ class CorporaFile(object):
         rel_filename = self._make_relative_filename(fq_filename)
         return self.file_id_of_rel_file(rel_filename)
 
+    def file_id_mappings(self):
+        """Get every (filename, file ID) pair of the file ID mapping, sorted
+        by filename."""
+        return list(self._file_id_map.items())
+
     def file_id_exists(self, file_id):
-        if file_id in self._file_id_mapping:
-            return True
-        return False
+        return self._file_id_map.has_file_id(file_id)
 
     def merge_file_ids(self, merge_from, merge_to):
         if self.file_id_exists(merge_to):
@@ -516,27 +1068,18 @@ class CorporaFile(object):
                          id_from=id_from, id_to=id_to))
 
         # merge wordlists
-        from_corpus = self._file_ids[id_from]
-        to_corpus = self._file_ids[id_to]
-        for t in from_corpus._tokens:
-            to_corpus.add(t)
-        del self._file_ids[id_from]
-        self._file_id_dicts.remove(from_corpus)
+        from_corpus = self._get_file_id_corpus(id_from)
+        to_corpus = self._get_file_id_corpus(id_to)
+        to_corpus.add_many(from_corpus.tokens())
+        self._remove_file_id_corpus(id_from)
 
         # Add id_from's files to id_to
-        from_files = self._file_id_mapping[id_from]
-        to_files = self._file_id_mapping[id_to]
-        for f in from_files:
-            to_files.append(f)
-            self._reverse_file_id_mapping[f] = id_to
-        self._file_id_mapping[id_to] = sorted(to_files)
-        self._file_id_mapping_is_dirty = True
+        self._file_id_map.reassign(id_from, id_to)
 
     def delete_file(self, filename):
         rel_filename = self._fn_to_rel(filename)
-        try:
-            id = self._reverse_file_id_mapping[rel_filename]
-        except KeyError:
+        id = self._file_id_map.file_id_of(rel_filename)
+        if id is None:
             if filename == rel_filename:
                 report_str = filename
             else:
@@ -547,73 +1090,72 @@ class CorporaFile(object):
         _util.mutter(_util.VERBOSITY_NORMAL,
                      'Removing {0} <-> {1} mappings'.format(
                          filename, id))
-        del self._reverse_file_id_mapping[rel_filename]
-        fns = self._file_id_mapping[id]
-        fns.remove(rel_filename)
-        if len(fns) == 0:
-            # No remaining files use this file ID.  Remove all trace of it.
-            del self._file_id_mapping[id]
-
-            # remove file ID-private dictionary from corpus.
-            corpus = self._file_ids[id]
-            self._file_id_dicts.remove(corpus)
-            del self._file_ids[id]
-        self._file_id_mapping_is_dirty = True
+        self._file_id_map.remove(rel_filename)
+        if not self._file_id_map.has_file_id(id):
+            # No remaining files use this file ID.  Remove all trace of it,
+            # including the file ID-private dictionary.
+            self._remove_file_id_corpus(id)
 
     def copy_file(self, copy_from, copy_to):
         from_rel = self._fn_to_rel(copy_from)
         to_rel = self._fn_to_rel(copy_to)
-        if from_rel not in self._reverse_file_id_mapping:
+        id_from = self._file_id_map.file_id_of(from_rel)
+        if id_from is None:
             _util.mutter(_util.VERBOSITY_NORMAL,
                          'No file ID for ' + copy_from)
             return
 
-        if to_rel in self._reverse_file_id_mapping:
+        if self._file_id_map.file_id_of(to_rel) is not None:
             self.delete_file(to_rel)
 
-        id_from = self._reverse_file_id_mapping[from_rel]
-
         _util.mutter(_util.VERBOSITY_NORMAL,
                      'Setting {0} to use {1}\'s file ID {2}.'.format(
                          to_rel, from_rel, id_from))
 
-        fns = self._file_id_mapping[id_from]
-        fns.append(to_rel)
-        self._file_id_mapping[id_from] = sorted(fns)
-
-        self._reverse_file_id_mapping[to_rel] = id_from
-        self._file_id_mapping_is_dirty = True
+        self._file_id_map.set(to_rel, id_from)
 
     def rename_file(self, rename_from, rename_to):
         from_rel = self._fn_to_rel(rename_from)
         to_rel = self._fn_to_rel(rename_to)
-        if from_rel not in self._reverse_file_id_mapping:
+        id_from = self._file_id_map.file_id_of(from_rel)
+        if id_from is None:
             _util.mutter(_util.VERBOSITY_NORMAL,
                          'No file ID for ' + rename_from)
             return
 
-        if to_rel in self._reverse_file_id_mapping:
+        if self._file_id_map.file_id_of(to_rel) is not None:
             self.delete_file(to_rel)
 
-        id_from = self._reverse_file_id_mapping[from_rel]
-
         _util.mutter(_util.VERBOSITY_NORMAL,
                      'Switching file ID {0} from {1} to {2}'.format(
                          id_from, from_rel, to_rel))
 
-        fns = self._file_id_mapping[id_from]
-        fns.remove(from_rel)
-        fns.append(to_rel)
-        self._file_id_mapping[id_from] = sorted(fns)
-
-        self._reverse_file_id_mapping[to_rel] = id_from
-        del self._reverse_file_id_mapping[from_rel]
-        self._file_id_mapping_is_dirty = True
+        self._file_id_map.remove(from_rel)
+        self._file_id_map.set(to_rel, id_from)
 
     def get_filetypes(self):
         """Get a list of file types with type-specific corpora."""
         return [corpus.get_name() for corpus in self._filetype_dicts]
 
+    def has_extension(self, extension):
+        """Return True if a file-type corpus of this file, rather than of
+        a base dictionary, is associated with the extension."""
+        return extension in self._extensions
+
+    def get_filetype_of_extension(self, extension):
+        """Get the name of the file type associated with the extension, in
+        this file or else in a base dictionary, or None if the extension is
+        not registered."""
+        try:
+            return self._extensions[extension].get_name()
+        except KeyError:
+            pass
+        for bc in self._base_corpora_files:
+            name = bc.get_filetype_of_extension(extension)
+            if name is not None:
+                return name
+        return None
+
     def new_filetype(self, type_descr, extensions):
         """Add a new file-type corpus with the given description, associated
         with the given set of extensions."""
@@ -621,11 +1163,10 @@ class CorporaFile(object):
         for ext in extensions:
             assert ext not in self._extensions
 
-        corpus = ExactMatchCorpus(
+        corpus = self._new_corpus(
             DICT_TYPE_FILETYPE,
             (type_descr,
-             extensions),
-            [])
+             extensions))
         self._filetype_dicts.append(corpus)
         for ext in extensions:
             self._extensions[ext] = corpus
@@ -650,59 +1191,44 @@ class CorporaFile(object):
             dirty = dirty or corpus.is_dirty()
         for corpus in self._file_id_dicts:
             dirty = dirty or corpus.is_dirty()
-        dirty = dirty or self._file_id_mapping_is_dirty
+        dirty = dirty or self._file_id_map.is_dirty()
         return dirty
 
+    def iter_corpora(self):
+        """Yield every corpus, in the order they are written: file types,
+        then file-specific corpora, then natural language."""
+        for corpus in self._filetype_dicts:
+            yield corpus
+        for corpus in self.iter_file_id_corpora():
+            yield corpus
+        # Natural language dict goes at the end for readability...
+        # it is typically much bigger than the other dictionaries
+        yield self._natural_dict
+
+    def write_text(self, f):
+        """Write all of the corpora to f, a file-like object, in the text
+        dictionary format."""
+        for corpus in self.iter_corpora():
+            corpus.write(f)
+
     def close(self):
         """Update the corpus file iff the contents were modified."""
-        if self.is_dirty():
+        if self._database is not None:
+            if self.is_dirty():
+                # Words were written as they were added, but extensions
+                # registered this session are only kept along with them.
+                for corpus in self._filetype_dicts:
+                    corpus.save_extensions()
+            self._database.close()
+        elif self.is_dirty():
             try:
                 with _util.open_with_encoding(self._filename, mode='w') as f:
-                    for corpus in self._filetype_dicts:
-                        corpus.write(f)
-                    for corpus in self._file_id_dicts:
-                        corpus.write(f)
-                    # Natural language dict goes at the end for readability...
-                    # it is typically much bigger than the other dictionaries
-                    self._natural_dict.write(f)
+                    self.write_text(f)
             except IOError as e:
                 print("Warning: unable to write dictionary file '{}' "
                       '(reason: {})'.format(self._filename, e))
 
-        if self._file_id_mapping_is_dirty:
-            if self._relative_to is None:
-                raise AssertionError('file ID mapping is dirty but ' +
-                                     'relative_to is None')
-
-            # Build an OrderedDict sorted by first filename of id, so the
-            # mapping file is more reader-friendly.  It will also be
-            # more stable, so it will result in less churn if it's checked
-            # into git.
-            od = OrderedDict()
-            copied_ids = set({})
-            sorted_filenames = sorted(self._reverse_file_id_mapping)
-            for fn in sorted_filenames:
-                id = self._reverse_file_id_mapping[fn]
-                if id in copied_ids:
-                    continue
-                copied_ids.add(id)
-                od[id] = sorted(self._file_id_mapping[id])
-
-            mapping_file = self._filename + '.fileids.json'
-            try:
-                with io.open(mapping_file, mode='w', encoding='utf-8') as mf:
-                    # http://stackoverflow.com/questions/36003023/json-dump-failing-with-must-be-unicode-not-str-typeerror
-                    json_str = json.dumps(od, ensure_ascii=False,
-                                          indent=2, separators=(',', ': '))
-                    if isinstance(json_str, str):
-                        # Apply py2 workaround only on py2
-                        if sys.version_info[0] == 2:
-                            json_str = json_str.decode('utf-8')
-                    mf.write(json_str)
-                self._file_id_mapping_is_dirty = False
-            except IOError as e:
-                print("Warning: unable to write file ID mapping file '{0}' "
-                      '(reason: {1})'.format(mapping_file, e))
+        self._file_id_map.close()
 
         # Since we add words only to this, not to any base corpora
         # file, there's nothing to do for the base files now.  But it
@@ -714,6 +1240,24 @@ class CorporaFile(object):
                 raise AssertionError('_base_corpora_file is dirty')
             bc.close()
 
+    def _load_database(self):
+        """Set up the natural language and file-type corpora from the
+        database.  File-specific corpora are fetched as they are needed."""
+        for (corpus_id, dict_type, name, extensions) in self._database.corpora(
+                [DICT_TYPE_NATURAL, DICT_TYPE_FILETYPE]):
+            if dict_type == DICT_TYPE_NATURAL:
+                self._natural_dict = DatabaseCorpus(
+                    self._database, dict_type, None, corpus_id)
+            else:
+                corpus = DatabaseCorpus(self._database, dict_type,
+                                        (name, extensions), corpus_id)
+                self._filetype_dicts.append(corpus)
+                for ext in extensions:
+                    self._extensions[ext] = corpus
+        if self._natural_dict is None:
+            self._natural_dict = DatabaseCorpus(self._database,
+                                                DICT_TYPE_NATURAL, None)
+
     def _parse(self, lines):
         """Parse the lines into a set of corpora."""
         offset = 0
@@ -863,6 +1407,85 @@ class CorporaFile(object):
         return False
 
 
+class BackgroundCorporaFile(object):
+
+    """A CorporaFile which is loaded on another thread.
+
+    Loading starts on construction, so that it overlaps with whatever the
+    caller does next, such as finding and reading the first source files.
+    Any attribute lookup, such as the first call to match(), waits for the
+    load to finish and is then passed on to the loaded CorporaFile; methods
+    are bound to it directly from then on.  An
+    error while loading is raised by that first lookup, or by close() if
+    the dictionaries were never used.
+
+    """
+
+    def __init__(self, filename, base_dicts, relative_to, extensions=()):
+        """Start loading as for CorporaFile(filename, base_dicts,
+        relative_to), then register the (extension, type_descr) pairs of
+        extensions."""
+        self._dicts = None
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._load,
+            args=(filename, base_dicts, relative_to, extensions))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _load(self, filename, base_dicts, relative_to, extensions):
+        try:
+            dicts = CorporaFile(filename, base_dicts, relative_to)
+            for extension in extensions:
+                dicts.register_extension(*extension)
+            self._dicts = dicts
+        except BaseException as e:
+            # Including SystemExit for a dictionary which can't be parsed
+            self._error = e
+
+    def wait(self):
+        """Wait for the load to finish.
+
+        :returns: the loaded CorporaFile
+
+        """
+        if self._dicts is None:
+            # Only joined until the load has succeeded: every lookup passes
+            # through here
+            self._thread.join()
+            if self._error is not None:
+                raise self._error
+        return self._dicts
+
+    def __getattr__(self, name):
+        value = getattr(self.wait(), name)
+        if callable(value):
+            # Forward later calls straight to the loaded CorporaFile's method
+            setattr(self, name, value)
+        return value
+
+    def close(self):
+        """Close the CorporaFile, once loaded.
+
+        :raises: the error from loading, if it failed
+
+        """
+        self.wait().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't hide the exception which is already being raised
+            self._thread.join()
+            if self._dicts is not None:
+                self._dicts.close()
+        return False
+
+
 def _read_corpus_tokens(offset, lines):
     """Read the set of tokens for the corpus which begins at the given offset.
 
@@ -870,9 +1493,12 @@ def _read_corpus_tokens(offset, lines):
 
     """
     tokens = []
-    for i, line in enumerate(lines[offset + 1:]):
+    # Index rather than slice lines, which would copy the rest of the file
+    # for every corpus
+    for i in range(offset + 1, len(lines)):
+        line = lines[i]
         if ':' in line:
-            return (offset + i + 1, tokens)
+            return (i, tokens)
         elif line != '':
             tokens.append(line)
     return (len(lines), tokens)
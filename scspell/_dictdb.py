@@ -0,0 +1,254 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+
+"""Storage for dictionaries in an SQLite database.
+
+A text dictionary is parsed in full at the start of every run and written
+out in full whenever a word is added.  A dictionary database holds the same
+corpora, but words are looked up through the database's indexes and added
+in transactions, so neither depends on the size of the dictionary.  Any
+number of processes may read the database while one writes to it.
+
+A dictionary file is taken to be a database if it starts with the SQLite
+file header, or if it doesn't exist yet and its name ends in ``.sqlite``.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import contextlib
+import os
+import threading
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+
+DATABASE_SUFFIX = '.sqlite'
+
+_SQLITE_HEADER = b'SQLite format 3\x00'
+
+# Seconds to wait for another process to finish writing
+BUSY_TIMEOUT = 30
+
+_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS corpora (
+           id INTEGER PRIMARY KEY,
+           dict_type TEXT NOT NULL,
+           name TEXT NOT NULL,
+           UNIQUE (dict_type, name))''',
+    '''CREATE TABLE IF NOT EXISTS extensions (
+           extension TEXT PRIMARY KEY,
+           corpus_id INTEGER NOT NULL REFERENCES corpora (id),
+           position INTEGER NOT NULL)''',
+    '''CREATE TABLE IF NOT EXISTS words (
+           corpus_id INTEGER NOT NULL REFERENCES corpora (id),
+           word TEXT NOT NULL,
+           PRIMARY KEY (corpus_id, word)) WITHOUT ROWID''',
+]
+
+
+def is_dictionary_database(filename):
+    """Return True if the dictionary file filename is (or, if it doesn't
+    exist, would be) a dictionary database."""
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(_SQLITE_HEADER)) == _SQLITE_HEADER
+    except (IOError, OSError):
+        return (filename.endswith(DATABASE_SUFFIX) and
+                not os.path.exists(filename))
+
+
+class DictionaryDatabase(object):
+
+    """A connection to a dictionary database.
+
+    Corpora are identified by (dictionary type, name), where the name is
+    empty for the natural language corpus, the description for a file-type
+    corpus and the file ID for a file-specific corpus.  Each corpus row has
+    an integer id, which the other methods take.
+
+    Each method runs in a transaction of its own, unless called within
+    ``transaction()``.
+
+    """
+
+    def __init__(self, filename):
+        if sqlite3 is None:
+            raise SystemExit("Can't use dictionary database {0}: the sqlite3 "
+                             'module is not available'.format(filename))
+        self._filename = filename
+        self._lock = threading.RLock()
+        self._transaction_depth = 0     # Nesting of transaction() calls
+        try:
+            self._conn = sqlite3.connect(filename, timeout=BUSY_TIMEOUT,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            try:
+                # Lets readers carry on while a writer commits
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            except sqlite3.OperationalError:
+                pass    # e.g. a read-only file system
+            if not self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'words'"
+            ).fetchone():
+                with self.transaction():
+                    for statement in _SCHEMA:
+                        self._conn.execute(statement)
+        except sqlite3.Error as e:
+            raise SystemExit(
+                "Can't open dictionary database {0}: {1}".format(filename, e))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Run the enclosed statements in a single write transaction."""
+        with self._lock:
+            if self._transaction_depth:
+                self._transaction_depth += 1
+                try:
+                    yield
+                finally:
+                    self._transaction_depth -= 1
+                return
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._transaction_depth = 1
+            try:
+                yield
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            else:
+                self._conn.execute('COMMIT')
+            finally:
+                self._transaction_depth = 0
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def corpora(self, dict_types):
+        """List the corpora of the given dictionary types, in the order they
+        were created.
+
+        :returns: list of (id, dict_type, name, extensions) tuples
+
+        """
+        extensions = {}
+        for (corpus_id, ext) in self._query(
+                'SELECT corpus_id, extension FROM extensions '
+                'ORDER BY corpus_id, position'):
+            extensions.setdefault(corpus_id, []).append(ext)
+        return [(corpus_id, dict_type, name, extensions.get(corpus_id, []))
+                for (corpus_id, dict_type, name) in self._query(
+                    'SELECT id, dict_type, name FROM corpora ORDER BY id')
+                if dict_type in dict_types]
+
+    def find_corpus(self, dict_type, name):
+        """Get the id of a corpus, or None if there is no such corpus."""
+        rows = self._query(
+            'SELECT id FROM corpora WHERE dict_type = ? AND name = ?',
+            (dict_type, name))
+        return rows[0][0] if rows else None
+
+    def ensure_corpus(self, dict_type, name):
+        """Get the id of a corpus, creating it if need be."""
+        with self.transaction():
+            self._conn.execute(
+                'INSERT OR IGNORE INTO corpora (dict_type, name) '
+                'VALUES (?, ?)', (dict_type, name))
+            return self.find_corpus(dict_type, name)
+
+    def delete_corpus(self, corpus_id):
+        """Delete a corpus and all of its words."""
+        with self.transaction():
+            for table in ('words', 'extensions'):
+                self._conn.execute(
+                    'DELETE FROM {0} WHERE corpus_id = ?'.format(table),
+                    (corpus_id,))
+            self._conn.execute('DELETE FROM corpora WHERE id = ?',
+                               (corpus_id,))
+
+    def add_extensions(self, corpus_id, extensions):
+        """Associate extensions with a file-type corpus, after any it has
+        already."""
+        with self.transaction():
+            position = self._conn.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) FROM extensions '
+                'WHERE corpus_id = ?', (corpus_id,)).fetchone()[0]
+            for ext in extensions:
+                if self._conn.execute(
+                        'INSERT OR IGNORE INTO extensions '
+                        '(extension, corpus_id, position) VALUES (?, ?, ?)',
+                        (ext, corpus_id, position)).rowcount:
+                    position += 1
+
+    def has_word(self, corpus_id, word):
+        return bool(self._query(
+            'SELECT 1 FROM words WHERE corpus_id = ? AND word = ?',
+            (corpus_id, word)))
+
+    def has_prefix(self, corpus_id, prefix):
+        """Return True if prefix is a prefix of any word in the corpus."""
+        rows = self._query(
+            'SELECT word FROM words WHERE corpus_id = ? AND word >= ? '
+            'ORDER BY word LIMIT 1', (corpus_id, prefix))
+        return bool(rows) and rows[0][0].startswith(prefix)
+
+    def words(self, corpus_id):
+        """Get the words of a corpus, sorted."""
+        return [word for (word,) in self._query(
+            'SELECT word FROM words WHERE corpus_id = ? ORDER BY word',
+            (corpus_id,))]
+
+    def add_words(self, corpus_id, words):
+        """Add words to a corpus in a single transaction.
+
+        :returns: number of words which were not already present
+
+        """
+        with self.transaction():
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO words (corpus_id, word) VALUES (?, ?)',
+                ((corpus_id, word) for word in words))
+            return self._conn.total_changes - before
+
+    def remove_words(self, corpus_id, words):
+        """Remove words from a corpus in a single transaction.
+
+        :returns: number of words which were present
+
+        """
+        with self.transaction():
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'DELETE FROM words WHERE corpus_id = ? AND word = ?',
+                ((corpus_id, word) for word in words))
+            return self._conn.total_changes - before
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,356 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+
+"""Storage for the mapping between filenames and file IDs.
+
+The mapping is kept next to the dictionary, either as a JSON file
+(``<dictionary>.fileids.json``), which is read whole and rewritten whole
+when it changes, or as an SQLite database (``<dictionary>.fileids.sqlite``),
+which is indexed both ways and updated in place.  The database is used if
+it exists.  The JSON format remains the interchange format: a database can
+be created from a JSON file and exported back to one.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import errno
+import io
+import json
+import os
+import sys
+import threading
+
+from . import _util
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+
+JSON_SUFFIX = '.fileids.json'
+SQLITE_SUFFIX = '.fileids.sqlite'
+
+
+def read_json(f):
+    """Read a JSON file ID mapping.
+
+    :returns: iterator of (filename, file ID) pairs
+    :raises ValueError: if f doesn't hold a valid mapping
+
+    """
+    mapping = json.load(f)
+    if not isinstance(mapping, dict):
+        raise ValueError('expected an object mapping file IDs to filenames')
+    for (file_id, filenames) in mapping.items():
+        for filename in filenames:
+            yield (filename, file_id)
+
+
+def write_json(f, pairs):
+    """Write a JSON file ID mapping.
+
+    The file IDs are ordered by their first filename, so the mapping file
+    is reader-friendly.  It will also be more stable, so it will result in
+    less churn if it's checked into git.
+
+    :param pairs: (filename, file ID) pairs, sorted by filename
+
+    """
+    od = OrderedDict()
+    for (filename, file_id) in pairs:
+        od.setdefault(file_id, []).append(filename)
+    # http://stackoverflow.com/questions/36003023/json-dump-failing-with-must-be-unicode-not-str-typeerror
+    json_str = json.dumps(od, ensure_ascii=False,
+                          indent=2, separators=(',', ': '))
+    if isinstance(json_str, str):
+        # Apply py2 workaround only on py2
+        if sys.version_info[0] == 2:
+            json_str = json_str.decode('utf-8')
+    f.write(json_str)
+
+
+class FileIdMap(object):
+
+    """Base class for the stores of filename -> file ID mappings.
+
+    Every filename has at most one file ID, and a file ID exists for as long
+    as some filename has it.
+
+    """
+
+    def file_id_of(self, filename):
+        """Get the file ID of filename, or None."""
+        raise NotImplementedError
+
+    def has_file_id(self, file_id):
+        """Return True if some filename has file_id."""
+        raise NotImplementedError
+
+    def set(self, filename, file_id):
+        """Give filename the file ID file_id, replacing any it had."""
+        raise NotImplementedError
+
+    def remove(self, filename):
+        """Remove the mapping for filename, if any."""
+        raise NotImplementedError
+
+    def reassign(self, old_file_id, new_file_id):
+        """Give every filename with old_file_id new_file_id instead."""
+        raise NotImplementedError
+
+    def items(self):
+        """Get every (filename, file ID) pair, sorted by filename."""
+        raise NotImplementedError
+
+    def is_dirty(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Save any changes."""
+        raise NotImplementedError
+
+    def import_json(self, f):
+        """Add the mappings in a JSON file to this one.
+
+        :returns: number of mappings read
+
+        """
+        count = 0
+        for (filename, file_id) in read_json(f):
+            self.set(filename, file_id)
+            count += 1
+        return count
+
+    def export_json(self, f):
+        """Write this mapping to f in JSON format."""
+        write_json(f, self.items())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+
+class JsonFileIdMap(FileIdMap):
+
+    """A file ID mapping held in memory and saved as a JSON file.
+
+    If filename is None, the mapping is never loaded or saved.
+
+    """
+
+    def __init__(self, filename=None):
+        self._filename = filename
+        self._file_ids = {}         # filename -> file ID
+        self._filenames = {}        # file ID -> set of filenames
+        self._dirty = False
+        if filename is not None:
+            self._load()
+
+    def _load(self):
+        try:
+            with io.open(self._filename, mode='r', encoding='utf-8') as mf:
+                try:
+                    for (filename, file_id) in read_json(mf):
+                        self._set(filename, file_id)
+                    _util.mutter(_util.VERBOSITY_DEBUG,
+                                 'got file ID mapping:\n{0}'
+                                 .format(self._filenames))
+                except ValueError as e:
+                    # Error during file creation might leave an empty file
+                    # here.  Not necessarily fatal, but report it.
+                    _util.mutter(_util.VERBOSITY_NORMAL,
+                                 "Couldn't load file ID mapping from {0}: {1}"
+                                 .format(self._filename, e))
+        except IOError as e:
+            if e.errno == errno.ENOENT:
+                _util.mutter(_util.VERBOSITY_DEBUG,
+                             'No file ID mappings file {0}'.format(
+                                 self._filename))
+            else:
+                raise SystemExit(
+                    "Can't read file ID mappings file {0}: {1}: {2}".format(
+                        self._filename, e.errno, e.strerror))
+
+    def file_id_of(self, filename):
+        return self._file_ids.get(filename)
+
+    def has_file_id(self, file_id):
+        return file_id in self._filenames
+
+    def _set(self, filename, file_id):
+        self._remove(filename)
+        self._file_ids[filename] = file_id
+        self._filenames.setdefault(file_id, set()).add(filename)
+
+    def _remove(self, filename):
+        file_id = self._file_ids.pop(filename, None)
+        if file_id is not None:
+            filenames = self._filenames[file_id]
+            filenames.discard(filename)
+            if not filenames:
+                del self._filenames[file_id]
+
+    def set(self, filename, file_id):
+        if self._file_ids.get(filename) != file_id:
+            self._set(filename, file_id)
+            self._dirty = True
+
+    def remove(self, filename):
+        if filename in self._file_ids:
+            self._remove(filename)
+            self._dirty = True
+
+    def reassign(self, old_file_id, new_file_id):
+        if old_file_id == new_file_id:
+            return
+        for filename in list(self._filenames.get(old_file_id, ())):
+            self.set(filename, new_file_id)
+
+    def items(self):
+        return ((filename, self._file_ids[filename])
+                for filename in sorted(self._file_ids))
+
+    def is_dirty(self):
+        return self._dirty
+
+    def close(self):
+        if not self._dirty:
+            return
+        if self._filename is None:
+            raise AssertionError('file ID mapping is dirty but ' +
+                                 'relative_to is None')
+        try:
+            with io.open(self._filename, mode='w', encoding='utf-8') as mf:
+                self.export_json(mf)
+            self._dirty = False
+        except IOError as e:
+            print("Warning: unable to write file ID mapping file '{0}' "
+                  '(reason: {1})'.format(self._filename, e))
+
+
+class SqliteFileIdMap(FileIdMap):
+
+    """A file ID mapping kept in an SQLite database.
+
+    Lookups go straight to the database's indexes, so the mapping is never
+    loaded whole, and changes are written in a single transaction when the
+    map is closed.  The map may be opened on one thread and used on another
+    (see _corpus.BackgroundCorporaFile), so the connection is shared under a
+    lock, as in _dictdb.DictionaryDatabase.
+
+    """
+
+    def __init__(self, filename):
+        if sqlite3 is None:
+            raise SystemExit("Can't use file ID mappings database {0}: "
+                             'the sqlite3 module is not available'.format(
+                                 filename))
+        self._filename = filename
+        self._lock = threading.RLock()
+        try:
+            self._conn = sqlite3.connect(filename, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS file_ids '
+                '(filename TEXT PRIMARY KEY, file_id TEXT NOT NULL)')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS file_ids_by_id '
+                'ON file_ids (file_id)')
+        except sqlite3.Error as e:
+            raise SystemExit(
+                "Can't open file ID mappings database {0}: {1}".format(
+                    filename, e))
+        self._dirty = False
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def file_id_of(self, filename):
+        rows = self._execute(
+            'SELECT file_id FROM file_ids WHERE filename = ?', (filename,))
+        return rows[0][0] if rows else None
+
+    def has_file_id(self, file_id):
+        return bool(self._execute(
+            'SELECT 1 FROM file_ids WHERE file_id = ? LIMIT 1', (file_id,)))
+
+    def set(self, filename, file_id):
+        self._execute(
+            'INSERT OR REPLACE INTO file_ids (filename, file_id) '
+            'VALUES (?, ?)', (filename, file_id))
+        self._dirty = True
+
+    def remove(self, filename):
+        self._execute('DELETE FROM file_ids WHERE filename = ?',
+                      (filename,))
+        self._dirty = True
+
+    def reassign(self, old_file_id, new_file_id):
+        self._execute('UPDATE file_ids SET file_id = ? WHERE file_id = ?',
+                      (new_file_id, old_file_id))
+        self._dirty = True
+
+    def import_json(self, f):
+        pairs = list(read_json(f))
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO file_ids (filename, file_id) '
+                'VALUES (?, ?)', pairs)
+        self._dirty = True
+        return len(pairs)
+
+    def items(self):
+        return self._execute(
+            'SELECT filename, file_id FROM file_ids ORDER BY filename')
+
+    def is_dirty(self):
+        return self._dirty
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.commit()
+                self._dirty = False
+            except sqlite3.Error as e:
+                print("Warning: unable to write file ID mappings database "
+                      "'{0}' (reason: {1})".format(self._filename, e))
+            self._conn.close()
+            self._conn = None
+
+
+def open_file_id_map(dict_filename):
+    """Open the file ID mapping stored alongside a dictionary file.
+
+    :returns: a SqliteFileIdMap if the dictionary has a mappings database,
+              otherwise a JsonFileIdMap
+
+    """
+    if os.path.exists(dict_filename + SQLITE_SUFFIX):
+        return SqliteFileIdMap(dict_filename + SQLITE_SUFFIX)
+    return JsonFileIdMap(dict_filename + JSON_SUFFIX)
@@ -0,0 +1,170 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Reads files from a git repository's object store instead of the working
+tree.
+
+The blobs of the files, staged in the index or in some revision, are
+streamed through a single ``git cat-file --batch`` process rather than
+one ``git show`` per file.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import subprocess
+import threading
+
+
+# Modes of tree entries which aren't regular files: symbolic links and
+# submodules
+_SKIPPED_MODES = ('120000', '160000')
+
+
+class GitError(Exception):
+
+    """A git command failed."""
+
+
+def _run(args, cwd=None):
+    """Run a git command and return its output, as bytes."""
+    try:
+        process = subprocess.Popen(['git'] + args, cwd=cwd,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError("Can't run git: {}".format(e))
+    (out, err) = process.communicate()
+    if process.returncode != 0:
+        raise GitError('git {} failed: {}'.format(
+            args[0], err.decode('utf-8', 'replace').strip()))
+    return out
+
+
+def _decode_path(path):
+    # 'surrogateescape' doesn't exist on Python 2; paths are only used to
+    # name and look up files, so a stray byte can be replaced
+    return path.decode('utf-8', 'replace')
+
+
+def find_toplevel(cwd=None):
+    """Get the top-level directory of the repository containing cwd."""
+    return _decode_path(
+        _run(['rev-parse', '--show-toplevel'], cwd).rstrip(b'\n'))
+
+
+def _pathspecs(toplevel, paths):
+    """Make paths given relative to the current directory relative to the
+    top level, as pathspecs."""
+    return ['--'] + [os.path.relpath(os.path.abspath(p), toplevel)
+                     for p in paths]
+
+
+def staged_blobs(toplevel, paths=()):
+    """List the files added, copied, modified or renamed in the index, as
+    compared with HEAD.
+
+    :param paths: if given, only list files under these paths
+    :returns: list of (path, object name) pairs, path relative to toplevel
+
+    """
+    out = _run(['diff', '--cached', '--raw', '-z', '--no-abbrev',
+                '--diff-filter=ACMR'] + _pathspecs(toplevel, paths),
+               toplevel)
+    fields = out.split(b'\0')
+    blobs = []
+    i = 0
+    while i < len(fields) - 1:
+        # :old_mode new_mode old_object new_object status, then the path,
+        # or for a copy or rename the source and destination paths
+        (_, mode, _, object_name, status) = fields[i].split(b' ')
+        i += 3 if status[:1] in (b'C', b'R') else 2
+        if mode.decode('ascii') not in _SKIPPED_MODES:
+            blobs.append((_decode_path(fields[i - 1]),
+                          object_name.decode('ascii')))
+    return blobs
+
+
+def revision_blobs(toplevel, rev, paths=()):
+    """List every file in revision rev.
+
+    :param paths: if given, only list files under these paths
+    :returns: list of (path, object name) pairs, path relative to toplevel
+
+    """
+    out = _run(['ls-tree', '-r', '-z', '--full-tree', rev] +
+               _pathspecs(toplevel, paths), toplevel)
+    blobs = []
+    for entry in out.split(b'\0'):
+        if not entry:
+            continue
+        (info, path) = entry.split(b'\t', 1)
+        (mode, object_type, object_name) = info.split(b' ')
+        if (object_type == b'blob' and
+                mode.decode('ascii') not in _SKIPPED_MODES):
+            blobs.append((_decode_path(path), object_name.decode('ascii')))
+    return blobs
+
+
+def iter_blob_contents(toplevel, object_names):
+    """Read the contents of blobs with a single ``git cat-file --batch``.
+
+    The object names are written to git from another thread while the
+    contents are read, so that git is never kept waiting for a request.
+
+    :returns: iterator of the contents of each blob, as bytes, in order
+
+    """
+    try:
+        process = subprocess.Popen(['git', 'cat-file', '--batch'],
+                                   cwd=toplevel, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE)
+    except OSError as e:
+        raise GitError("Can't run git: {}".format(e))
+
+    def write_requests():
+        try:
+            for name in object_names:
+                process.stdin.write(name.encode('ascii') + b'\n')
+            process.stdin.close()
+        except (IOError, OSError):
+            pass    # git exited; the reader reports it
+    writer = threading.Thread(target=write_requests)
+    writer.daemon = True
+    writer.start()
+
+    try:
+        for name in object_names:
+            header = process.stdout.readline()
+            parts = header.split()
+            if len(parts) != 3:
+                raise GitError("Can't read object {}: {}".format(
+                    name, header.decode('utf-8', 'replace').strip() or
+                    'git cat-file exited'))
+            size = int(parts[2])
+            data = process.stdout.read(size)
+            process.stdout.read(1)      # the newline after the contents
+            yield data
+    finally:
+        process.stdout.close()
+        writer.join()
+        process.wait()
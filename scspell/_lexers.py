@@ -0,0 +1,207 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Lexers which divide source code into the kinds of region worth spell
+checking.
+
+A lexer is a function taking the text of a file and yielding a
+(kind, start, end) triple for each comment, string literal, definition and
+other identifier, where kind is one of the REGION_* constants and start and
+end are offsets into the text.  Lexers are registered by the name of a
+file type, as used in ``FILETYPE`` dictionary headers.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import keyword
+import re
+import tokenize
+
+
+REGION_COMMENT = 'comment'
+REGION_STRING = 'string'
+REGION_DEFINITION = 'definition'
+REGION_IDENTIFIER = 'identifier'
+
+REGION_KINDS = (REGION_COMMENT, REGION_STRING, REGION_DEFINITION,
+                REGION_IDENTIFIER)
+
+
+class LexingError(Exception):
+
+    """The text could not be divided into regions."""
+
+
+# Maps file type name -> lexer
+_lexers = {}
+
+
+def register_lexer(filetype, lexer):
+    """Use lexer for files of the named file type."""
+    _lexers[filetype] = lexer
+
+
+def get_lexer(filetype):
+    """Get the lexer for the named file type, or None."""
+    return _lexers.get(filetype)
+
+
+def _line_starts(text):
+    starts = [0, 0]     # tokenize counts lines from 1
+    pos = text.find('\n')
+    while pos >= 0:
+        starts.append(pos + 1)
+        pos = text.find('\n', pos + 1)
+    return starts
+
+
+# Tokens after which a Python name is being bound
+_PYTHON_BINDING_KEYWORDS = frozenset(['def', 'class', 'as', 'global',
+                                      'nonlocal'])
+
+_FSTRING_MIDDLE = getattr(tokenize, 'FSTRING_MIDDLE', None)
+
+
+def lex_python(text):
+    """Lex Python source with the standard library tokenizer.
+
+    Definitions are the names of functions, classes and parameters, names
+    bound by ``as``, ``global`` and ``nonlocal``, and names directly
+    followed by ``=`` outside of brackets or in a ``def`` signature.
+
+    """
+    starts = _line_starts(text)
+
+    def ofs(position):
+        (row, col) = position
+        return starts[row] + col
+
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+    except (tokenize.TokenError, SyntaxError) as e:
+        raise LexingError(str(e))
+
+    depth = 0           # bracket nesting depth
+    signature = None    # depth of the enclosing def signature, if any
+    prev = None         # previous significant token
+    for (i, tok) in enumerate(tokens):
+        (tok_type, string, start, end, _) = tok
+        if tok_type == tokenize.COMMENT:
+            yield (REGION_COMMENT, ofs(start), ofs(end))
+        elif tok_type == tokenize.STRING or tok_type == _FSTRING_MIDDLE:
+            yield (REGION_STRING, ofs(start), ofs(end))
+        elif tok_type == tokenize.NAME and not keyword.iskeyword(string):
+            following = tokens[i + 1][1] if i + 1 < len(tokens) else ''
+            prev_string = prev[1] if prev is not None else ''
+            if (prev_string in _PYTHON_BINDING_KEYWORDS or
+                    (signature is not None and depth == signature + 1 and
+                     prev_string in ('(', ',', '*', '**')) or
+                    (following == '=' and depth == 0)):
+                yield (REGION_DEFINITION, ofs(start), ofs(end))
+            else:
+                yield (REGION_IDENTIFIER, ofs(start), ofs(end))
+        elif tok_type == tokenize.OP:
+            if string in ('(', '[', '{'):
+                if (string == '(' and prev is not None and i >= 2 and
+                        tokens[i - 2][1] == 'def'):
+                    signature = depth
+                depth += 1
+            elif string in (')', ']', '}'):
+                depth -= 1
+                if signature is not None and depth == signature:
+                    signature = None
+        if tok_type not in (tokenize.NL, tokenize.COMMENT):
+            prev = tok
+
+
+_C_TOKEN_REGEX = re.compile(r'''
+    (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?|`(?:\\.|[^`\\])*`?)
+  | (?P<number>\d\w*)
+  | (?P<name>[^\W\d]\w*)
+  | (?P<other>[^\s\w])
+''', re.DOTALL | re.VERBOSE | re.UNICODE)
+
+# Names which are never worth checking in C-family languages
+_C_KEYWORDS = frozenset('''
+    auto bool break case catch char class const continue default delete do
+    double else enum extern false final float for fn func function goto if
+    import in inline int interface let long mut namespace new null nullptr
+    package private protected public register return short signed sizeof
+    static struct switch this throw true try typedef typename union unsigned
+    using var void volatile while yield
+'''.split())
+
+# Keywords after which a name is being used rather than defined
+_C_NON_DEFINING = frozenset('''
+    await case delete do else goto in instanceof new of return sizeof throw
+    typeof yield
+'''.split())
+
+
+def lex_c_family(text):
+    """Lex C, C++ and similar languages with a regular expression.
+
+    Definitions are found heuristically: a name directly preceded by another
+    name (as in ``int count`` or ``struct node``) or by ``*`` or ``&``
+    following a name (as in ``char *buffer``) is taken to be a definition.
+
+    """
+    prev = None         # (kind, text) of the previous two significant tokens
+    prev_prev = None
+    for m in _C_TOKEN_REGEX.finditer(text):
+        kind = m.lastgroup
+        if kind == 'comment':
+            yield (REGION_COMMENT, m.start(), m.end())
+            continue
+        if kind == 'string':
+            yield (REGION_STRING, m.start(), m.end())
+        elif (kind == 'other' and m.group() in ('*', '&') and
+                prev is not None and prev[1] in ('*', '&')):
+            # Treat ** and && like a single * or &
+            continue
+        elif kind == 'name' and m.group() not in _C_KEYWORDS:
+            if _follows_type(prev, prev_prev):
+                yield (REGION_DEFINITION, m.start(), m.end())
+            else:
+                yield (REGION_IDENTIFIER, m.start(), m.end())
+        (prev_prev, prev) = (prev, (kind, m.group()))
+
+
+def _follows_type(prev, prev_prev):
+    """Decide whether a name following prev and prev_prev is defined."""
+    if prev is None:
+        return False
+    if prev[0] == 'name':
+        return prev[1] not in _C_NON_DEFINING
+    if prev[1] in ('*', '&') and prev_prev is not None:
+        return (prev_prev[0] == 'name' and
+                prev_prev[1] not in _C_NON_DEFINING)
+    return False
+
+
+register_lexer('Python', lex_python)
+for _filetype in ('C', 'C++', 'C/C++', 'C#', 'Go', 'Java', 'JavaScript',
+                  'Kotlin', 'Objective-C', 'Rust', 'Scala', 'Swift',
+                  'TypeScript'):
+    register_lexer(_filetype, lex_c_family)
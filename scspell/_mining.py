@@ -0,0 +1,208 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Collects statistics about the unmatched subtokens of a spell check run,
+for bootstrapping a dictionary."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import heapq
+import io
+import itertools
+import json
+import os
+import tempfile
+
+from . import _corpus
+from . import _util
+
+
+# Number of distinct words held in memory before they are spilled to disk
+DEFAULT_MAX_WORDS = 100000
+
+# Number of (filename, line number) locations remembered for each word
+DEFAULT_MAX_SAMPLES = 3
+
+
+class MinedWord(collections.namedtuple(
+        'MinedWord', ['word', 'count', 'files', 'samples'])):
+
+    """Statistics for one unmatched subtoken: the number of times it occurred,
+    the number of distinct files it occurred in, and a few of its locations
+    as (filename, line number) pairs."""
+
+    __slots__ = ()
+
+
+def _tag_records(run_number, records):
+    for record in records:
+        yield (record[0], run_number, record)
+
+
+class VocabularyMiner(object):
+    """Aggregate every unmatched subtoken of a spell check run.
+
+    An instance of this class can be passed to ``spell_check()`` as the
+    ``report_only`` argument.  Nothing is reported while checking; use
+    ``entries()``, ``most_common()`` or ``write_section()`` afterwards.
+
+    At most ``max_words`` distinct words are held in memory.  When that is
+    exceeded, the words seen so far are written to a sorted run file in
+    ``spill_dir`` (default: the system temporary directory), and the runs
+    are merged when the results are read.  Spilling only happens between
+    files, so that each file's words are counted within a single run, and
+    the distinct files of a word are counted exactly by adding up its
+    counts from each run.  A file given more than once adds to the number
+    of occurrences each time, but only counts as one file.
+
+    """
+
+    def __init__(self, max_words=DEFAULT_MAX_WORDS,
+                 max_samples=DEFAULT_MAX_SAMPLES, spill_dir=None):
+        self.max_words = max_words
+        self.max_samples = max_samples
+        self.spill_dir = spill_dir
+        self.spill_files = []
+        # word -> [count, files, samples, number of the last file counted]
+        self._words = {}
+        self._filename = None
+        self._file_number = 0
+        self._seen_files = set()
+
+    def __call__(self, match_desc, filename, unmatched_subtokens):
+        if filename != self._filename:
+            if len(self._words) >= self.max_words:
+                self._spill()
+            self._filename = filename
+            if filename in self._seen_files:
+                # Already counted as a file, in this run or an earlier one
+                self._file_number = None
+            else:
+                self._seen_files.add(filename)
+                self._file_number = len(self._seen_files)
+
+        for subtoken in unmatched_subtokens:
+            try:
+                record = self._words[subtoken]
+            except KeyError:
+                record = [0, 0, [], None]
+                self._words[subtoken] = record
+            record[0] += 1
+            if (self._file_number is not None and
+                    record[3] != self._file_number):
+                record[1] += 1
+                record[3] = self._file_number
+            # Only pay for the line number while there is room to keep it
+            if len(record[2]) < self.max_samples:
+                record[2].append([filename, match_desc.get_line_num()])
+
+        return (
+            match_desc.get_string(),
+            match_desc.get_ofs() + len(match_desc.get_token()))
+
+    def _spill(self):
+        """Write the in-memory words to a new sorted run file."""
+        (fd, spill_file) = tempfile.mkstemp(
+            prefix='scspell-mine-', suffix='.jsonl', dir=self.spill_dir)
+        os.close(fd)
+        self.spill_files.append(spill_file)
+        _util.mutter(_util.VERBOSITY_DEBUG,
+                     '(Spilling {0} words to {1}.)'.format(
+                         len(self._words), spill_file))
+        with io.open(spill_file, mode='w', encoding='utf-8') as f:
+            for record in self._sorted_records():
+                f.write(json.dumps(record) + '\n')
+        self._words = {}
+
+    def _sorted_records(self):
+        for word in sorted(self._words):
+            (count, files, samples, _) = self._words[word]
+            yield [word, count, files, samples]
+
+    def _read_spill_file(self, spill_file):
+        with io.open(spill_file, mode='r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def entries(self):
+        """Iterate over a MinedWord for every unmatched word, sorted by
+        word."""
+        runs = [self._read_spill_file(fn) for fn in self.spill_files]
+        runs.append(self._sorted_records())
+        # Tag each record with its run number, so that samples from earlier
+        # files come first
+        merged = heapq.merge(*[_tag_records(i, run)
+                               for (i, run) in enumerate(runs)])
+        for (word, group) in itertools.groupby(merged, lambda t: t[0]):
+            count = 0
+            files = 0
+            samples = []
+            for (_, _, (_, r_count, r_files, r_samples)) in group:
+                count += r_count
+                files += r_files
+                samples.extend(r_samples)
+            yield MinedWord(word, count, files,
+                            tuple(tuple(s)
+                                  for s in samples[:self.max_samples]))
+
+    def most_common(self, k):
+        """Return the k words which occurred most often, most frequent
+        first."""
+        return heapq.nlargest(k, self.entries(),
+                              key=lambda e: (e.count, e.files))
+
+    def write_section(self, f, dict_type, metadata, min_count=1,
+                      min_files=1):
+        """Write the mined words as a dictionary section to f, a file-like
+        object.
+
+        :param dict_type: one of the _corpus.DICT_TYPE_* values
+        :param metadata: the header metadata appropriate for ``dict_type``
+        :param min_count: omit words that occurred fewer times than this
+        :param min_files: omit words that occurred in fewer files than this
+        :returns: number of words written
+
+        """
+        _corpus.write_header(f, dict_type, metadata)
+        written = 0
+        for entry in self.entries():
+            if entry.count >= min_count and entry.files >= min_files:
+                f.write(entry.word + '\n')
+                written += 1
+        f.write('\n')
+        return written
+
+    def close(self):
+        """Remove any spill files."""
+        for spill_file in self.spill_files:
+            try:
+                os.remove(spill_file)
+            except OSError:
+                pass
+        self.spill_files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+        return False
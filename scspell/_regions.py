@@ -0,0 +1,142 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Decides which parts of a file are spell checked."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import _lexers
+from . import _util
+from ._scripts import ScriptFilter
+from ._skip import SkipPatterns
+
+
+def parse_region_kinds(spec):
+    """Parse a comma-separated list of region kinds, such as
+    ``comments,strings``, into a set of _lexers.REGION_* values."""
+    kinds = set()
+    for word in spec.split(','):
+        word = word.strip().lower()
+        if word.endswith('s'):
+            word = word[:-1]
+        if word not in _lexers.REGION_KINDS:
+            raise ValueError(
+                "Unknown region kind '{0}'; expected one of {1}".format(
+                    word, ', '.join(k + 's' for k in _lexers.REGION_KINDS)))
+        kinds.add(word)
+    return kinds
+
+
+def merge_spans(spans):
+    """Sort (start, end) spans, joining any that overlap or touch."""
+    merged = []
+    for (start, end) in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_spans(spans, holes):
+    """Remove holes from spans.
+
+    Both are sorted lists of non-overlapping (start, end) pairs.
+
+    """
+    result = []
+    i = 0
+    for (start, end) in spans:
+        while i < len(holes) and holes[i][1] <= start:
+            i += 1
+        j = i
+        while j < len(holes) and holes[j][0] < end:
+            if holes[j][0] > start:
+                result.append((start, holes[j][0]))
+            start = max(start, holes[j][1])
+            j += 1
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+class RegionSelector(object):
+
+    """Selects the spans of a file's text that are spell checked.
+
+    If ``kinds`` is given, files whose file type has a registered lexer are
+    restricted to the regions of those kinds (see _lexers.REGION_KINDS).
+    Other files, and files the lexer can't handle, are checked in full.
+
+    Text matching a skip pattern is never checked.  ``skips`` defaults to
+    the built-in patterns; pass False to check such text too.
+
+    Nor is text in scripts other than those of the dictionaries.
+    ``scripts`` defaults to a ScriptFilter for the Latin script; pass
+    False to check text in every script.
+
+    """
+
+    def __init__(self, kinds=None, skips=None, scripts=None):
+        self.kinds = frozenset(kinds) if kinds else None
+        if skips is None:
+            skips = SkipPatterns()
+        self.skips = skips or None
+        if scripts is None:
+            scripts = ScriptFilter()
+        self.scripts = scripts or None
+
+    def select(self, text, filetype):
+        """Select the spans of text to check.
+
+        :param filetype: name of the file type, or None if unknown
+        :returns: sorted list of non-overlapping (start, end) pairs
+
+        """
+        regions = self._select_kinds(text, filetype)
+        holes = []
+        if self.skips is not None:
+            holes.extend(self.skips.find_spans(text, filetype))
+        if self.scripts is not None:
+            holes.extend(self.scripts.find_spans(text))
+        if holes:
+            regions = subtract_spans(regions, merge_spans(holes))
+        return regions
+
+    def report(self):
+        """Print the amount of text skipped for being in other scripts."""
+        if self.scripts is not None:
+            self.scripts.report()
+
+    def _select_kinds(self, text, filetype):
+        if self.kinds is not None:
+            lexer = _lexers.get_lexer(filetype)
+            if lexer is not None:
+                try:
+                    return merge_spans(
+                        (start, end) for (kind, start, end) in lexer(text)
+                        if kind in self.kinds)
+                except _lexers.LexingError as e:
+                    _util.mutter(_util.VERBOSITY_DEBUG,
+                                 '(Lexing as {0} failed: {1}; checking the '
+                                 'whole file.)'.format(filetype, e))
+        return [(0, len(text))]
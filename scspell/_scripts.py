@@ -0,0 +1,106 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Finds runs of text in writing systems the dictionaries don't cover.
+
+The token pattern matches word characters of any script, so text such as
+the translations in a localization file would otherwise be split into
+tokens and looked up, one failure after another, in an English word list.
+A ScriptFilter finds every run of word characters outside the chosen
+scripts with a single regular expression, so that such text is skipped
+before it is tokenized.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import re
+import sys
+
+
+# Script name -> character class ranges of its Unicode blocks
+SCRIPTS = {
+    'latin': '\u0000-\u024f\u1e00-\u1eff\u2c60-\u2c7f\ua720-\ua7ff',
+    'greek': '\u0370-\u03ff\u1f00-\u1fff',
+    'cyrillic': '\u0400-\u052f\u1c80-\u1c8f\u2de0-\u2dff\ua640-\ua69f',
+    'armenian': '\u0530-\u058f',
+    'hebrew': '\u0590-\u05ff',
+    'arabic': '\u0600-\u06ff\u0750-\u077f\u08a0-\u08ff\ufb50-\ufdff'
+              '\ufe70-\ufeff',
+    'devanagari': '\u0900-\u097f',
+    'thai': '\u0e00-\u0e7f',
+    'hangul': '\u1100-\u11ff\u3130-\u318f\uac00-\ud7af',
+    'kana': '\u3040-\u30ff\u31f0-\u31ff',
+    'han': '\u2e80-\u2fdf\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff',
+}
+
+# The scripts of the dictionary shipped with scspell
+DEFAULT_SCRIPTS = ('latin',)
+
+
+def parse_scripts(spec):
+    """Parse a comma-separated list of script names, such as
+    ``latin,greek``, into a set of SCRIPTS keys, or None for ``all``."""
+    if spec.strip().lower() == 'all':
+        return None
+    scripts = set()
+    for name in spec.split(','):
+        name = name.strip().lower()
+        if name not in SCRIPTS:
+            raise ValueError(
+                "Unknown script '{}'; expected all, or some of {}".format(
+                    name, ', '.join(sorted(SCRIPTS))))
+        scripts.add(name)
+    return scripts
+
+
+class ScriptFilter(object):
+
+    """Finds the runs of word characters outside a set of scripts, and
+    counts them."""
+
+    def __init__(self, scripts=DEFAULT_SCRIPTS):
+        self.scripts = frozenset(scripts)
+        # A word character which is in none of the scripts
+        self._regex = re.compile('[^\\W{}]+'.format(
+            ''.join(SCRIPTS[s] for s in sorted(self.scripts))), re.UNICODE)
+        self.skipped_runs = 0
+        self.skipped_chars = 0
+
+    def find_spans(self, text):
+        """Find the runs of text in other scripts.
+
+        :returns: sorted list of non-overlapping (start, end) pairs
+
+        """
+        spans = [m.span() for m in self._regex.finditer(text)]
+        self.skipped_runs += len(spans)
+        self.skipped_chars += sum(end - start for (start, end) in spans)
+        return spans
+
+    def report(self):
+        """Print the amount of text skipped, if any."""
+        if self.skipped_runs:
+            print('Skipped {} characters in {} runs of text in other '
+                  'scripts than {}'.format(
+                      self.skipped_chars, self.skipped_runs,
+                      ', '.join(sorted(self.scripts))),
+                  file=sys.stderr)
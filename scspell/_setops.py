@@ -0,0 +1,133 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Set operations on sorted word lists, done as linear merges.
+
+A natural language corpus accepts any prefix of its words, so the
+operations can treat a list as such a corpus (prefix=True): a word is then
+in the list if the list accepts it.  Otherwise words are compared exactly.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+
+def accepted_by(words, others):
+    """Yield the words accepted by a prefix-matching corpus holding others,
+    that is, the words which are a prefix of some word in others.
+
+    The words starting with a given word sort directly after it, so the
+    first word of others not less than a word tells whether it is
+    accepted, and both lists are walked once.
+
+    :param words: sorted sequence of words
+    :param others: sorted sequence of words
+
+    """
+    j = 0
+    for word in words:
+        while j < len(others) and others[j] < word:
+            j += 1
+        if j < len(others) and others[j].startswith(word):
+            yield word
+
+
+def union(words, others):
+    """Return the sorted, distinct words of two sorted sequences."""
+    result = []
+    (i, j) = (0, 0)
+    while i < len(words) and j < len(others):
+        if words[i] < others[j]:
+            result.append(words[i])
+            i += 1
+        elif others[j] < words[i]:
+            result.append(others[j])
+            j += 1
+        else:
+            result.append(words[i])
+            i += 1
+            j += 1
+    result.extend(words[i:])
+    result.extend(others[j:])
+    return result
+
+
+def intersection(words, others, prefix=False):
+    """Return the sorted words present in both of two sorted sequences.
+
+    If prefix is True, both are prefix-matching corpora, and the result is
+    the words of each which the other accepts.
+
+    """
+    if prefix:
+        return union(list(accepted_by(words, others)),
+                     list(accepted_by(others, words)))
+    result = []
+    (i, j) = (0, 0)
+    while i < len(words) and j < len(others):
+        if words[i] < others[j]:
+            i += 1
+        elif others[j] < words[i]:
+            j += 1
+        else:
+            result.append(words[i])
+            i += 1
+            j += 1
+    return result
+
+
+def difference(words, others, prefix=False):
+    """Return the sorted words of words which are not in others.
+
+    If prefix is True, others is a prefix-matching corpus, and the words it
+    accepts are dropped.
+
+    """
+    if prefix:
+        dropped = accepted_by(words, others)
+    else:
+        dropped = intersection(words, others)
+    result = []
+    i = 0
+    for word in dropped:
+        while words[i] != word:
+            result.append(words[i])
+            i += 1
+        i += 1
+    result.extend(words[i:])
+    return result
+
+
+def redundant_prefixes(words):
+    """Yield the words of a prefix-matching corpus which the corpus would
+    accept without them, because they are a prefix of another word.
+
+    Any word starting with a given word sorts directly after it, so only
+    the next word needs to be looked at.  A repeated word is not a prefix
+    of its own copy: removing the word would remove every copy.
+
+    :param words: sorted sequence of words
+
+    """
+    for i in range(len(words) - 1):
+        if (words[i + 1] != words[i] and
+                words[i + 1].startswith(words[i])):
+            yield words[i]
@@ -0,0 +1,174 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Splits a spell check across several machines, and combines their
+reports.
+
+Each file belongs to one of N shards, chosen by a hash of its path
+relative to a base directory, so every machine given the same file list
+checks the same files without any coordination, wherever its checkout
+is.  Each writes a partial report in JSON, and the reports are
+merged once all of the shards are done.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import os
+
+from . import _util
+
+
+REPORT_VERSION = 1
+
+
+def parse_shard(spec):
+    """Parse a shard specification such as ``2/4`` (the second of four
+    shards) into a (index, count) pair, with index counted from 1."""
+    try:
+        (index, count) = [int(part) for part in spec.split('/')]
+    except ValueError:
+        raise ValueError("Invalid shard '{}'; expected K/N, such as 1/4"
+                         .format(spec))
+    if not 1 <= index <= count:
+        raise ValueError("Invalid shard '{}'; K must be between 1 and N"
+                         .format(spec))
+    return (index, count)
+
+
+def shard_of(filename, count, base=None):
+    """Get the shard (counted from 1) of count shards that filename belongs
+    to.
+
+    The shard depends only on the path of the file relative to base
+    (default: the current directory), so it is the same from run to run
+    and from machine to machine, unlike Python's hash(), whether the path
+    is given relative or absolute.
+
+    """
+    path = os.path.realpath(filename)
+    try:
+        path = os.path.relpath(path, os.path.realpath(base or os.curdir))
+    except ValueError:
+        # On another Windows drive than base
+        pass
+    digest = hashlib.sha1(
+        path.replace(os.sep, '/').encode('utf-8')).hexdigest()
+    return int(digest[:15], 16) % count + 1
+
+
+def select_shard(filenames, shard, base=None):
+    """Get the filenames which belong to shard, an (index, count) pair, in
+    their original order.
+
+    :param base: directory the paths are hashed relative to; see shard_of()
+
+    """
+    (index, count) = shard
+    return [f for f in filenames if shard_of(f, count, base) == index]
+
+
+def write_report(f, shard, files, okay, findings, skipped=()):
+    """Write a partial report to f, a file-like object, in JSON.
+
+    :param shard: (index, count) pair, or None if the files were not split
+    :param files: number of files checked
+    :param okay: True if the files were checked without errors
+    :param findings: sequence of (filename, line_num, token, subtokens)
+    :param skipped: sequence of (filename, reason) for the files skipped
+
+    """
+    json_str = json.dumps({
+        'version': REPORT_VERSION,
+        'shard': '{}/{}'.format(*shard) if shard is not None else None,
+        'files': files,
+        'okay': okay,
+        'findings': [[filename, line_num, token, list(subtokens)]
+                     for (filename, line_num, token, subtokens) in findings],
+        'skipped': [list(s) for s in skipped],
+    }, indent=1, sort_keys=True)
+    if not isinstance(json_str, type('')):
+        # Python 2 returns bytes, which a text file won't accept
+        json_str = json_str.decode('utf-8')
+    f.write(json_str + '\n')
+
+
+def read_report(filename):
+    """Read a partial report written by write_report().
+
+    :returns: the report, as a dict
+
+    """
+    try:
+        with _util.open_with_encoding(filename, encoding='utf-8') as f:
+            report = json.load(f)
+    except IOError as e:
+        raise SystemExit("Can't read report {}: {}".format(filename, e))
+    except ValueError as e:
+        raise SystemExit("Can't parse report {}: {}".format(filename, e))
+    if report.get('version') != REPORT_VERSION:
+        raise SystemExit('Report {} has unsupported version {}'.format(
+            filename, report.get('version')))
+    return report
+
+
+def merge_reports(reports):
+    """Combine partial reports, as returned by read_report(), into one.
+
+    Reports of a sharded run must cover every shard exactly once.
+
+    :returns: report dict with shard None, and the findings sorted by file
+
+    """
+    shards = set()
+    count = None
+    for report in reports:
+        if report['shard'] is None:
+            continue
+        (index, this_count) = parse_shard(report['shard'])
+        if count is not None and this_count != count:
+            raise SystemExit('Reports are from runs split {} and {} ways'
+                             .format(count, this_count))
+        if index in shards:
+            raise SystemExit('Shard {}/{} is reported twice'.format(
+                index, this_count))
+        count = this_count
+        shards.add(index)
+    if count is not None and len(shards) < count:
+        raise SystemExit('Missing reports for shards {}'.format(', '.join(
+            '{}/{}'.format(i, count) for i in range(1, count + 1)
+            if i not in shards)))
+
+    findings = []
+    skipped = []
+    for report in reports:
+        findings.extend(report['findings'])
+        skipped.extend(report['skipped'])
+    return {
+        'version': REPORT_VERSION,
+        'shard': None,
+        'files': sum(report['files'] for report in reports),
+        'okay': all(report['okay'] for report in reports),
+        'findings': sorted(findings, key=lambda f: (f[0], f[1])),
+        'skipped': sorted(skipped),
+    }
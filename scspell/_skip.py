@@ -0,0 +1,153 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+
+"""Patterns for text which is never worth spell checking.
+
+URLs, email addresses, UUIDs, hash digests, base64 payloads and the like
+would otherwise be split into subtokens and looked up one by one, which is
+slow and produces a stream of spurious errors.  A SkipPatterns object
+combines the applicable patterns into a single regular expression, so the
+text of a file is usually scanned for them in one pass before spell
+checking.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import re
+
+
+_FLAGS = re.DOTALL | re.UNICODE
+
+# (name, regular expression) pairs applied to every file.  The patterns are
+# anchored to the start of a "word" with lookbehinds, so a failed match
+# costs time proportional to the length of one word rather than its square.
+DEFAULT_SKIP_PATTERNS = [
+    ('pem', r'-----BEGIN [A-Z0-9 ]+-----.*?-----END [A-Z0-9 ]+-----'),
+    ('url', r'(?<![\w+.-])[a-zA-Z][a-zA-Z0-9+.-]*://[^\s\'"`<>()\[\]{}]+'),
+    ('email', r'(?<![\w.+-])[\w.+-]+@[\w-]+(?:\.[\w-]+)+'),
+    ('uuid', r'(?<![\w-])[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-'
+             r'[0-9a-fA-F]{12}(?![\w-])'),
+    ('hash', r'(?<!\w)(?=[a-fA-F]*\d)[0-9a-fA-F]{16,}(?!\w)'),
+    ('base64', r'(?<![\w+/-])(?=[\w+/-]*\d)(?=[\w+/-]*[a-z])'
+               r'(?=[\w+/-]*[A-Z])[\w+/-]{40,}={0,2}'),
+]
+
+# File type name -> list of (name, regular expression) pairs applied to
+# files of that type only
+_filetype_skip_patterns = {}
+
+
+def register_skip_pattern(filetype, name, regex):
+    """Skip text matching regex in files of the named file type (as used in
+    ``FILETYPE`` dictionary headers)."""
+    _filetype_skip_patterns.setdefault(filetype, []).append((name, regex))
+
+
+def compile_skip_pattern(regex):
+    """Check that regex can be used as a skip pattern.
+
+    Global inline flags such as ``(?i)`` are rejected, since they would
+    apply to every other pattern it is combined with (or fail to compile
+    once combined); scoped flags such as ``(?i:...)`` can be used instead.
+
+    :returns: regex
+    :raises ValueError: if regex is not a valid regular expression, or
+                        sets global flags
+
+    """
+    try:
+        compiled = re.compile(regex, _FLAGS)
+    except re.error as e:
+        raise ValueError("Invalid skip pattern '{0}': {1}".format(regex, e))
+    if compiled.flags != re.compile('', _FLAGS).flags:
+        raise ValueError("Invalid skip pattern '{0}': global flags are not "
+                         "allowed".format(regex))
+    return regex
+
+
+class SkipPatterns(object):
+
+    """Finds the spans of a file which match any skip pattern.
+
+    The default patterns (unless ``use_defaults`` is False), the patterns
+    registered for the file's type and the extra ``patterns`` are joined
+    into one regular expression per file type, compiled on first use.  An
+    extra pattern with groups is compiled on its own instead, so that its
+    backreferences still refer to its own groups, and its matches are
+    merged with those of the others.
+
+    """
+
+    def __init__(self, patterns=(), use_defaults=True):
+        self._patterns = list(DEFAULT_SKIP_PATTERNS) if use_defaults else []
+        self._separate = []
+        for p in patterns:
+            if re.compile(compile_skip_pattern(p), _FLAGS).groups:
+                self._separate.append(re.compile(p, _FLAGS))
+            else:
+                self._patterns.append(('user', p))
+        self._compiled = {}     # file type name -> regex, or None
+
+    def _get_regex(self, filetype):
+        try:
+            return self._compiled[filetype]
+        except KeyError:
+            pass
+        patterns = (self._patterns +
+                    _filetype_skip_patterns.get(filetype, []))
+        if patterns:
+            regex = re.compile('|'.join('(?:{0})'.format(p)
+                                        for (_, p) in patterns),
+                               _FLAGS)
+        else:
+            regex = None
+        self._compiled[filetype] = regex
+        return regex
+
+    def find_spans(self, text, filetype=None):
+        """Find the text to skip.
+
+        :param filetype: name of the file type, or None if unknown
+        :returns: sorted list of non-overlapping (start, end) pairs
+
+        """
+        patterns = list(self._separate)
+        regex = self._get_regex(filetype)
+        if regex is not None:
+            patterns.append(regex)
+        spans = [m.span() for r in patterns for m in r.finditer(text)
+                 if m.end() > m.start()]
+        if len(patterns) < 2:
+            return spans
+        merged = []
+        for (start, end) in sorted(spans):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else:
+                merged.append((start, end))
+        return merged
+
+
+register_skip_pattern('CSS', 'color', r'#[0-9a-fA-F]{3,8}(?![\w-])')
+for _filetype in ('HTML', 'XML'):
+    register_skip_pattern(_filetype, 'entity', r'&#?\w+;')
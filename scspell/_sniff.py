@@ -0,0 +1,173 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+
+"""Cheap tests for files which aren't worth spell checking at all.
+
+Binary files decode happily as latin-1, and minified or generated files
+decode as text, but tokenizing them takes a long time and produces nothing
+but junk reports.  Such files are recognized from their size and from the
+first few kilobytes of their contents, before they are decoded.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import math
+import os
+import sys
+
+from . import _util
+
+
+# Number of bytes read from the start of a file to decide what it holds
+SNIFF_SIZE = 8192
+
+# A file whose sample has more than this fraction of control characters is
+# binary
+BINARY_RATIO = 0.3
+
+# A file whose sample contains a line at least this long, and which has
+# little whitespace or high entropy, is minified or generated.  Bytes of
+# 0x80 and above (the UTF-8 encoding of other scripts, such as the text of
+# a localization file) count as whitespace, since CJK text has none between
+# its words, and are left out of the entropy.
+MINIFIED_LINE_LENGTH = 1000
+MINIFIED_WHITESPACE_RATIO = 0.1
+MINIFIED_ENTROPY = 5.5      # bits per byte; English prose is around 4.5
+
+# Reasons for skipping a file
+SKIP_BINARY = 'binary'
+SKIP_MINIFIED = 'minified'
+SKIP_TOO_LARGE = 'too large'
+
+# Control characters which are common in text files: \b \t \n \f \r ESC
+_TEXT_CONTROLS = frozenset([8, 9, 10, 12, 13, 27])
+
+_WHITESPACE = frozenset(bytearray(b' \t\n\r\f\v'))
+
+
+class FileSkipped(Exception):
+
+    """A file was not read, for the reason given by ``reason`` (one of the
+    SKIP_* constants)."""
+
+    def __init__(self, reason):
+        Exception.__init__(self, reason)
+        self.reason = reason
+
+
+def _entropy(counts, total):
+    """Shannon entropy, in bits per byte, of a byte histogram."""
+    return -sum(n / total * math.log(n / total, 2) for n in counts.values())
+
+
+def sniff(sample):
+    """Decide from the first bytes of a file whether it holds text worth
+    checking.
+
+    :param sample: up to SNIFF_SIZE bytes from the start of the file
+    :returns: SKIP_BINARY, SKIP_MINIFIED, or None if the file looks like
+              ordinary text
+
+    """
+    if not sample:
+        return None
+    data = bytearray(sample)
+    if 0 in data:
+        return SKIP_BINARY
+    counts = collections.Counter(data)
+    controls = sum(n for (c, n) in counts.items()
+                   if (c < 32 or c == 127) and c not in _TEXT_CONTROLS)
+    if controls > BINARY_RATIO * len(data):
+        return SKIP_BINARY
+
+    longest = max(len(line) for line in sample.split(b'\n'))
+    if longest >= MINIFIED_LINE_LENGTH:
+        ascii_counts = dict((c, n) for (c, n) in counts.items() if c < 128)
+        ascii_total = sum(ascii_counts.values())
+        whitespace = (sum(counts[c] for c in _WHITESPACE) +
+                      len(data) - ascii_total)
+        if (whitespace < MINIFIED_WHITESPACE_RATIO * len(data) or
+                _entropy(ascii_counts, ascii_total) > MINIFIED_ENTROPY):
+            return SKIP_MINIFIED
+    return None
+
+
+class FileFilter(object):
+
+    """Picks out files which should not be spell checked, and keeps count
+    of them.
+
+    Files larger than ``max_file_size`` bytes (if not None) are skipped, as
+    are binary and minified files unless ``skip_binary`` is False.
+
+    """
+
+    def __init__(self, max_file_size=None, skip_binary=True):
+        self.max_file_size = max_file_size
+        self.skip_binary = skip_binary
+        self.skipped = []   # (filename, reason) pairs
+
+    def check(self, fq_filename):
+        """Decide whether to skip a file.  Safe to call from any thread.
+
+        :returns: one of the SKIP_* constants, or None to check the file
+        :raises IOError, OSError: if the file can't be examined
+
+        """
+        if self.max_file_size is not None:
+            if os.path.getsize(fq_filename) > self.max_file_size:
+                return SKIP_TOO_LARGE
+        if self.skip_binary:
+            with open(fq_filename, 'rb') as f:
+                return sniff(f.read(SNIFF_SIZE))
+        return None
+
+    def check_data(self, data):
+        """Decide whether to skip a file, given its contents as bytes.
+
+        :returns: one of the SKIP_* constants, or None to check the file
+
+        """
+        if self.max_file_size is not None and len(data) > self.max_file_size:
+            return SKIP_TOO_LARGE
+        if self.skip_binary:
+            return sniff(data[:SNIFF_SIZE])
+        return None
+
+    def record(self, filename, reason):
+        """Note that a file was skipped."""
+        self.skipped.append((filename, reason))
+        _util.mutter(_util.VERBOSITY_DEBUG,
+                     "(Skipping '{}': {}.)".format(filename, reason))
+
+    def report(self):
+        """Print the number of files skipped for each reason."""
+        if not self.skipped:
+            return
+        counts = collections.Counter(reason for (_, reason) in self.skipped)
+        print('Skipped {} file{}: {}'.format(
+            len(self.skipped), '' if len(self.skipped) == 1 else 's',
+            ', '.join('{} {}'.format(counts[reason], reason)
+                      for reason in sorted(counts))),
+              file=sys.stderr)
@@ -0,0 +1,201 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Finds dictionary words close to a misspelled word.
+
+Rather than computing the edit distance to every word in a dictionary, a
+DeletionIndex maps every string obtainable by deleting up to ``max_distance``
+characters from (the prefix of) a dictionary word back to that word.  Two
+words within edit distance ``max_distance`` of each other always share such
+a deletion, so only the handful of words found via the deletions of the
+misspelled word need to have their edit distance computed.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+
+DEFAULT_MAX_DISTANCE = 2
+
+# Only this many leading characters of each word are used to build the index.
+# This bounds the number of deletions per word; candidates are still verified
+# against the whole word.
+DEFAULT_PREFIX_LENGTH = 7
+
+# Number of suggestions offered for a word
+DEFAULT_LIMIT = 5
+
+
+def _deletions(word, max_distance):
+    """Return the set of strings formed by deleting up to max_distance
+    characters from word, including word itself."""
+    result = set([word])
+    edge = [word]
+    for _ in range(max_distance):
+        next_edge = []
+        for w in edge:
+            for i in range(len(w)):
+                d = w[:i] + w[i + 1:]
+                if d not in result:
+                    result.add(d)
+                    next_edge.append(d)
+        edge = next_edge
+    return result
+
+
+def edit_distance(a, b, max_distance):
+    """Return the optimal string alignment distance between a and b, or
+    max_distance + 1 if it exceeds max_distance.
+
+    Only the diagonal band of width 2 * max_distance + 1 of the dynamic
+    programming table is computed, since no path through the cells outside
+    it can cost max_distance or less.
+
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+    too_far = max_distance + 1
+    len_b = len(b)
+    prev_prev = None
+    prev = [j if j <= max_distance else too_far for j in range(len_b + 1)]
+    for i in range(1, len(a) + 1):
+        cur = [too_far] * (len_b + 1)
+        if i <= max_distance:
+            cur[0] = i
+        lo = max(1, i - max_distance)
+        hi = min(len_b, i + max_distance)
+        row_min = cur[0]
+        ch_a = a[i - 1]
+        for j in range(lo, hi + 1):
+            if ch_a == b[j - 1]:
+                value = prev[j - 1]
+            else:
+                value = min(prev[j], cur[j - 1], prev[j - 1]) + 1
+                if (i > 1 and j > 1 and ch_a == b[j - 2] and
+                        a[i - 2] == b[j - 1]):
+                    value = min(value, prev_prev[j - 2] + 1)
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return too_far
+        (prev_prev, prev) = (prev, cur)
+    return min(prev[len_b], too_far)
+
+
+class DeletionIndex(object):
+
+    """An index answering "which words are within a small edit distance of
+    this one?" for a fixed set of words."""
+
+    def __init__(self, words, max_distance=DEFAULT_MAX_DISTANCE,
+                 prefix_length=DEFAULT_PREFIX_LENGTH):
+        self._max_distance = max_distance
+        self._prefix_length = prefix_length
+        # Many words share a prefix, so the deletions are computed and
+        # indexed once per distinct prefix.
+        self._words_by_prefix = {}
+        # deletion -> prefix, or list of prefixes.  Most deletions lead to a
+        # single prefix, so avoid a list per entry in that case.
+        self._index = {}
+        # Prefix length -> list of prefixes whose deletions are not indexed
+        # yet.  A lookup only needs the prefixes whose length is within
+        # max_distance of its own, so each length is indexed when first
+        # needed.
+        self._pending = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        """Add word to the index."""
+        prefix = word[:self._prefix_length]
+        words = self._words_by_prefix.get(prefix)
+        if words is not None:
+            words.add(word)
+            return
+        self._words_by_prefix[prefix] = set([word])
+        pending = self._pending.get(len(prefix))
+        if pending is None:
+            self._pending[len(prefix)] = [prefix]
+        elif pending:
+            pending.append(prefix)
+        else:
+            # That length is already indexed
+            self._index_prefix(prefix)
+
+    def _index_length(self, length):
+        """Index the deletions of the prefixes of the given length."""
+        pending = self._pending.get(length)
+        if pending:
+            for prefix in pending:
+                self._index_prefix(prefix)
+            # An empty list marks the length as indexed
+            del pending[:]
+
+    def _index_prefix(self, prefix):
+        for d in _deletions(prefix, self._max_distance):
+            entry = self._index.get(d)
+            if entry is None:
+                self._index[d] = prefix
+            elif isinstance(entry, list):
+                entry.append(prefix)
+            else:
+                self._index[d] = [entry, prefix]
+
+    def lookup(self, token, max_distance=None):
+        """Find the indexed words within max_distance of token.
+
+        :returns: list of (distance, word) pairs, closest first
+
+        """
+        if max_distance is None or max_distance > self._max_distance:
+            max_distance = self._max_distance
+        token_prefix = token[:self._prefix_length]
+        for length in range(len(token_prefix) - max_distance,
+                            len(token_prefix) + max_distance + 1):
+            self._index_length(length)
+        prefixes = set()
+        for d in _deletions(token_prefix, max_distance):
+            entry = self._index.get(d)
+            if entry is None:
+                continue
+            elif isinstance(entry, list):
+                prefixes.update(entry)
+            else:
+                prefixes.add(entry)
+
+        result = []
+        for prefix in prefixes:
+            # As in SymSpell, words whose prefix is too far from the
+            # misspelled word's prefix are rejected as a group.  This may
+            # miss a word only when the edits straddle the end of the
+            # prefix.
+            if edit_distance(token_prefix, prefix,
+                             max_distance) > max_distance:
+                continue
+            for word in self._words_by_prefix[prefix]:
+                distance = edit_distance(token, word, max_distance)
+                if distance <= max_distance:
+                    result.append((distance, word))
+        result.sort(key=lambda r: (r[0], abs(len(r[1]) - len(token)), r[1]))
+        return result
@@ -82,15 +82,36 @@ def detect_encoding(filename):
     
     except AttributeError:
         input_file = open(filename, 'rb')
-        with input_file:
-            from lib2to3.pgen2 import tokenize as lib2to3_tokenize
-            encoding = lib2to3_tokenize.detect_encoding(input_file.readline)[0]
+        try:
+            with input_file:
+                from lib2to3.pgen2 import tokenize as lib2to3_tokenize
+                encoding = lib2to3_tokenize.detect_encoding(
+                    input_file.readline)[0]
+
+                # Check for correctness of encoding.
+                with open_with_encoding(filename, encoding) as input_file:
+                    input_file.read()
+        except (SyntaxError, LookupError, UnicodeDecodeError):
+            # The handler below doesn't cover this one
+            return 'latin-1'
 
-            # Check for correctness of encoding.
-            with open_with_encoding(filename, encoding) as input_file:
-                input_file.read()
-                
         return encoding
     
     except (SyntaxError, LookupError, UnicodeDecodeError):
-        return 'latin-1'  # Fallback to latin-1
\ No newline at end of file
+        return 'latin-1'  # Fallback to latin-1
+
+
+def decode_bytes(data):
+    """Decode the contents of a file, detecting the encoding as
+    detect_encoding() does."""
+    try:
+        try:
+            import tokenize
+            encoding = tokenize.detect_encoding(io.BytesIO(data).readline)[0]
+        except AttributeError:
+            from lib2to3.pgen2 import tokenize as lib2to3_tokenize
+            encoding = lib2to3_tokenize.detect_encoding(
+                io.BytesIO(data).readline)[0]
+        return data.decode(encoding)
+    except (SyntaxError, LookupError, UnicodeDecodeError):
+        return data.decode('latin-1')  # Fallback to latin-1
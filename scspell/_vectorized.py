@@ -0,0 +1,80 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+
+"""Matches many tokens against a prefix-matching dictionary at once.
+
+PrefixMatchCorpus.match() bisects its sorted word list once per token.
+When NumPy is installed, SortedWords keeps the words in a NumPy array of
+UTF-8 byte strings instead, so that the insertion points of a whole batch
+of tokens are found with a single ``searchsorted`` and the words found
+there are compared with the tokens in a single ``startswith``.  UTF-8
+byte strings sort in the same order as the code points of the strings
+they encode, so the results are those of bisecting the strings.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def available():
+    """Return True if NumPy is installed, so SortedWords can be used."""
+    return numpy is not None
+
+
+def _encode(words):
+    # Lone surrogates can't be encoded otherwise, and their encodings still
+    # sort between those of the characters around them
+    return numpy.array([w.encode('utf-8', 'surrogatepass') for w in words],
+                       dtype=bytes)
+
+
+class SortedWords(object):
+
+    """A sorted list of words, searched for the words that many tokens are
+    prefixes of at once."""
+
+    def __init__(self, words):
+        """Construct an instance from a sequence of words in sorted
+        order."""
+        self._words = _encode(words)
+
+    def prefix_matches(self, tokens):
+        """Find the tokens which are a prefix of some word.
+
+        :param tokens: sequence of strings
+        :returns: set of those of the tokens which match
+
+        """
+        tokens = list(tokens)
+        if not tokens or not len(self._words):
+            return set()
+        queries = _encode(tokens)
+        points = numpy.searchsorted(self._words, queries, side='left')
+        inside = points < len(self._words)
+        candidates = self._words[numpy.where(inside, points, 0)]
+        found = inside & numpy.char.startswith(candidates, queries)
+        return set(t for (t, f) in zip(tokens, found) if f)
@@ -0,0 +1,282 @@
+#
+# scspell
+# Copyright (C) 2009 Paul Pelzl
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License, version 2, as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+"""Watches directory trees and files for changes.
+
+On Linux, the kernel's inotify interface reports changes as they happen.
+Elsewhere, or if inotify is unavailable (e.g. the watch limit is reached),
+the trees are polled by comparing file modification times and sizes.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+from . import _util
+
+
+# Seconds to wait for a burst of changes (such as an editor saving several
+# files, or writing a file in several steps) to end
+DEBOUNCE_DELAY = 0.25
+
+# Seconds between scans of the trees when polling
+POLL_INTERVAL = 1.0
+
+
+try:
+    _fsencode = os.fsencode
+    _fsdecode = os.fsdecode
+except AttributeError:
+    # Python 2
+    def _fsencode(path):
+        if isinstance(path, bytes):
+            return path
+        return path.encode(sys.getfilesystemencoding() or 'utf-8')
+
+    def _fsdecode(path):
+        return path.decode(sys.getfilesystemencoding() or 'utf-8',
+                           'replace')
+
+
+def _is_hidden(name):
+    return name.startswith('.')
+
+
+def walk_files(directory):
+    """Yield the path of every file in the directory tree, skipping hidden
+    directories such as .git."""
+    for (dirpath, dirnames, filenames) in os.walk(directory):
+        dirnames[:] = sorted(d for d in dirnames if not _is_hidden(d))
+        for name in sorted(filenames):
+            yield os.path.join(dirpath, name)
+
+
+class Watcher(object):
+
+    """Reports the files changed in a set of directory trees, and changes to
+    individual files outside them.
+
+    Changed files are reported by path: the watched directory joined with
+    the path within it, or the watched file as given.  A deleted file is
+    reported like a modified one.
+
+    """
+
+    def __init__(self, directories, files=()):
+        self.directories = list(directories)
+        self.files = list(files)
+
+    def wait(self, timeout=None):
+        """Wait up to timeout seconds (forever if None) for changes.
+
+        :returns: set of paths changed since the last call, possibly empty
+
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def collect(self, delay=DEBOUNCE_DELAY):
+        """Wait for changes, then keep collecting them until none have been
+        seen for delay seconds.
+
+        :returns: non-empty set of changed paths
+
+        """
+        changed = set()
+        while not changed:
+            changed = self.wait()
+        while True:
+            more = self.wait(delay)
+            if not more:
+                return changed
+            changed |= more
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+        return False
+
+
+class PollingWatcher(Watcher):
+
+    """Finds changes by scanning the trees every interval seconds."""
+
+    def __init__(self, directories, files=(), interval=POLL_INTERVAL):
+        Watcher.__init__(self, directories, files)
+        self._interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        paths = list(self.files)
+        for directory in self.directories:
+            paths.extend(walk_files(directory))
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_mtime, st.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = set(
+                path for path in set(snapshot) | set(self._snapshot)
+                if snapshot.get(path) != self._snapshot.get(path))
+            self._snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is None:
+                pause = self._interval
+            else:
+                pause = min(self._interval, deadline - time.time())
+                if pause <= 0:
+                    return changed
+            time.sleep(pause)
+
+
+# inotify event masks, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+               IN_DELETE)
+
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher(Watcher):
+
+    """Finds changes with Linux's inotify, watching every directory of the
+    trees, and the directory of each individual file."""
+
+    def __init__(self, directories, files=()):
+        Watcher.__init__(self, directories, files)
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'),
+                                 use_errno=True)
+        self._fd = self._libc.inotify_init()
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init failed')
+        self._dirs = {}         # watch descriptor -> directory
+        self._recursive = set()     # watch descriptors of tree directories
+        # watch descriptor -> {name: path} of the individual files
+        self._files = {}
+        try:
+            for directory in self.directories:
+                self._watch_tree(directory)
+            for path in self.files:
+                (directory, name) = os.path.split(path)
+                wd = self._add_watch(directory or os.curdir)
+                self._files.setdefault(wd, {})[name] = path
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(
+            self._fd, _fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(),
+                          "Can't watch {}".format(directory))
+        # A directory watched twice keeps its descriptor and first path
+        self._dirs.setdefault(wd, directory)
+        return wd
+
+    def _watch_tree(self, directory):
+        for (dirpath, dirnames, _) in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if not _is_hidden(d)]
+            self._recursive.add(self._add_watch(dirpath))
+
+    def wait(self, timeout=None):
+        (readable, _, _) = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        data = os.read(self._fd, 65536)
+        changed = set()
+        pos = 0
+        while pos < len(data):
+            (wd, mask, _, length) = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = _fsdecode(data[pos:pos + length].rstrip(b'\0'))
+            pos += length
+            if mask & IN_Q_OVERFLOW:
+                _util.mutter(_util.VERBOSITY_NORMAL,
+                             'Too many changes to follow; rescanning')
+                changed.update(self.files)
+                for directory in self.directories:
+                    changed.update(walk_files(directory))
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or mask & IN_IGNORED:
+                continue
+            path = os.path.join(directory, name)
+            if wd in self._recursive and not _is_hidden(name):
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._watch_tree(path)
+                        changed.update(walk_files(path))
+                    continue
+                if mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM |
+                           IN_DELETE):
+                    changed.add(path)
+            if name in self._files.get(wd, {}):
+                changed.add(self._files[wd][name])
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def make_watcher(directories, files=()):
+    """Create an InotifyWatcher if possible, else a PollingWatcher."""
+    try:
+        return InotifyWatcher(directories, files)
+    except (OSError, AttributeError) as e:
+        # AttributeError: the C library lacks the inotify functions
+        _util.mutter(_util.VERBOSITY_DEBUG,
+                     '(inotify unavailable: {}; polling instead.)'.format(e))
+        return PollingWatcher(directories, files)
@@ -0,0 +1,76 @@
+"""Speed of spell checking with and without --batch-match.
+
+Checks the same synthetic source files in report-only mode both ways,
+after loading the builtin dictionary, and prints the best time of a few
+runs of each.  The files repeat their identifiers a lot, as real source
+code does, so that most tokens only need to be looked up once per file.
+
+Run ``make benchmark`` to print the measurements.
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import random
+import timeit
+
+import scspell
+from scspell import make_selector
+from scspell import spell_check_text
+from scspell._corpus import CorporaFile
+from scspell._vectorized import available
+
+
+# Number of synthetic files, and lines in each
+FILES = 10
+LINES = 3000
+
+# Times each way of checking is run; the best is reported
+REPEAT = 3
+
+
+def make_source(rand):
+    words = ['total', 'count', 'value', 'result', 'buffer', 'offset',
+             'length', 'index', 'typoo', 'recieve', 'widgett', 'parser',
+             'token', 'matcher', 'filename', 'reader', 'writer', 'header']
+    lines = []
+    for i in range(LINES):
+        (a, b, c) = (rand.choice(words) for _ in range(3))
+        lines.append("    {0}_{1} = self.compute{2}({1}Count, 'the {2} of "
+                     "{0}')  # check the {0}\n".format(a, b, c.title()))
+    return ''.join(lines)
+
+
+def discard_failure(match_desc, filename, unmatched_subtokens):
+    match_desc.get_line_num()
+    return (match_desc.get_string(),
+            match_desc.get_ofs() + len(match_desc.get_token()))
+
+
+def check_all(dicts, sources, batch_match):
+    selector = make_selector()
+    for (i, text) in enumerate(sources):
+        filename = 'file{}.py'.format(i)
+        spell_check_text(text, filename, filename, dicts, set(),
+                         discard_failure, True, selector, batch_match)
+
+
+def main():
+    dicts = CorporaFile(scspell.SCSPELL_BUILTIN_DICT, [], None)
+    rand = random.Random(0)
+    sources = [make_source(rand) for _ in range(FILES)]
+    times = {}
+    for batch_match in (False, True):
+        times[batch_match] = min(timeit.repeat(
+            lambda: check_all(dicts, sources, batch_match),
+            repeat=REPEAT, number=1))
+    print('{} files of {} lines{}'.format(
+        FILES, LINES, '' if available() else ', without NumPy'))
+    print('{:20} {:>8.2f} s'.format('default', times[False]))
+    print('{:20} {:>8.2f} s'.format('--batch-match', times[True]))
+    print('{:20} {:>8.2f} x'.format('speedup', times[False] / times[True]))
+
+
+if __name__ == '__main__':
+    main()
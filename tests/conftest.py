@@ -0,0 +1,7 @@
+import sys
+
+
+# Coroutine syntax can't even be compiled before Python 3.7
+collect_ignore = []
+if sys.version_info < (3, 7):
+    collect_ignore.append('test_async.py')
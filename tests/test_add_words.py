@@ -0,0 +1,57 @@
+import io
+
+from scspell import add_to_dict
+from scspell import add_words_to_dict
+from scspell import read_word_list
+from scspell._corpus import CorporaFile
+from scspell._corpus import PrefixMatchCorpus
+from scspell._corpus import DICT_TYPE_NATURAL
+
+
+DICTIONARY = '''\
+FILETYPE: Python; .py
+self
+
+NATURAL:
+apple
+cherry
+
+'''
+
+
+def test_prefix_corpus_add_many():
+    corpus = PrefixMatchCorpus(DICT_TYPE_NATURAL, None, ['b', 'd', 'f'])
+    assert corpus.add_many(['e', 'a', 'd', 'g', 'a']) == 3
+    assert corpus.tokens() == ['a', 'b', 'd', 'e', 'f', 'g']
+    assert corpus.is_dirty()
+    assert corpus.match('g')
+
+
+def test_add_words_to_dict(tmpdir):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write(DICTIONARY)
+    words = tmpdir.join('words')
+    words.write('NATURAL:\n# reviewed\nbanana\n\napple\ndate\n')
+
+    assert read_word_list(str(words)) == ['banana', 'apple', 'date']
+    assert add_words_to_dict('natural', read_word_list(str(words)),
+                             override_dictionary=str(dictionary)) == 2
+    assert add_words_to_dict('programming', ['cls', 'self'], ['x.py'],
+                             override_dictionary=str(dictionary)) == 1
+    add_to_dict('n', 'elderberry', override_dictionary=str(dictionary))
+    with io.open(str(dictionary), encoding='utf-8') as f:
+        assert f.read() == (
+            'FILETYPE: Python; .py\ncls\nself\n\n'
+            'NATURAL:\napple\nbanana\ncherry\ndate\nelderberry\n\n')
+
+
+def test_batch(tmpdir):
+    dictionary = str(tmpdir.join('dictionary'))
+    with CorporaFile(dictionary, [], None) as dicts:
+        with dicts.batch() as batch:
+            batch.add_natural('pear')
+            batch.add_by_file_id('quince', 'some-file-id')
+            assert not batch.add_by_extension('plum', '.rs')
+            assert not dicts.match('pear', 'x.txt', None)
+        assert dicts.match('pear', 'x.txt', None)
+        assert dicts.match('quince', 'x.txt', 'some-file-id')
@@ -0,0 +1,88 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from scspell import FindingCollector
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import spell_check
+from scspell._archive import is_archive
+
+
+MEMBERS = [
+    ('pkg/module.py', b'# a commentz\n'),
+    ('pkg/README.txt', b'fine text\nwrongx here\n'),
+    ('pkg/data.bin', b'\0\1\2\3' * 100),
+]
+
+
+def _make_tar(path):
+    with tarfile.open(path, 'w:gz') as archive:
+        for (name, data) in MEMBERS:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+def _make_zip(path):
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('pkg/', b'')
+        for (name, data) in MEMBERS:
+            archive.writestr(name, data)
+
+
+def _check(tmpdir, filenames, **kwargs):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL:\n\n')
+    collector = FindingCollector()
+    okay = spell_check(filenames, str(dictionary), [SCSPELL_BUILTIN_DICT],
+                       report_only=collector, **kwargs)
+    return (okay, [(f.filename, f.line_num, f.subtokens)
+                   for f in collector.findings])
+
+
+def test_is_archive():
+    assert is_archive('release-1.0.tar.gz')
+    assert is_archive('vendor/pkg-1.0-py3-none-any.whl')
+    assert not is_archive('module.py')
+
+
+def test_check_archives(tmpdir):
+    tar = str(tmpdir.join('release.tar.gz'))
+    _make_tar(tar)
+    zip_ = str(tmpdir.join('bundle.zip'))
+    _make_zip(zip_)
+    (okay, findings) = _check(tmpdir, [tar, zip_])
+    assert not okay
+    assert findings == [
+        (tar + '!pkg/module.py', 1, ('commentz',)),
+        (tar + '!pkg/README.txt', 2, ('wrongx',)),
+        (zip_ + '!pkg/module.py', 1, ('commentz',)),
+        (zip_ + '!pkg/README.txt', 2, ('wrongx',)),
+    ]
+
+
+def test_filter_members(tmpdir):
+    tar = str(tmpdir.join('release.tar.gz'))
+    _make_tar(tar)
+    assert _check(tmpdir, [tar], member_extensions=['.txt'])[1] == [
+        (tar + '!pkg/README.txt', 2, ('wrongx',))]
+    assert _check(tmpdir, [tar], max_file_size=16)[1] == [
+        (tar + '!pkg/module.py', 1, ('commentz',))]
+
+
+def test_unreadable_archive(tmpdir, capsys):
+    bad = tmpdir.join('bad.zip')
+    bad.write('not a zip file')
+    assert _check(tmpdir, [str(bad)]) == (False, [])
+    assert "can't read source file" in capsys.readouterr().err
+
+
+def test_archive_requires_report_only(tmpdir):
+    archive = str(tmpdir.join('x.zip'))
+    _make_zip(archive)
+    with pytest.raises(ValueError):
+        spell_check([archive], str(tmpdir.join('dictionary')),
+                    [SCSPELL_BUILTIN_DICT])
+    assert sorted(p.basename for p in tmpdir.listdir()) == ['x.zip']
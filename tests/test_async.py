@@ -0,0 +1,62 @@
+import asyncio
+import concurrent.futures
+import os
+
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import async_spell_check
+from scspell import async_spell_check_texts
+
+
+DICTIONARY = os.path.join(os.path.dirname(__file__), 'fileidmap', 'dictionary')
+
+
+def collect(aiter):
+    async def run():
+        return [result async for result in aiter]
+    return asyncio.run(run())
+
+
+def test_async_spell_check():
+    filenames = [os.path.join(os.path.dirname(__file__), 'fileidmap', fn)
+                 for fn in ('inputfile.txt', 'inputfile2.txt', 'missing.txt')]
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        results = collect(async_spell_check(
+            filenames, override_dictionary=DICTIONARY,
+            base_dicts=[SCSPELL_BUILTIN_DICT], executor=executor,
+            max_concurrency=2))
+    results = {os.path.basename(r.filename): r for r in results}
+    assert sorted(results) == ['inputfile.txt', 'inputfile2.txt',
+                               'missing.txt']
+    assert [(f.line_num, f.subtokens)
+            for f in results['inputfile.txt'].findings] == [
+        (3, ('soem',)), (5, ('finially',))]
+    # The embedded file ID makes 'finially' known
+    assert [(f.line_num, f.subtokens)
+            for f in results['inputfile2.txt'].findings] == [
+        (4, ('soem',))]
+    assert not results['missing.txt'].okay
+
+
+def test_async_spell_check_texts():
+    texts = [('a.txt', 'some wrods'), ('b.py', 'okay text')]
+    results = collect(async_spell_check_texts(
+        texts, override_dictionary=DICTIONARY,
+        base_dicts=[SCSPELL_BUILTIN_DICT]))
+    results = {r.filename: r for r in results}
+    assert results['a.txt'].okay
+    assert results['b.py'].okay
+    assert results['b.py'].findings == []
+
+
+def test_async_spell_check_texts_stop_early():
+    texts = (('{}.txt'.format(i), 'zzzzq') for i in range(100))
+
+    async def first():
+        aiter = async_spell_check_texts(
+            texts, override_dictionary=DICTIONARY, max_concurrency=4)
+        async for result in aiter:
+            await aiter.aclose()
+            return result
+    result = asyncio.run(first())
+    assert not result.okay
+    assert result.findings[0].subtokens == ('zzzzq',)
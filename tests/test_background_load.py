@@ -0,0 +1,51 @@
+from __future__ import unicode_literals
+
+import pytest
+
+from scspell import spell_check
+from scspell._corpus import BackgroundCorporaFile
+
+
+DICTIONARY = '''\
+FILETYPE: Python; .py
+nonlocal
+NATURAL:
+apple
+banana
+'''
+
+
+def test_background_load(tmpdir):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write(DICTIONARY)
+    with BackgroundCorporaFile(str(dictionary), [], None,
+                               [('.pyx', 'Python')]) as dicts:
+        assert dicts.match('banana', 'a.txt', None)
+        assert not dicts.match('cherry', 'a.txt', None)
+        assert dicts.match('nonlocal', 'a.pyx', None)
+        dicts.add_natural('cherry')
+    assert 'cherry' in dictionary.read()
+
+
+def test_background_load_error(tmpdir):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL: oops\napple\n')
+    dicts = BackgroundCorporaFile(str(dictionary), [], None)
+    try:
+        dicts.match('apple', 'a.txt', None)
+    except SystemExit:
+        pass
+    else:
+        assert False
+    with pytest.raises(SystemExit):
+        dicts.close()
+
+
+def test_unused_dictionary_error(tmpdir):
+    # The error is raised even if no file needed the dictionaries
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL: oops\napple\n')
+    binary = tmpdir.join('a.bin')
+    binary.write_binary(b'\x00\x01\x02')
+    with pytest.raises(SystemExit):
+        spell_check([str(binary)], str(dictionary), report_only=True)
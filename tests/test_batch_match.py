@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+import scspell
+from scspell import FindingCollector
+from scspell import spell_check
+from scspell import _vectorized
+from scspell._corpus import CorporaFile
+from scspell._corpus import PrefixMatchCorpus
+
+
+DICTIONARY = '''\
+FILETYPE: Python; .py
+frobnicate
+FILEID: one
+wibble
+NATURAL:
+here
+too
+étude
+'''
+
+BASE_DICTIONARY = 'NATURAL:\nwobbleable\n'
+
+TOKENS = ['here', 'her', 'heres', 'too', 'tooo', 'frobnicate', 'frob',
+          'wibble', 'wibbl', 'wobble', 'wobbleables', 'zzzz', 'étu',
+          'études', 'etude', '']
+
+
+def load(tmpdir):
+    tmpdir.join('dictionary').write(DICTIONARY.encode('utf-8'), 'wb')
+    tmpdir.join('base').write(BASE_DICTIONARY)
+    return CorporaFile(str(tmpdir.join('dictionary')),
+                       [str(tmpdir.join('base'))], None)
+
+
+@pytest.mark.parametrize('filename,file_id', [
+    ('a.py', 'one'), ('a.py', None), ('a.txt', 'one'), ('a.txt', 'two')])
+def test_match_many(tmpdir, filename, file_id):
+    dicts = load(tmpdir)
+    assert dicts.match_many(TOKENS, filename, file_id) == set(
+        t for t in TOKENS if dicts.match(t, filename, file_id))
+
+
+@pytest.mark.skipif(not _vectorized.available(), reason='needs NumPy')
+def test_sorted_words():
+    words = sorted(['abc', 'abcdef', 'bébé', 'bz', 'zzz'])
+    corpus = PrefixMatchCorpus('NATURAL', '', words)
+    tokens = ['a', 'abcd', 'abcdefg', 'abd', 'bé', 'béc', 'bz',
+              'bza', 'zzzz', 'ÿ', '']
+    assert _vectorized.SortedWords(words).prefix_matches(tokens) == set(
+        t for t in tokens if corpus.match(t))
+    assert _vectorized.SortedWords([]).prefix_matches(tokens) == set()
+
+    # The array is rebuilt after the words change
+    assert corpus.match_many(['bzz']) == set()
+    corpus.add('bzzz')
+    assert corpus.match_many(['bzz']) == set(['bzz'])
+    corpus.discard(['bzzz'])
+    assert corpus.match_many(['bzz']) == set()
+
+
+def test_same_findings(tmpdir):
+    source = tmpdir.join('a.py')
+    source.write('here_too = frobnicate(heres, Wibble)\n'
+                 'WOBBLEABLE_TOO = tooo(zzzz, 0xdeadbeef, zzzz)\n'
+                 'etude = herr + heres\n')
+    load(tmpdir).close()
+    findings = []
+    for batch_match in (False, True):
+        collector = FindingCollector()
+        assert not spell_check([str(source)], str(tmpdir.join('dictionary')),
+                               [str(tmpdir.join('base'))],
+                               report_only=collector, batch_match=batch_match)
+        findings.append(collector.findings)
+    assert findings[0] == findings[1]
+    assert [(f.line_num, f.token) for f in findings[1]] == [
+        (1, 'heres'), (1, 'Wibble'), (2, 'tooo'), (2, 'zzzz'), (2, 'zzzz'),
+        (3, 'etude'), (3, 'herr'), (3, 'heres')]
+
+
+def test_builtin_dictionary():
+    # The whole of this package, against the builtin dictionary
+    filename = scspell.__file__.replace('.pyc', '.py')
+    findings = []
+    for batch_match in (False, True):
+        collector = FindingCollector()
+        spell_check([filename], scspell.SCSPELL_BUILTIN_DICT,
+                    report_only=collector, batch_match=batch_match)
+        findings.append(collector.findings)
+    assert findings[0] == findings[1]
+    assert findings[0]
@@ -0,0 +1,84 @@
+import scspell
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell._buffer import EditBuffer
+
+
+def test_edit_buffer():
+    buffer = EditBuffer('one teh two\nteh three\r\nfour teh\n')
+    assert not buffer.is_modified()
+    assert buffer.replace(4, 7, 'the')
+    assert not buffer.replace(5, 6, 'x')
+    assert buffer.replace_all('teh', 'thee', 0) == 2
+    assert buffer.get_original() == 'one teh two\nteh three\r\nfour teh\n'
+    assert buffer.get_text() == 'one the two\nthee three\r\nfour thee\n'
+
+    assert buffer.overlapping_edit_end(0, 3) is None
+    assert buffer.overlapping_edit_end(2, 5) == 7
+    assert buffer.overlapping_edit_end(12, 15) == 15
+
+    assert [buffer.get_line_num(ofs) for ofs in (0, 11, 12, 24, 33)] == [
+        1, 1, 2, 3, 4]
+    assert buffer.get_context(30, 4) == [
+        (1, 'one the two'), (2, 'thee three'), (3, 'four thee'), (4, '')]
+
+
+def test_replace_all_within_tokens():
+    buffer = EditBuffer('teh tehs steh teh_x teh\n')
+    assert buffer.replace_all('teh', 'the', 1) == 4
+    assert buffer.get_text() == 'teh thes sthe the_x the\n'
+
+
+def test_edited_span():
+    buffer = EditBuffer('ab xaby abab ab\n')
+    assert buffer.replace_all('ab', 'cde', 0) == 5
+    assert buffer.get_edited_span(0, 2) is None
+    assert buffer.get_edited_span(3, 7) == (3, 7, 'xcdey')
+    assert buffer.get_edited_span(8, 12) == (8, 12, 'cdecde')
+    assert buffer.get_edited_span(9, 11) == (8, 12, 'cdecde')
+
+    # Edits within a replaced span are superseded, but not those which
+    # only partly overlap it
+    assert not buffer.replace(5, 7, 'x')
+    assert buffer.replace(3, 7, 'z')
+    assert buffer.get_text() == 'cde z cdecde cde\n'
+
+
+def test_interactive_replace_all(tmpdir, monkeypatch, capsys):
+    source = tmpdir.join('source.txt')
+    source.write('zzfoo one\nzzfoo two zzfoo\nqqbar\n')
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL:\n')
+
+    keys = iter('R' + 'c' + 'r')
+    replacements = iter(['fixed', 'alsofixed'])
+    monkeypatch.setattr(scspell._portable, 'getch', lambda: next(keys))
+    monkeypatch.setattr(scspell, 'raw_input', lambda _: next(replacements),
+                        raising=False)
+
+    assert not scspell.spell_check([str(source)], str(dictionary),
+                                   base_dicts=[SCSPELL_BUILTIN_DICT])
+    assert source.read() == 'fixed one\nfixed two fixed\nalsofixed\n'
+    # The context shown for the last token includes the earlier replacements
+    assert '   2: fixed two fixed\n   3: qqbar\n' in capsys.readouterr().out
+
+
+def test_interactive_replace_all_in_longer_tokens(tmpdir, monkeypatch,
+                                                  capsys):
+    source = tmpdir.join('source.txt')
+    source.write('zzfoo one\nzzfoo_qqqq zzfooed zzfoo\n')
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL:\n')
+
+    keys = iter('R' + 'r' + 'i')
+    replacements = iter(['fixed', 'fixed_word'])
+    monkeypatch.setattr(scspell._portable, 'getch', lambda: next(keys))
+    monkeypatch.setattr(scspell, 'raw_input', lambda _: next(replacements),
+                        raising=False)
+
+    assert not scspell.spell_check([str(source)], str(dictionary),
+                                   base_dicts=[SCSPELL_BUILTIN_DICT])
+    assert source.read() == 'fixed one\nfixed_word fixeded fixed\n'
+    # The longer tokens are asked about as they read after the replacement
+    out = capsys.readouterr().out
+    assert "Unmatched 'fixed_qqqq'" in out
+    assert "Unmatched 'fixeded'" in out
@@ -0,0 +1,45 @@
+from __future__ import unicode_literals
+
+from scspell import CountingReport
+from scspell import FindingCollector
+from scspell import MatchDescriptor
+from scspell import spell_check
+
+
+DICTIONARY = 'NATURAL:\nis\nthis\n'
+
+
+def write_sources(tmpdir):
+    tmpdir.join('dictionary').write(DICTIONARY)
+    names = []
+    for (name, text) in (('a.txt', 'this is wrld\nwrld wrld\n'),
+                         ('b.txt', 'this is okay\n'),
+                         ('c.txt', 'xyzzy')):
+        tmpdir.join(name).write(text)
+        names.append(str(tmpdir.join(name)))
+    return names
+
+
+def test_counting_report(tmpdir, capsys, monkeypatch):
+    names = write_sources(tmpdir)
+    # Counting never computes line numbers
+    monkeypatch.setattr(MatchDescriptor, 'get_line_num', None)
+    counts = CountingReport()
+    assert not spell_check(names, str(tmpdir.join('dictionary')),
+                           report_only=counts)
+    assert counts.files == {names[0]: 3, names[1]: 1, names[2]: 1}
+    assert counts.words == {'wrld': 3, 'okay': 1, 'xyzzy': 1}
+    counts.print_counts(per_file=True)
+    assert capsys.readouterr().err.splitlines()[-4:] == [
+        "'wrld': 3", "'okay': 1", "'xyzzy': 1",
+        '5 findings in 3 files, 3 distinct words']
+
+
+def test_max_findings(tmpdir, capsys):
+    names = write_sources(tmpdir)
+    collector = FindingCollector()
+    assert not spell_check(names, str(tmpdir.join('dictionary')),
+                           report_only=collector, max_findings=2)
+    assert [(f.line_num, f.token) for f in collector.findings] == [
+        (1, 'wrld'), (2, 'wrld')]
+    assert 'Stopped after 2 findings' in capsys.readouterr().err
@@ -0,0 +1,115 @@
+import io
+import os
+import shutil
+
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import add_to_dict
+from scspell import delete_files
+from scspell import export_dictionary
+from scspell import filter_out_base_dicts
+from scspell import import_dictionary
+from scspell import merge_file_ids
+from scspell import spell_check
+from scspell._corpus import CorporaFile
+from scspell._dictdb import DictionaryDatabase
+from scspell._dictdb import is_dictionary_database
+
+
+FILEIDMAP = os.path.join(os.path.dirname(__file__), 'fileidmap')
+DICTIONARY = os.path.join(FILEIDMAP, 'dictionary')
+
+
+def make_database(tmpdir):
+    database = str(tmpdir.join('dictionary.sqlite'))
+    assert is_dictionary_database(database)
+    import_dictionary(DICTIONARY, database)
+    assert is_dictionary_database(database)
+    shutil.copy(DICTIONARY + '.fileids.json', database + '.fileids.json')
+    return database
+
+
+def read(filename):
+    with io.open(filename, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_round_trip(tmpdir):
+    database = make_database(tmpdir)
+    exported = str(tmpdir.join('exported'))
+    export_dictionary(exported, [], database)
+    assert read(exported) == read(DICTIONARY)
+
+
+def test_spell_check_with_database(tmpdir):
+    database = make_database(tmpdir)
+    filenames = [os.path.join(FILEIDMAP, 'mix{}.txt'.format(i))
+                 for i in range(1, 6)]
+    for dictionary in (DICTIONARY, database):
+        assert spell_check(filenames, dictionary,
+                           base_dicts=[SCSPELL_BUILTIN_DICT],
+                           relative_to=FILEIDMAP, report_only=True)
+    assert not spell_check([os.path.join(FILEIDMAP, 'inputfile.txt')],
+                           database, relative_to=FILEIDMAP, report_only=True)
+
+
+def test_words_visible_to_open_readers(tmpdir):
+    database = make_database(tmpdir)
+    with CorporaFile(database, [], None) as reader:
+        assert not reader.match('soem', 'x.txt', None)
+        add_to_dict('natural', 'soem', override_dictionary=database)
+        add_to_dict('programming', 'frobz', ['x.txt'],
+                    override_dictionary=database)
+        assert reader.match('soe', 'x.txt', None)
+        assert 'soem' in reader._natural_dict.tokens()
+    with CorporaFile(database, [], None) as dicts:
+        assert dicts.match('frobz', 'y.txt', None)
+        assert not dicts.match('frob', 'y.txt', None)
+        assert not dicts.match('frobz', 'y.py', None)
+
+
+def test_file_id_corpora(tmpdir):
+    database = make_database(tmpdir)
+    merge_file_ids('d8e42004-3574-11e6-a3a6-10ddb1d4c3d5',
+                   'd31a2218-3574-11e6-a3a6-10ddb1d4c3d5', database,
+                   relative_to=FILEIDMAP)
+    with CorporaFile(database, [], None) as dicts:
+        assert dicts.match('kiddsly', 'mix1.txt',
+                           'd31a2218-3574-11e6-a3a6-10ddb1d4c3d5')
+        assert not dicts.file_id_exists('d8e42004-3574-11e6-a3a6-10ddb1d4c3d5')
+        assert dicts._get_file_id_corpus(
+            'd8e42004-3574-11e6-a3a6-10ddb1d4c3d5') is None
+        assert len(dicts._file_id_dicts) == 1
+
+    delete_files([os.path.join(FILEIDMAP, 'mix5.txt')], database,
+                 relative_to=FILEIDMAP)
+    with CorporaFile(database, [], None) as dicts:
+        assert dicts._get_file_id_corpus(
+            '7f72eb84-3576-11e6-a3a6-10ddb1d4c3d5') is None
+
+
+def test_filter_out_base_dicts(tmpdir):
+    database = make_database(tmpdir)
+    add_to_dict('natural', 'the', override_dictionary=database)
+    filter_out_base_dicts(database, [SCSPELL_BUILTIN_DICT])
+    with CorporaFile(database, [], None) as dicts:
+        assert 'the' not in dicts._natural_dict.tokens()
+
+
+def test_nested_transactions(tmpdir):
+    database = DictionaryDatabase(str(tmpdir.join('words.sqlite')))
+    corpus_id = database.ensure_corpus('NATURAL', '')
+    try:
+        with database.transaction():
+            database.add_words(corpus_id, ['alpha'])
+            with database.transaction():
+                database.add_words(corpus_id, ['beta'])
+            raise KeyError
+    except KeyError:
+        pass
+    assert not database.has_word(corpus_id, 'alpha')
+    assert not database.has_word(corpus_id, 'beta')
+    with database.transaction():
+        with database.transaction():
+            database.add_words(corpus_id, ['gamma'])
+    assert database.has_word(corpus_id, 'gamma')
+    database.close()
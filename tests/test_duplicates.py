@@ -0,0 +1,86 @@
+from __future__ import unicode_literals
+
+from scspell import DuplicateFiles
+from scspell import FindingCollector
+from scspell import spell_check_files
+from scspell._corpus import CorporaFile
+
+
+DICTIONARY = '''\
+FILEID: one
+frobnicate
+NATURAL:
+here
+too
+'''
+
+
+def check(tmpdir, files):
+    dictionary = tmpdir.join('dictionary')
+    if not dictionary.check():
+        dictionary.write(DICTIONARY)
+    for (name, text) in files:
+        tmpdir.join(name).write(text)
+    collector = FindingCollector()
+    with CorporaFile(str(dictionary), [], str(tmpdir)) as dicts:
+        if dicts.file_id_of_file(str(tmpdir.join('a.txt'))) is None:
+            dicts.new_file_and_file_id(str(tmpdir.join('a.txt')), 'one')
+        okay = spell_check_files([str(tmpdir.join(name))
+                                  for (name, _) in files],
+                                 dicts, collector, True)
+    return (okay, [(f.filename[len(str(tmpdir)) + 1:], f.line_num, f.token)
+                   for f in collector.findings])
+
+
+def test_identical_files(tmpdir, capsys):
+    text = 'here\nwibble too\n'
+    (okay, findings) = check(tmpdir, [('b.txt', text), ('c.txt', text),
+                                      ('d.py', text), ('e.txt', text)])
+    assert not okay
+    assert findings == [('b.txt', 2, 'wibble'), ('c.txt', 2, 'wibble'),
+                        ('d.py', 2, 'wibble'), ('e.txt', 2, 'wibble')]
+    assert 'Reused the results for 2 files' in capsys.readouterr().err
+
+
+def test_file_id_mapping(tmpdir):
+    # Only a.txt is mapped to the file ID whose dictionary has frobnicate
+    text = 'frobnicate here\n'
+    (okay, findings) = check(tmpdir, [('a.txt', text), ('b.txt', text),
+                                      ('c.txt', text)])
+    assert findings == [('b.txt', 1, 'frobnicate'),
+                        ('c.txt', 1, 'frobnicate')]
+
+
+def test_embedded_file_id(tmpdir):
+    marked = 'scspell-id: one\nfrobnicate here\n'
+    (okay, findings) = check(tmpdir, [('b.txt', marked), ('c.txt', marked),
+                                      ('a.txt', 'frobnicate here\n'),
+                                      ('d.txt', 'frobnicate here\n')])
+    assert findings == [('d.txt', 1, 'frobnicate')]
+
+
+def test_replayed_failures_keep_no_text(tmpdir):
+    text = 'here\nwibble too\nhere wobble\n'
+    seen = []
+
+    def report(match_desc, filename, unmatched_subtokens):
+        seen.append((filename, match_desc.get_line_num(),
+                     match_desc.get_token(), match_desc.get_context()[1]))
+        return (match_desc.get_string(),
+                match_desc.get_ofs() + len(match_desc.get_token()))
+
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write(DICTIONARY)
+    duplicates = DuplicateFiles(report)
+    with CorporaFile(str(dictionary), [], None) as dicts:
+        for name in ('b.txt', 'c.txt'):
+            assert not duplicates.check(name, name, text, dicts, set(), True)
+    assert seen == [
+        ('b.txt', 2, 'wibble', (2, 'wibble too')),
+        ('b.txt', 3, 'wobble', (2, 'wibble too')),
+        ('c.txt', 2, 'wibble', (2, 'wibble too')),
+        ('c.txt', 3, 'wobble', (2, 'wibble too'))]
+    # Only the matches are kept, not the text they were found in
+    [(_, failures)] = duplicates._checked.values()
+    assert failures == [(5, 11, 'wibble', ['wibble']),
+                        (21, 27, 'wobble', ['wobble'])]
@@ -0,0 +1,90 @@
+import io
+import os
+import shutil
+
+from scspell import copy_file
+from scspell import delete_files
+from scspell import export_file_ids
+from scspell import FindingCollector
+from scspell import import_file_ids
+from scspell import merge_file_ids
+from scspell import rename_file
+from scspell import spell_check
+from scspell._fileids import JsonFileIdMap
+from scspell._fileids import open_file_id_map
+from scspell._fileids import SqliteFileIdMap
+
+
+FILEIDMAP = os.path.join(os.path.dirname(__file__), 'fileidmap')
+
+
+def exercise(file_id_map):
+    file_id_map.set('b.txt', 'id1')
+    file_id_map.set('a.txt', 'id1')
+    file_id_map.set('c.txt', 'id2')
+    file_id_map.set('d.txt', 'id3')
+    file_id_map.reassign('id2', 'id1')
+    file_id_map.remove('d.txt')
+    file_id_map.set('a.txt', 'id4')
+    assert file_id_map.file_id_of('c.txt') == 'id1'
+    assert file_id_map.file_id_of('d.txt') is None
+    assert file_id_map.has_file_id('id1')
+    assert not file_id_map.has_file_id('id2')
+    assert not file_id_map.has_file_id('id3')
+    assert file_id_map.is_dirty()
+    return list(file_id_map.items())
+
+
+def test_backends_agree(tmpdir):
+    expected = [('a.txt', 'id4'), ('b.txt', 'id1'), ('c.txt', 'id1')]
+    with JsonFileIdMap(str(tmpdir.join('map.json'))) as file_id_map:
+        assert exercise(file_id_map) == expected
+    with SqliteFileIdMap(str(tmpdir.join('map.sqlite'))) as file_id_map:
+        assert exercise(file_id_map) == expected
+
+    with JsonFileIdMap(str(tmpdir.join('map.json'))) as file_id_map:
+        assert list(file_id_map.items()) == expected
+        assert not file_id_map.is_dirty()
+    with SqliteFileIdMap(str(tmpdir.join('map.sqlite'))) as file_id_map:
+        assert list(file_id_map.items()) == expected
+
+
+def test_manage_file_ids_in_database(tmpdir):
+    work = str(tmpdir.join('fileidmap'))
+    shutil.copytree(FILEIDMAP, work)
+    dictionary = os.path.join(work, 'dictionary')
+    assert import_file_ids(dictionary + '.fileids.json', dictionary) == 6
+    os.remove(dictionary + '.fileids.json')
+    assert isinstance(open_file_id_map(dictionary), SqliteFileIdMap)
+
+    def path(filename):
+        return os.path.join(work, filename)
+
+    merge_file_ids(path('mix4.txt'), path('mix1.txt'), dictionary,
+                   relative_to=work)
+    os.rename(path('mix2.txt'), path('mix22.txt'))
+    rename_file(path('mix2.txt'), path('mix22.txt'), dictionary,
+                relative_to=work)
+    delete_files([path('mix5.txt')], dictionary, relative_to=work)
+    copy_file(path('mix3.txt'), path('mix33.txt'), dictionary,
+              relative_to=work)
+
+    export_file_ids(dictionary + '.fileids.json', dictionary)
+    with io.open(dictionary + '.fileids.json', encoding='utf-8') as f:
+        exported = f.read()
+    with io.open(dictionary + '.fileids.json.post', encoding='utf-8') as f:
+        assert exported == f.read()
+
+
+def test_spell_check_with_database(tmpdir):
+    work = str(tmpdir.join('fileidmap'))
+    shutil.copytree(FILEIDMAP, work)
+    dictionary = os.path.join(work, 'dictionary')
+    import_file_ids(dictionary + '.fileids.json', dictionary)
+    os.remove(dictionary + '.fileids.json')
+    # The dictionaries, and so the mapping, are opened on another thread
+    collector = FindingCollector()
+    assert not spell_check([os.path.join(work, 'inputfile.txt')], dictionary,
+                           relative_to=work, report_only=collector)
+    assert [(f.line_num, f.token) for f in collector.findings] == [
+        (3, 'soem')]
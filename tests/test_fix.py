@@ -0,0 +1,81 @@
+import random
+import string
+
+import scspell
+from scspell import decompose_token
+from scspell import decompose_token_spans
+from scspell import fix_from_map
+from scspell import fix_text
+
+
+def test_decompose_token_spans_agrees_with_decompose_token():
+    rng = random.Random(0)
+    alphabet = string.ascii_letters[:6] + string.ascii_letters[26:32] + '_1'
+    for _ in range(2000):
+        token = ''.join(rng.choice(alphabet)
+                        for _ in range(rng.randint(1, 12)))
+        assert [token[a:b].lower() for (a, b) in
+                decompose_token_spans(token)] == decompose_token(token)
+
+
+def test_fix_text():
+    typo_map = {'recieve': 'receive', 'teh': 'the'}
+    buffer = fix_text(
+        'doRecieve(do_recieve, DO_RECIEVE, recievers)\n'
+        'Teh "\\nteh" 0xteh\n', typo_map)
+    assert buffer.get_text() == (
+        'doReceive(do_receive, DO_RECEIVE, recievers)\n'
+        'The "\\nthe" 0xteh\n')
+    buffer = fix_text('"\\nteh"', typo_map, c_escapes=False)
+    assert not buffer.is_modified()
+
+
+def test_fix_text_regions():
+    typo_map = {'teh': 'the'}
+    buffer = fix_text('teh teh teh\n', typo_map, regions=[(2, 7)])
+    assert buffer.get_text() == 'teh the teh\n'
+
+
+def test_fix_from_map(tmpdir, capsys):
+    typo_map = tmpdir.join('typos')
+    typo_map.write('# misspelling correction\nseperate separate\n\n')
+    source = tmpdir.join('source.py')
+    source.write('def seperate_items():\n    pass\n')
+    dictionary = str(tmpdir.join('dictionary'))
+
+    assert fix_from_map([str(source)], str(typo_map), dry_run=True,
+                        override_dictionary=dictionary) is False
+    assert '-def seperate_items():\n+def separate_items():\n' in (
+        capsys.readouterr().out)
+    assert source.read() == 'def seperate_items():\n    pass\n'
+
+    scspell.set_verbosity(0)
+    try:
+        assert fix_from_map([str(source)], str(typo_map),
+                            override_dictionary=dictionary,
+                            prefetch=0) is False
+    finally:
+        scspell.set_verbosity(scspell.VERBOSITY_NORMAL)
+    assert source.read() == 'def separate_items():\n    pass\n'
+    assert fix_from_map([str(source)], str(typo_map),
+                        override_dictionary=dictionary) is True
+
+
+def test_fix_from_map_skips(tmpdir):
+    typo_map = tmpdir.join('typos')
+    typo_map.write('seperate separate\n')
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('FILETYPE: Python; .py\nNATURAL:\n')
+    source = tmpdir.join('source.py')
+    text = ('# see https://example.com/seperate_page\n'
+            'seperate = "seperate"  # seperate\n')
+    source.write(text)
+    scspell.set_verbosity(0)
+    try:
+        assert fix_from_map([str(source)], str(typo_map),
+                            override_dictionary=str(dictionary),
+                            check_only={'comment'}) is False
+    finally:
+        scspell.set_verbosity(scspell.VERBOSITY_NORMAL)
+    assert source.read() == ('# see https://example.com/seperate_page\n'
+                             'seperate = "seperate"  # separate\n')
@@ -0,0 +1,95 @@
+import os
+import subprocess
+
+import pytest
+
+from scspell import FindingCollector
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import spell_check
+from scspell._git import find_toplevel
+from scspell._git import iter_blob_contents
+from scspell._git import revision_blobs
+from scspell._git import staged_blobs
+
+
+# The tests change directory, and on Python 2 the module path may be
+# relative
+BUILTIN_DICT = os.path.abspath(SCSPELL_BUILTIN_DICT)
+
+
+def _git(repo, *args):
+    subprocess.check_call(['git', '-c', 'user.name=scspell',
+                           '-c', 'user.email=scspell@example.com'] +
+                          list(args), cwd=str(repo))
+
+
+@pytest.fixture
+def repo(tmpdir):
+    repo = tmpdir.mkdir('repo')
+    try:
+        _git(repo, 'init', '-q')
+    except OSError:
+        pytest.skip('git is not installed')
+    repo.join('old.txt').write('committed text\n')
+    repo.join('moved.txt').write('moved text wordz\n')
+    _git(repo, 'add', '.')
+    _git(repo, 'commit', '-q', '-m', 'initial')
+
+    repo.mkdir('sub').join('new.txt').write('stagedz\r\n')
+    _git(repo, 'mv', 'moved.txt', 'sub/renamed.txt')
+    os.symlink('old.txt', str(repo.join('link.txt')))
+    _git(repo, 'add', '.')
+    # Not staged, so never checked
+    repo.join('sub', 'new.txt').write('worktreez\n')
+    return repo
+
+
+def test_staged_blobs(repo):
+    toplevel = find_toplevel(str(repo))
+    blobs = staged_blobs(toplevel)
+    assert sorted(path for (path, _) in blobs) == [
+        'sub/new.txt', 'sub/renamed.txt']
+    contents = dict(zip([path for (path, _) in blobs],
+                        iter_blob_contents(toplevel,
+                                           [name for (_, name) in blobs])))
+    assert contents['sub/new.txt'] == b'stagedz\r\n'
+
+
+def test_revision_blobs(repo):
+    toplevel = find_toplevel(str(repo))
+    assert [path for (path, _) in revision_blobs(toplevel, 'HEAD')] == [
+        'moved.txt', 'old.txt']
+    assert [path for (path, _) in revision_blobs(
+        toplevel, 'HEAD', [str(repo.join('old.txt'))])] == ['old.txt']
+
+
+def test_spell_check_staged(repo, tmpdir, monkeypatch):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL:\n\n')
+    monkeypatch.chdir(str(repo.join('sub')))
+    collector = FindingCollector()
+    assert not spell_check([], str(dictionary), [BUILTIN_DICT],
+                           report_only=collector, git_staged=True)
+    assert sorted((f.filename, f.line_num, f.subtokens)
+                  for f in collector.findings) == [
+        ('sub/new.txt', 1, ('stagedz',)),
+        ('sub/renamed.txt', 1, ('wordz',))]
+
+    collector = FindingCollector()
+    assert spell_check(['../old.txt'], str(dictionary),
+                       [BUILTIN_DICT], report_only=collector,
+                       git_rev='HEAD')
+
+
+def test_file_id_from_subdirectory(repo, tmpdir, monkeypatch):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('FILEID: moved\nwordz\nNATURAL:\n\n')
+    tmpdir.join('dictionary.fileids.json').write('{"moved": ["moved.txt"]}')
+    # The file-specific dictionary of a file found in git applies wherever
+    # scspell is run from
+    monkeypatch.chdir(str(repo.join('sub')))
+    collector = FindingCollector()
+    assert spell_check([], str(dictionary), [BUILTIN_DICT],
+                       relative_to=str(repo), report_only=collector,
+                       git_rev='HEAD')
+    assert collector.findings == []
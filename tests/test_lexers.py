@@ -0,0 +1,67 @@
+from __future__ import unicode_literals
+
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import FindingCollector
+from scspell import spell_check
+from scspell._lexers import lex_c_family
+from scspell._lexers import lex_python
+from scspell._regions import parse_region_kinds
+from scspell._regions import RegionSelector
+
+
+PYTHON_SOURCE = '''\
+"""Modle docstring."""
+import os as opsys
+
+
+def frobnicate(valuee, *extrra, **kwargz):
+    # A coment
+    resullt = helpr(valuee, keywrd=1)
+    return "formated" + resullt
+'''
+
+
+def regions(lexer, text, kind):
+    return [text[start:end] for (k, start, end) in lexer(text) if k == kind]
+
+
+def test_lex_python():
+    assert regions(lex_python, PYTHON_SOURCE, 'comment') == ['# A coment']
+    assert regions(lex_python, PYTHON_SOURCE, 'definition') == [
+        'opsys', 'frobnicate', 'valuee', 'extrra', 'kwargz', 'resullt']
+    assert 'helpr' in regions(lex_python, PYTHON_SOURCE, 'identifier')
+    assert 'keywrd' in regions(lex_python, PYTHON_SOURCE, 'identifier')
+    assert '"""Modle docstring."""' in regions(
+        lex_python, PYTHON_SOURCE, 'string')
+
+
+def test_lex_c_family():
+    source = ('/* Block coment */\n'
+              'static char **bufer = "strng\\n"; // trailng\n'
+              'int main(int argc) { return fooo(argc); }\n')
+    assert regions(lex_c_family, source, 'comment') == [
+        '/* Block coment */', '// trailng']
+    assert regions(lex_c_family, source, 'string') == ['"strng\\n"']
+    assert regions(lex_c_family, source, 'definition') == [
+        'bufer', 'main', 'argc']
+    assert regions(lex_c_family, source, 'identifier') == ['fooo', 'argc']
+
+
+def test_region_selector():
+    selector = RegionSelector(parse_region_kinds('comments,definitions'))
+    text = 'x = 1  # note\n'
+    assert selector.select(text, 'Python') == [(0, 1), (7, 13)]
+    assert selector.select(text, None) == [(0, len(text))]
+    assert selector.select('x = (', 'Python') == [(0, 5)]
+    assert RegionSelector().select(text, 'Python') == [(0, len(text))]
+
+
+def test_spell_check_only_comments(tmpdir):
+    source = tmpdir.join('source.py')
+    source.write(PYTHON_SOURCE)
+    collector = FindingCollector()
+    spell_check([str(source)], str(tmpdir.join('dictionary')),
+                base_dicts=[SCSPELL_BUILTIN_DICT], report_only=collector,
+                check_only={'comment', 'string'})
+    assert [f.subtokens for f in collector.findings] == [
+        ('modle',), ('docstring',), ('coment',), ('formated',)]
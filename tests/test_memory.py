@@ -0,0 +1,206 @@
+"""Memory budgets for the dictionary data structures.
+
+Each benchmark measures the memory allocated with tracemalloc, both at its
+peak and once the work is done (the steady state, with the result still
+alive), and fails if either exceeds its recorded budget.  On Linux, loading
+the builtin dictionary is also measured by the growth of the resident set
+size of a fresh process.
+
+Run ``make memory`` to print the measurements against the budgets.
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+import scspell
+from scspell import make_selector
+from scspell import spell_check_text
+from scspell._corpus import CorporaFile
+
+tracemalloc = pytest.importorskip('tracemalloc')
+
+
+MB = 1000 * 1000
+
+# Benchmark -> (steady-state bytes, peak bytes).  Measured with CPython
+# 3.11 on Linux, plus about 25% to allow for other versions, or more for
+# the smallest figures.
+BUDGETS = {
+    'load builtin dictionary': (7.5 * MB, 15 * MB),
+    'load FILEID-heavy dictionary': (23 * MB, 25 * MB),
+    'scan large file': (0.1 * MB, 0.5 * MB),
+    'rss: load builtin dictionary': (None, 16 * MB),
+}
+
+# Size of the synthetic dictionary: FILEID corpora x words in each
+FILE_IDS = 5000
+WORDS_PER_FILE_ID = 20
+
+# Lines in the synthetic file to scan
+SCAN_LINES = 1500
+
+
+def traced(function):
+    """Call function while tracing allocations.
+
+    :returns: (result, steady-state bytes, peak bytes), measured from
+              before the call
+
+    """
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        result = function()
+        (current, peak) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (result, current - base, peak - base)
+
+
+def write_file_id_dictionary(filename):
+    rand = random.Random(0)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    with open(filename, 'w') as f:
+        for i in range(FILE_IDS):
+            f.write('FILEID: id{:05d}\n'.format(i))
+            words = set(''.join(rand.choice(letters)
+                                for _ in range(rand.randint(4, 12)))
+                        for _ in range(WORDS_PER_FILE_ID))
+            for word in sorted(words):
+                f.write(word + '\n')
+        f.write('NATURAL:\n')
+
+
+def make_scan_text():
+    rand = random.Random(0)
+    words = ['total', 'count', 'value', 'result', 'buffer', 'offset',
+             'length', 'index', 'typoo', 'recieve', 'widgett']
+    lines = []
+    for i in range(SCAN_LINES):
+        (a, b, c) = (rand.choice(words) for _ in range(3))
+        lines.append("{0}_{1} = compute{2}({1}Count, 'the {2} of {0}')  "
+                     '# check the {0}\n'.format(a, b, c.title()))
+    return ''.join(lines)
+
+
+def discard_failure(match_desc, filename, unmatched_subtokens):
+    match_desc.get_line_num()
+    return (match_desc.get_string(),
+            match_desc.get_ofs() + len(match_desc.get_token()))
+
+
+def measure_builtin():
+    (dicts, steady, peak) = traced(
+        lambda: CorporaFile(scspell.SCSPELL_BUILTIN_DICT, [], None))
+    return (steady, peak)
+
+
+def measure_file_id_heavy(filename):
+    write_file_id_dictionary(filename)
+    (dicts, steady, peak) = traced(lambda: CorporaFile(filename, [], None))
+    assert len(list(dicts.iter_file_id_corpora())) == FILE_IDS
+    return (steady, peak)
+
+
+def measure_scan():
+    dicts = CorporaFile(scspell.SCSPELL_BUILTIN_DICT, [], None)
+    text = make_scan_text()
+    selector = make_selector()
+    (result, steady, peak) = traced(
+        lambda: spell_check_text(text, 'scan.py', 'scan.py', dicts, set(),
+                                 discard_failure, True, selector))
+    assert result[1] is False
+    return (steady, peak)
+
+
+_RSS_SCRIPT = '''
+import sys
+sys.path.insert(0, sys.argv[1])
+import scspell
+from scspell._corpus import CorporaFile
+
+def high_water_mark():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) * 1024
+
+before = high_water_mark()
+dicts = CorporaFile(scspell.SCSPELL_BUILTIN_DICT, [], None)
+print(high_water_mark() - before)
+'''
+
+
+def measure_rss_builtin():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, '-c', _RSS_SCRIPT,
+                                      root])
+    return (None, int(output))
+
+
+def check_budget(name, measured):
+    for (kind, value, budget) in zip(('steady-state', 'peak'), measured,
+                                     BUDGETS[name]):
+        if budget is not None:
+            assert value <= budget, (
+                '{}: {} memory {:.2f} MB exceeds the budget of {:.2f} '
+                'MB'.format(name, kind, value / MB, budget / MB))
+
+
+def test_load_builtin_dictionary():
+    check_budget('load builtin dictionary', measure_builtin())
+
+
+def test_load_file_id_heavy_dictionary(tmpdir):
+    check_budget('load FILEID-heavy dictionary',
+                 measure_file_id_heavy(str(tmpdir.join('dictionary'))))
+
+
+def test_scan_large_file():
+    check_budget('scan large file', measure_scan())
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/status'),
+                    reason='needs /proc/self/status')
+def test_rss_load_builtin_dictionary():
+    check_budget('rss: load builtin dictionary', measure_rss_builtin())
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        results = [
+            ('load builtin dictionary', measure_builtin()),
+            ('load FILEID-heavy dictionary', measure_file_id_heavy(
+                os.path.join(directory, 'dictionary'))),
+            ('scan large file', measure_scan()),
+        ]
+    finally:
+        shutil.rmtree(directory)
+    if os.path.exists('/proc/self/status'):
+        results.append(('rss: load builtin dictionary',
+                        measure_rss_builtin()))
+
+    def mb(value):
+        return '-' if value is None else '{:.2f}'.format(value / MB)
+
+    print('{:30} {:>9} {:>9} {:>9} {:>9}'.format(
+        'benchmark (MB)', 'steady', 'budget', 'peak', 'budget'))
+    for (name, (steady, peak)) in results:
+        (steady_budget, peak_budget) = BUDGETS[name]
+        print('{:30} {:>9} {:>9} {:>9} {:>9}'.format(
+            name, mb(steady), mb(steady_budget), mb(peak), mb(peak_budget)))
+
+
+if __name__ == '__main__':
+    main()
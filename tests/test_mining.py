@@ -0,0 +1,71 @@
+import io
+import os
+
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import spell_check
+from scspell import VocabularyMiner
+
+
+FILEIDMAP = os.path.join(os.path.dirname(__file__), 'fileidmap')
+
+
+def mine(miner, filenames):
+    return spell_check(
+        [os.path.join(FILEIDMAP, fn) for fn in filenames],
+        os.path.join(FILEIDMAP, 'dictionary'),
+        base_dicts=[SCSPELL_BUILTIN_DICT], report_only=miner)
+
+
+def test_vocabulary_miner_spills():
+    filenames = ['mix1.txt', 'mix2.txt', 'mix3.txt', 'mix1.txt', 'mix5.txt']
+    with VocabularyMiner(max_words=2) as miner:
+        assert mine(miner, filenames) is False
+        assert len(miner.spill_files) == 4
+        entries = {e.word: e for e in miner.entries()}
+        spill_files = list(miner.spill_files)
+    assert not any(os.path.exists(fn) for fn in spill_files)
+
+    assert sorted(entries) == ['doates', 'doats', 'endosey', 'lamsy',
+                               'maresy', 'nliddle', 'tivy', 'tyoo',
+                               'woodn']
+    # mix1.txt is given twice, but is only one file
+    assert entries['doats'].count == 2
+    assert entries['doats'].files == 1
+    assert entries['doats'].samples[0] == (
+        os.path.join(FILEIDMAP, 'mix1.txt'), 1)
+
+
+def test_vocabulary_miner_write_section():
+    with VocabularyMiner() as miner:
+        mine(miner, ['inputfile.txt', 'inputfile2.txt', 'mix1.txt'])
+        assert [(e.word, e.count, e.files) for e in miner.most_common(1)] == [
+            ('soem', 2, 2)]
+
+        f = io.StringIO()
+        assert miner.write_section(f, 'FILEID', 'some-id', min_files=2) == 1
+        assert f.getvalue() == 'FILEID: some-id\nsoem\n\n'
+
+
+class FakeMatch(object):
+
+    def get_line_num(self):
+        return 1
+
+    def get_string(self):
+        return 'text'
+
+    def get_ofs(self):
+        return 0
+
+    def get_token(self):
+        return 'text'
+
+
+def test_vocabulary_miner_counts_files_across_spills():
+    with VocabularyMiner(max_words=1, max_samples=2) as miner:
+        for filename in ['a', 'a', 'b', 'a', 'c', 'b']:
+            miner(FakeMatch(), filename, ['zzx', 'zzy'])
+        assert len(miner.spill_files) == 4
+        assert [tuple(e) for e in miner.entries()] == [
+            ('zzx', 6, 3, (('a', 1), ('a', 1))),
+            ('zzy', 6, 3, (('a', 1), ('a', 1)))]
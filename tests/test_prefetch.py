@@ -0,0 +1,30 @@
+import os
+
+from scspell import iter_source_files
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import spell_check
+
+
+FILEIDMAP = os.path.join(os.path.dirname(__file__), 'fileidmap')
+
+
+def test_iter_source_files_keeps_order():
+    filenames = [os.path.join(FILEIDMAP, fn) for fn in
+                 ('mix1.txt', 'missing.txt', 'mix2.txt', 'mix3.txt')]
+    for prefetch in (0, 1, 2, 10):
+        results = list(iter_source_files(filenames, prefetch))
+        assert [r[0] for r in results] == filenames
+        assert [r[2] for r in results] == [
+            'maresy doats\n', None, 'endosey doates\n',
+            'nliddle lamsy tivy\n']
+
+
+def test_spell_check_with_prefetch():
+    filenames = [os.path.join(FILEIDMAP, 'mix{}.txt'.format(i))
+                 for i in range(1, 6)]
+    dictionary = os.path.join(FILEIDMAP, 'dictionary')
+    for prefetch in (0, 3):
+        assert spell_check(filenames, dictionary,
+                           base_dicts=[SCSPELL_BUILTIN_DICT],
+                           relative_to=FILEIDMAP, report_only=True,
+                           prefetch=prefetch)
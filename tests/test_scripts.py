@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import sys
+
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import FindingCollector
+from scspell import spell_check
+from scspell._regions import RegionSelector
+from scspell._scripts import parse_scripts
+from scspell._scripts import ScriptFilter
+
+
+TEXT = 'hello Привет, 世界 naïve café Ελλάδα x'
+
+
+def skipped(text, scripts):
+    return [text[start:end] for (start, end) in scripts.find_spans(text)]
+
+
+def test_find_spans():
+    scripts = ScriptFilter()
+    assert skipped(TEXT, scripts) == ['Привет', '世界', 'Ελλάδα']
+    assert scripts.skipped_runs == 3
+    assert scripts.skipped_chars == 14
+
+
+def test_other_scripts():
+    assert skipped(TEXT, ScriptFilter(['latin', 'greek'])) == [
+        'Привет', '世界']
+    assert skipped(TEXT, ScriptFilter(['cyrillic'])) == [
+        'hello', '世界', 'naïve', 'café', 'Ελλάδα', 'x']
+
+
+def test_parse_scripts():
+    assert parse_scripts('Latin, greek') == set(['latin', 'greek'])
+    assert parse_scripts('all') is None
+    try:
+        parse_scripts('latin,klingon')
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_region_selector_scripts():
+    text = 'helloМир wrld'
+    assert RegionSelector().select(text, None) == [(0, 5), (8, 13)]
+    assert RegionSelector(scripts=False).select(text, None) == [(0, 13)]
+
+
+def test_spell_check_scripts(tmpdir):
+    source = tmpdir.join('messages.txt')
+    source.write_text('Save the filee\nСохранить файл\nファイルを保存\n',
+                      'utf-8')
+    collector = FindingCollector()
+    spell_check([str(source)], str(tmpdir.join('dictionary')),
+                base_dicts=[SCSPELL_BUILTIN_DICT], report_only=collector)
+    assert [f.subtokens for f in collector.findings] == [('filee',)]
+
+    collector = FindingCollector()
+    spell_check([str(source)], str(tmpdir.join('dictionary')),
+                base_dicts=[SCSPELL_BUILTIN_DICT], report_only=collector,
+                scripts=None)
+    # On Python 2 the token pattern only matches ASCII word characters, so
+    # text in other scripts is never checked anyway
+    assert len(collector.findings) == (4 if sys.version_info[0] >= 3 else 1)
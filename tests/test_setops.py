@@ -0,0 +1,193 @@
+from scspell import combine_dictionary
+from scspell import compact_dictionary
+from scspell import filter_out_base_dicts
+from scspell._corpus import CorporaFile
+from scspell._corpus import OP_DIFF
+from scspell._corpus import OP_INTERSECT
+from scspell._corpus import OP_UNION
+from scspell._setops import accepted_by
+from scspell._setops import difference
+from scspell._setops import intersection
+from scspell._setops import redundant_prefixes
+from scspell._setops import union
+
+
+FIRST = '''\
+FILETYPE: Python; .py
+cls
+self
+
+FILETYPE: C; .c, .h
+malloc
+
+FILEID: abc
+frobnicate
+
+NATURAL:
+apple
+banana
+cherry
+
+'''
+
+SECOND = '''\
+FILETYPE: Python; .py, .pyw
+self
+yield
+
+FILETYPE: Shell; .sh, .h
+esac
+
+NATURAL:
+apples
+cherry
+date
+
+'''
+
+
+def test_accepted_by():
+    assert list(accepted_by(['a', 'ap', 'apple', 'apt', 'b'],
+                            ['apples', 'b'])) == ['a', 'ap', 'apple', 'b']
+    assert list(accepted_by(['x'], [])) == []
+
+
+def test_list_operations():
+    assert union(['a', 'c'], ['b', 'c', 'd']) == ['a', 'b', 'c', 'd']
+    assert intersection(['a', 'c', 'e'], ['b', 'c', 'e']) == ['c', 'e']
+    assert difference(['a', 'c', 'e'], ['c']) == ['a', 'e']
+
+
+def test_list_operations_prefix():
+    assert intersection(['app', 'bar'], ['apple', 'ba'],
+                        prefix=True) == ['app', 'ba']
+    assert difference(['app', 'apple', 'bar'], ['apple'],
+                      prefix=True) == ['bar']
+    # Without prefix semantics, only exact words are dropped
+    assert difference(['app', 'apple', 'bar'], ['apple']) == ['app', 'bar']
+
+
+def _combine(tmpdir, operation):
+    first = tmpdir.join('first')
+    first.write(FIRST)
+    second = tmpdir.join('second')
+    second.write(SECOND)
+    output = tmpdir.join('output')
+    combine_dictionary(operation, str(second), str(output),
+                       override_dictionary=str(first))
+    return output.read()
+
+
+def test_union(tmpdir):
+    assert _combine(tmpdir, OP_UNION) == '''\
+FILETYPE: Python; .py, .pyw
+cls
+self
+yield
+
+FILETYPE: C; .c, .h
+malloc
+
+FILETYPE: Shell; .sh
+esac
+
+FILEID: abc
+frobnicate
+
+NATURAL:
+apple
+apples
+banana
+cherry
+date
+
+'''
+
+
+def test_intersect(tmpdir):
+    assert _combine(tmpdir, OP_INTERSECT) == '''\
+FILETYPE: Python; .py
+self
+
+NATURAL:
+apple
+cherry
+
+'''
+
+
+def test_diff(tmpdir):
+    assert _combine(tmpdir, OP_DIFF) == '''\
+FILETYPE: Python; .py
+cls
+
+FILETYPE: C; .c, .h
+malloc
+
+FILEID: abc
+frobnicate
+
+NATURAL:
+banana
+
+'''
+
+
+def test_union_result_is_readable(tmpdir):
+    output = tmpdir.join('union')
+    output.write(_combine(tmpdir, OP_UNION))
+    with CorporaFile(str(output), [], None) as dicts:
+        assert dicts.get_filetype_of_extension('.h') == 'C'
+        assert dicts.match('yield', 'x.pyw', None)
+
+
+def test_filter_out_base_dicts(tmpdir):
+    base = tmpdir.join('base')
+    base.write(SECOND)
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write(FIRST.replace('cls\n', 'cls\ndat\n'))
+    filter_out_base_dicts(str(dictionary), [str(base)])
+    # "apple" and "dat" are prefixes of base natural language words;
+    # "self" is in the base Python corpus, but "malloc" only in ours.
+    assert dictionary.read() == '''\
+FILETYPE: Python; .py
+cls
+
+FILETYPE: C; .c, .h
+malloc
+
+FILEID: abc
+frobnicate
+
+NATURAL:
+banana
+
+'''
+
+
+def test_redundant_prefixes():
+    assert list(redundant_prefixes(
+        ['a', 'ab', 'abc', 'abd', 'b', 'ba', 'c'])) == ['a', 'ab', 'b']
+    assert list(redundant_prefixes(
+        ['ab', 'ab', 'abc', 'b', 'b', 'c'])) == ['ab']
+
+
+def test_compact_dictionary(tmpdir, capsys):
+    dictionary = tmpdir.join('dictionary')
+    text = FIRST.replace('self\n', 'sel\nself\n')
+    dictionary.write(text.replace('apple\n', 'app\napple\n'))
+    assert compact_dictionary(str(dictionary), dry_run=True) == ['app']
+    assert capsys.readouterr().out == 'app\n'
+    assert 'app\n' in dictionary.read()
+
+    assert compact_dictionary(str(dictionary)) == ['app']
+    # File-type words are matched exactly, so are left alone
+    assert dictionary.read() == text
+
+
+def test_compact_dictionary_duplicates(tmpdir):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL:\nzebra\nzebrafoo\nzebrafoo\nzzz\n')
+    assert compact_dictionary(str(dictionary)) == ['zebra']
+    with CorporaFile(str(dictionary), [], None) as dicts:
+        assert dicts.match('zebrafoo', 'a.txt', None)
@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+
+from scspell import merge_reports
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import spell_check
+from scspell._shard import parse_shard
+from scspell._shard import select_shard
+from scspell._shard import shard_of
+
+
+def test_parse_shard():
+    assert parse_shard('2/4') == (2, 4)
+    for spec in ('0/4', '5/4', '4', 'a/b'):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_shards_partition_files():
+    filenames = ['src/file{}.py'.format(i) for i in range(300)]
+    shards = [select_shard(filenames, (k, 3)) for k in (1, 2, 3)]
+    assert sorted(sum(shards, [])) == sorted(filenames)
+    for shard in shards:
+        assert 70 < len(shard) < 130
+    # The shard depends only on the normalized path
+    assert shard_of('./src/file1.py', 3) == shard_of('src/file1.py', 3)
+
+
+def test_shard_of_relative_to_base(tmpdir, monkeypatch):
+    # Two checkouts in different places, given absolute paths
+    one = tmpdir.join('one').join('src').join('file1.py')
+    two = tmpdir.join('two').join('src').join('file1.py')
+    counts = (5, 7, 11, 13)
+    assert ([shard_of(str(one), n, str(tmpdir.join('one'))) for n in counts] ==
+            [shard_of(str(two), n, str(tmpdir.join('two'))) for n in counts])
+    monkeypatch.chdir(tmpdir.join('one').ensure(dir=True))
+    assert ([shard_of(str(one), n) for n in counts] ==
+            [shard_of('src/file1.py', n) for n in counts] ==
+            [shard_of(str(two), n, str(tmpdir.join('two'))) for n in counts])
+
+
+def _check_shards(tmpdir, count):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL:\n\n')
+    filenames = []
+    for i in range(6):
+        source = tmpdir.join('source{}.txt'.format(i))
+        source.write('fine text\nwordz{}\n'.format(i))
+        filenames.append(str(source))
+    reports = []
+    for k in range(1, count + 1):
+        report = str(tmpdir.join('report{}.json'.format(k)))
+        spell_check(filenames, str(dictionary), [SCSPELL_BUILTIN_DICT],
+                    report_only=True, shard=(k, count), report_file=report)
+        reports.append(report)
+    return (filenames, reports)
+
+
+def test_merge_reports(tmpdir, capsys):
+    (filenames, reports) = _check_shards(tmpdir, 3)
+    capsys.readouterr()
+    merged = str(tmpdir.join('merged.json'))
+    assert not merge_reports(reports, merged)
+
+    lines = capsys.readouterr().err.splitlines()
+    assert lines[:-1] == [
+        "{}:2: 'wordz' not found in dictionary (from token 'wordz{}')".format(
+            f, i) for (i, f) in enumerate(filenames)]
+    assert lines[-1] == 'Checked 6 files: 6 failures'
+    with io.open(merged, encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['shard'] is None
+    assert len(report['findings']) == 6
+
+
+def test_merge_reports_missing_shard(tmpdir):
+    (_, reports) = _check_shards(tmpdir, 3)
+    with pytest.raises(SystemExit) as e:
+        merge_reports(reports[1:])
+    assert 'Missing reports for shards 1/3' in str(e.value)
@@ -0,0 +1,96 @@
+from __future__ import unicode_literals
+
+import base64
+
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import FindingCollector
+from scspell import spell_check
+from scspell._regions import RegionSelector
+from scspell._regions import subtract_spans
+from scspell._skip import compile_skip_pattern
+from scspell._skip import SkipPatterns
+
+
+BLOB = base64.b64encode(bytes(bytearray(range(48)))).decode('ascii')
+
+SOURCE = '''\
+See https://example.com/wiki/Some_Pagee?qury=1 or mail bugz@exampel.org.
+id = "5f1c2a9e-3b4d-11ee-be56-0242ac120002"
+commit 3f786850e387550fdab836ed7e6dc881de23001b fixes a typoo
+data = "{0}"
+'''.format(BLOB)
+
+
+def matched(text, skips, filetype=None):
+    return [text[start:end] for (start, end) in
+            skips.find_spans(text, filetype)]
+
+
+def test_default_patterns():
+    assert matched(SOURCE, SkipPatterns()) == [
+        'https://example.com/wiki/Some_Pagee?qury=1',
+        'bugz@exampel.org',
+        '5f1c2a9e-3b4d-11ee-be56-0242ac120002',
+        '3f786850e387550fdab836ed7e6dc881de23001b',
+        BLOB]
+    assert matched(SOURCE, SkipPatterns(use_defaults=False)) == []
+
+
+def test_ordinary_words_not_skipped():
+    text = 'deadbeef cafe ordinaryIdentifierNameThatIsRatherLongIndeed'
+    assert matched(text, SkipPatterns()) == []
+
+
+def test_filetype_and_user_patterns():
+    text = 'color: #fafafa; content: "&nbsp;"; x: TODOXYZ'
+    assert matched(text, SkipPatterns(), 'CSS') == ['#fafafa']
+    assert matched(text, SkipPatterns(), 'HTML') == ['&nbsp;']
+    assert matched(text, SkipPatterns(['TODO[A-Z]+'])) == ['TODOXYZ']
+
+
+def test_compile_skip_pattern():
+    assert compile_skip_pattern('a+') == 'a+'
+    try:
+        compile_skip_pattern('a(')
+    except ValueError:
+        pass
+    else:
+        assert False
+    try:
+        compile_skip_pattern(r'(?i)TODO\w+')
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_user_patterns_with_groups():
+    text = 'abab x-y-x cdcd ababab'
+    skips = SkipPatterns([r'(ab)\1', r'(\w)-(\w)-\1', r'(cd)\1'],
+                         use_defaults=False)
+    assert matched(text, skips) == ['abab', 'x-y-x', 'cdcd', 'abab']
+    skips = SkipPatterns([r'(\w+) x', r'x-(y)'], use_defaults=False)
+    assert matched(text, skips) == ['abab x-y']
+
+
+def test_subtract_spans():
+    assert subtract_spans([(0, 10), (20, 30)],
+                          [(2, 4), (8, 22), (25, 30)]) == [
+        (0, 2), (4, 8), (22, 25)]
+    assert subtract_spans([(0, 10)], []) == [(0, 10)]
+    assert subtract_spans([(5, 10)], [(0, 20)]) == []
+
+
+def test_region_selector_skips():
+    text = 'see http://exampel.com now'
+    assert RegionSelector().select(text, None) == [(0, 4), (22, 26)]
+    assert RegionSelector(skips=False).select(text, None) == [(0, 26)]
+
+
+def test_spell_check_skips(tmpdir):
+    source = tmpdir.join('source.txt')
+    source.write(SOURCE)
+    collector = FindingCollector()
+    spell_check([str(source)], str(tmpdir.join('dictionary')),
+                base_dicts=[SCSPELL_BUILTIN_DICT], report_only=collector)
+    assert [f.subtokens for f in collector.findings] == [('typoo',)]
@@ -0,0 +1,69 @@
+from __future__ import unicode_literals
+
+import os
+
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import FindingCollector
+from scspell import iter_source_files
+from scspell import spell_check
+from scspell._sniff import FileFilter
+from scspell._sniff import sniff
+
+
+PROSE = ('The quick brown fox jumps over the lazy dog, and then it '
+         'wanders off to find something else to do. ') * 40
+
+MINIFIED = ('function(a,b){return a.map(function(c){return c*b})};'
+            'var x=document.getElementById("main");') * 40
+
+
+def test_sniff():
+    assert sniff(b'') is None
+    assert sniff(b'plain text\n') is None
+    assert sniff(b'PNG\r\n\x1a\n\x00\x00\x00\rIHDR') == 'binary'
+    assert sniff(bytes(bytearray(range(1, 32))) * 10) == 'binary'
+    assert sniff(PROSE.encode('ascii')) is None
+    assert sniff(MINIFIED.encode('ascii')) == 'minified'
+    assert sniff((MINIFIED.replace(';', ';\n')).encode('ascii')) is None
+    assert sniff(bytes(bytearray(range(33, 127))) * 20) == 'minified'
+
+
+def test_sniff_other_scripts():
+    # Long lines of text in other scripts, as in localization files
+    cjk = '"title":"\u65e5\u672c\u8a9e\u306e\u30c6\u30ad\u30b9\u30c8",' * 60
+    assert sniff(cjk.encode('utf-8')) is None
+    cyrillic = ('\u041f\u0440\u0438\u0432\u0435\u0442\u0441\u0442'
+                '\u0432\u0443\u044e ' * 120)
+    assert sniff(cyrillic.encode('utf-8')) is None
+
+
+def test_file_filter(tmpdir):
+    text = tmpdir.join('text.txt')
+    text.write('hello wordl\n')
+    binary = tmpdir.join('image.png')
+    binary.write_binary(b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR')
+    minified = tmpdir.join('app.min.js')
+    minified.write(MINIFIED)
+    filenames = [str(p) for p in (text, binary, minified)]
+
+    file_filter = FileFilter()
+    results = list(iter_source_files(filenames, 2, file_filter))
+    assert [r[0] for r in results] == [str(text)]
+    assert file_filter.skipped == [(str(binary), 'binary'),
+                                   (str(minified), 'minified')]
+
+    file_filter = FileFilter(max_file_size=100, skip_binary=False)
+    results = list(iter_source_files(filenames, 0, file_filter))
+    assert [r[0] for r in results] == filenames[:2]
+    assert file_filter.skipped == [(str(minified), 'too large')]
+
+
+def test_spell_check_skips_binary(tmpdir, capsys):
+    tmpdir.join('notes.txt').write('a mispeled word\n')
+    tmpdir.join('data.bin').write_binary(os.urandom(64) + b'\x00')
+    collector = FindingCollector()
+    spell_check([str(tmpdir.join(fn)) for fn in ('notes.txt', 'data.bin')],
+                str(tmpdir.join('dictionary')),
+                base_dicts=[SCSPELL_BUILTIN_DICT], report_only=collector)
+    assert [f.subtokens for f in collector.findings] == [('mispeled',)]
+    assert 'Skipped 1 file: 1 binary' in capsys.readouterr().err
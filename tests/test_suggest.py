@@ -0,0 +1,40 @@
+from scspell._corpus import DICT_TYPE_NATURAL
+from scspell._corpus import PrefixMatchCorpus
+from scspell._suggest import DeletionIndex
+from scspell._suggest import edit_distance
+
+
+def test_edit_distance():
+    assert edit_distance('variable', 'variable', 2) == 0
+    assert edit_distance('varaible', 'variable', 2) == 1
+    assert edit_distance('recieve', 'receive', 2) == 1
+    assert edit_distance('kitten', 'sitting', 2) == 3
+    assert edit_distance('kitten', 'sitting', 3) == 3
+    assert edit_distance('abc', 'abcdef', 2) == 3
+
+
+def test_deletion_index():
+    index = DeletionIndex(['receive', 'relieve', 'received', 'variable',
+                           'variables', 'unrelated'])
+    assert index.lookup('recieve') == [
+        (1, 'receive'), (1, 'relieve'), (2, 'received')]
+    assert index.lookup('recieve', 1) == [(1, 'receive'), (1, 'relieve')]
+    assert index.lookup('varaible') == [(1, 'variable'), (2, 'variables')]
+    assert index.lookup('zzzzzz') == []
+
+
+def test_corpus_suggest_sees_added_words():
+    corpus = PrefixMatchCorpus(DICT_TYPE_NATURAL, None, ['function'])
+    assert corpus.suggest('functoin') == [(1, 'function')]
+    corpus.add('junction')
+    assert corpus.suggest('functoin') == [(1, 'function'), (2, 'junction')]
+
+
+def test_deletion_index_by_length():
+    index = DeletionIndex(['the', 'then', 'variable'])
+    assert index.lookup('teh') == [(1, 'the'), (2, 'then')]
+    # Words of lengths already indexed are indexed as they are added
+    index.add('ten')
+    index.add('variably')
+    assert index.lookup('teh') == [(1, 'ten'), (1, 'the'), (2, 'then')]
+    assert index.lookup('varaible') == [(1, 'variable'), (2, 'variably')]
@@ -0,0 +1,58 @@
+from __future__ import unicode_literals
+
+from scspell import apply_triage_replacements
+from scspell import spell_check_files
+from scspell import TriageCollector
+from scspell._corpus import CorporaFile
+
+
+def scan(tmpdir, files):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL:\nthe\n')
+    for (name, text) in files:
+        tmpdir.join(name).write(text)
+    with CorporaFile(str(dictionary), [], None) as dicts:
+        collector = TriageCollector(dicts, samples=2)
+        spell_check_files([str(tmpdir.join(name)) for (name, _) in files],
+                          dicts, collector, True)
+    return collector
+
+
+def test_grouped_by_word(tmpdir):
+    collector = scan(tmpdir, [
+        ('a.c', 'doRecieve(the)\nrecieve wibble\n'),
+        ('b.c', 'recieve wibble\n'),
+        ('c.c', 'recieve\n')])
+    assert collector.ranked() == ['recieve', 'wibble']
+    (occurrences, samples) = collector.words['recieve']
+    assert [(f[-3:], ofs, token) for (f, ofs, token) in occurrences] == [
+        ('a.c', 0, 'doRecieve'), ('a.c', 15, 'recieve'),
+        ('b.c', 0, 'recieve'), ('c.c', 0, 'recieve')]
+    assert [match_desc.get_line_num() for (_, match_desc) in samples] == [
+        1, 2]
+
+
+def test_apply_replacements(tmpdir):
+    collector = scan(tmpdir, [
+        ('a.c', 'doRecieve(the)\nRECIEVE_ALL recievers\n'),
+        ('b.c', 'recieve wibble\n')])
+    # Changed since the scan, so left alone
+    tmpdir.join('b.c').write('recieve wibble wibble\n')
+    assert apply_triage_replacements(
+        collector, {'recieve': 'receive', 'recievers': 'receivers'}) == (
+            3, 1)
+    assert tmpdir.join('a.c').read() == (
+        'doReceive(the)\nRECEIVE_ALL receivers\n')
+    assert tmpdir.join('b.c').read() == 'recieve wibble wibble\n'
+
+
+def test_has_extension(tmpdir):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('FILETYPE: C; .c\nmalloc\nNATURAL:\n')
+    base = tmpdir.join('base')
+    base.write('FILETYPE: Python; .py\nyield\nNATURAL:\n')
+    with CorporaFile(str(dictionary), [str(base)], None) as dicts:
+        assert dicts.has_extension('.c')
+        # Words can only be added to this file's own file types
+        assert not dicts.has_extension('.py')
+        assert not dicts.has_extension('.h')
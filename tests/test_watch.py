@@ -0,0 +1,88 @@
+import os
+import sys
+
+import pytest
+
+from scspell import SCSPELL_BUILTIN_DICT
+from scspell import WatchSession
+from scspell._watch import InotifyWatcher
+from scspell._watch import PollingWatcher
+
+
+def _touch(path, text, mtime):
+    with open(path, 'w') as f:
+        f.write(text)
+    os.utime(path, (mtime, mtime))
+
+
+def test_polling_watcher(tmpdir):
+    tree = tmpdir.mkdir('tree')
+    _touch(str(tree.join('a.txt')), 'a', 1000)
+    _touch(str(tree.join('b.txt')), 'b', 1000)
+    tree.mkdir('.git').join('index').write('x')
+    dictionary = str(tmpdir.join('dictionary'))
+    _touch(dictionary, 'NATURAL:\n', 1000)
+
+    watcher = PollingWatcher([str(tree)], [dictionary], interval=0.01)
+    assert watcher.wait(0) == set()
+    _touch(str(tree.join('a.txt')), 'a', 2000)
+    tree.join('b.txt').remove()
+    tree.mkdir('sub').join('c.txt').write('c')
+    tree.join('.git', 'index').write('y')
+    _touch(dictionary, 'NATURAL:\nword\n', 2000)
+    assert watcher.wait(0) == set([str(tree.join('a.txt')),
+                                   str(tree.join('b.txt')),
+                                   str(tree.join('sub', 'c.txt')),
+                                   dictionary])
+    assert watcher.wait(0) == set()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'),
+                    reason='inotify is Linux-only')
+def test_inotify_watcher(tmpdir):
+    tree = tmpdir.mkdir('tree')
+    tree.join('a.txt').write('a')
+    tree.join('b.txt').write('b')
+    dictionary = str(tmpdir.join('dictionary'))
+    with InotifyWatcher([str(tree)], [dictionary]) as watcher:
+        assert watcher.wait(0) == set()
+        tree.join('a.txt').write('aa')
+        tree.join('b.txt').remove()
+        sub = tree.mkdir('sub')
+        tmpdir.join('unwatched.txt').write('x')
+        assert watcher.collect(0.1) == set([str(tree.join('a.txt')),
+                                            str(tree.join('b.txt'))])
+        sub.join('c.txt').write('c')
+        tmpdir.join(os.path.basename(dictionary)).write('NATURAL:\n')
+        assert watcher.collect(0.1) == set([str(sub.join('c.txt')),
+                                            dictionary])
+
+
+def test_watch_session(tmpdir):
+    dictionary = tmpdir.join('dictionary')
+    dictionary.write('NATURAL:\nwordz\n\n')
+    first = tmpdir.join('first.txt')
+    first.write('wordz\n')
+    second = tmpdir.join('second.txt')
+    second.write('wrongx\n')
+    session = WatchSession(str(dictionary), [SCSPELL_BUILTIN_DICT])
+    try:
+        assert not session.check([str(first), str(second)])
+        assert session.failing == set([str(second)])
+
+        # A word was added: only the failing file is re-checked
+        dictionary.write('NATURAL:\nwordz\nwrongx\n\n')
+        assert session.handle_changes([str(dictionary)]) == [str(second)]
+        assert session.failing == set()
+
+        # A word was removed: every file is re-checked
+        dictionary.write('NATURAL:\nwrongx\n\n')
+        assert session.handle_changes([str(dictionary)]) == [str(first),
+                                                             str(second)]
+        assert session.failing == set([str(first)])
+
+        first.remove()
+        assert session.handle_changes([str(first)]) == []
+        assert session.failing == set()
+    finally:
+        session.close()